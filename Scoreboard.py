@@ -1,9 +1,15 @@
 import argparse
+import functools
 import json
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageOps
-import pytesseract
-from inference_sdk import InferenceHTTPClient
+from batch_io import WRITERS, process_batch
+from detector_backends import get_detector
+from digit_recognizer import MIN_CONFIDENCE, get_digit_recognizer
+from ocr_engine import get_ocr_engine
 
 
 def clean_ocr_text(text, class_name):
@@ -17,7 +23,9 @@ def clean_ocr_text(text, class_name):
     if class_name == "Down":
         # Handle common OCR errors in down format
         text = re.sub(r'(?i)\b([1-4])(st|nd|rd|th)\b', lambda m: m.group().lower(), text)
-        text = re.sub(r'(?i)(?:a|8|&apos;|\.)', ' & ', text)
+        # OCR often reads the "&" between down and distance as "8" or "a"; only the
+        # separator right after the ordinal is replaced, so distances like 8 and 18 survive.
+        text = re.sub(r'(?i)^([1-4](?:st|nd|rd|th)?)\s*(?:&apos;?|&|and|a|8|\.)\s*(?=\S)', r'\1 & ', text)
         text = re.sub(r'\s+', ' ', text).strip().title()
         text = re.sub(r'\b(&)\b', 'and', text)
 
@@ -49,54 +57,145 @@ def clean_ocr_text(text, class_name):
     return text.strip()
 
 
-def process_scoreboard(image_path, json_data):
-    # Load image and parse JSON
-    image = Image.open(image_path)
-    data = json.loads(json_data)[0]["model_predictions"]
+DIGIT_CLASSES = ("Score", "YardNumber")
+# Fields clean_ocr_text reduces to digits (and colons), which the digit recognizer can read.
+RECOGNIZER_CLASSES = ("Score", "YardNumber", "PlayTime")
+OCR_WORKERS = int(os.environ.get("SCOREBOARD_OCR_WORKERS", "1"))
+SCOREBOARD_FIELDS = ["Score", "Quarter", "Down", "YardNumber", "PlayTime", "Clock"]
 
-    # Get original image dimensions
-    img_width = data["image"]["width"]
-    img_height = data["image"]["height"]
-    # scale_factor = 2878 / img_width  # Adjust if image size changes
 
-    results = {}
+def region_bounds(detection, width, height):
+    """(left, top, right, bottom) of a detection, clamped to a width x height image."""
+    # Scale coordinates
+    w = detection["width"]
+    h = detection["height"]
+    x = detection["x"]
+    y = detection["y"]
 
-    for detection in data["predictions"]:
-        class_name = detection["class"]
-        if class_name == "SB":
-            continue
-
-        # Scale coordinates
-        w = detection["width"]
-        h = detection["height"]
-        x = detection["x"]
-        y = detection["y"]
-
-        # Calculate bounds
-        left = max(0, x - w / 2)
-        top = max(0, y - h / 2)
-        right = min(image.width, x + w / 2)
-        bottom = min(image.height, y + h / 2)
-
-        # Crop and process
-        cropped = image.crop((left, top, right, bottom))
-
-        # Enhanced preprocessing
-        cropped = cropped.convert('L').resize((cropped.width * 2, cropped.height * 2))
-        cropped = ImageOps.autocontrast(cropped)
-
-        # Class-specific OCR configuration
-        if class_name in ["Score", "YardNumber"]:
-            config = '--psm 7 --oem 3 -c tessedit_char_whitelist=0123456789'
-        else:
-            config = '--psm 7 --oem 3'
+    # Calculate bounds
+    left = max(0, x - w / 2)
+    top = max(0, y - h / 2)
+    right = min(width, x + w / 2)
+    bottom = min(height, y + h / 2)
+    return left, top, right, bottom
+
+
+def crop_region(image, detection):
+    """Crop one detection out of the scoreboard image."""
+    return image.crop(region_bounds(detection, image.width, image.height))
+
+
+def preprocess_region(cropped):
+    """Grayscale, upscale 2x and autocontrast a crop for OCR."""
+    cropped = cropped.convert('L').resize((cropped.width * 2, cropped.height * 2))
+    return ImageOps.autocontrast(cropped)
+
+
+def prepare_region(image, detection):
+    """Crop one detection out of the scoreboard image and preprocess it for OCR."""
+    return preprocess_region(crop_region(image, detection))
+
+
+def crop_regions(image, data):
+    """Crop and preprocess every non-SB detection; returns (detection, crop) pairs."""
+    return [(detection, prepare_region(image, detection))
+            for detection in data["predictions"] if detection["class"] != "SB"]
+
+
+def read_digits(detection, cropped):
+    """Read a digit field with the template recognizer; None when it is unsure or disabled."""
+    recognizer = get_digit_recognizer()
+    class_name = detection["class"]
+    if recognizer is None or class_name not in RECOGNIZER_CLASSES:
+        return None
+    text, confidence = recognizer.read(cropped, allow_colon=class_name == "PlayTime",
+                                       try_rotated=class_name == "YardNumber")
+    return text if confidence >= MIN_CONFIDENCE else None
+
+
+def read_region(engine, detection, cropped):
+    """OCR one preprocessed crop, retrying upside-down YardNumbers."""
+    fast = read_digits(detection, cropped)
+    if fast is not None:
+        return fast
+
+    digits_only = detection["class"] in DIGIT_CLASSES
+    raw_text = engine.read(cropped, digits_only)
+
+    # Handle upside-down YardNumbers
+    if detection["class"] == "YardNumber" and not any(c.isdigit() for c in raw_text):
+        raw_text += engine.read(cropped.rotate(180), digits_only)
+    return raw_text
+
+
+def ocr_regions(regions, engine=None):
+    """
+    OCR all crops the digit recognizer could not read confidently in one
+    engine call, plus one more for upside-down YardNumbers.
+    """
+    engine = engine or get_ocr_engine()
+    texts = [read_digits(detection, cropped) for detection, cropped in regions]
+    pending = [i for i, text in enumerate(texts) if text is None]
+    read = engine.read_many([(regions[i][1], regions[i][0]["class"] in DIGIT_CLASSES) for i in pending])
+    for i, text in zip(pending, read):
+        texts[i] = text
+
+    # Handle upside-down YardNumbers
+    retry = [i for i in pending
+             if regions[i][0]["class"] == "YardNumber" and not any(c.isdigit() for c in texts[i])]
+    if retry:
+        rotated = engine.read_many([(regions[i][1].rotate(180), True) for i in retry])
+        for i, text in zip(retry, rotated):
+            texts[i] += text
+    return texts
+
+
+_pools = {}
+_pools_lock = threading.Lock()
 
-        raw_text = pytesseract.image_to_string(cropped, config=config)
 
-        # Handle upside-down YardNumbers
-        if class_name == "YardNumber" and not any(c.isdigit() for c in raw_text):
-            raw_text += pytesseract.image_to_string(cropped.rotate(180), config=config)
+def _get_pool(workers):
+    # Pools outlive a single scoreboard so each worker thread keeps its OCR handles.
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ThreadPoolExecutor(max_workers=workers)
+        return pool
 
+
+def ocr_regions_parallel(image, data, engine=None, workers=OCR_WORKERS):
+    """
+    Crop, preprocess and OCR each region on a pool of `workers` threads.
+    Returns the same (regions, texts) as the sequential path, in detection
+    order, so merging gives identical results. Engines that batch
+    (`batches = True`, e.g. CompositeEngine) only get the cropping done in
+    parallel and then read everything through ocr_regions, because their
+    output depends on which crops are read together.
+    """
+    engine = engine or get_ocr_engine()
+    image.load()  # decode once, before threads start cropping
+    detections = [d for d in data["predictions"] if d["class"] != "SB"]
+
+    if getattr(engine, "batches", False):
+        crops = list(_get_pool(workers).map(lambda detection: prepare_region(image, detection), detections))
+        regions = list(zip(detections, crops))
+        return regions, ocr_regions(regions, engine)
+
+    def work(detection):
+        cropped = prepare_region(image, detection)
+        return cropped, read_region(engine, detection, cropped)
+
+    done = list(_get_pool(workers).map(work, detections))
+    regions = [(detection, cropped) for detection, (cropped, _) in zip(detections, done)]
+    return regions, [text for _, text in done]
+
+
+def merge_regions(regions, texts, img_width):
+    """Clean each region's text and combine them into the final per-class values."""
+    results = {}
+
+    for (detection, _), raw_text in zip(regions, texts):
+        class_name = detection["class"]
         cleaned = clean_ocr_text(raw_text, class_name)
 
         # Special handling for Score positions
@@ -125,10 +224,40 @@ def process_scoreboard(image_path, json_data):
                     seen.add(v)
                     filtered.append(v)
             final[cls] = filtered
+    return final
+
+
+def process_scoreboard(image_path, json_data, engine=None, workers=OCR_WORKERS):
+    """
+    Extract the scoreboard fields for one image and its workflow-4
+    response. Returns {"Score": "left, right", "Quarter": [...], ...} with
+    only the classes that were detected. With `workers` > 1, regions are
+    OCRed concurrently.
+    """
+    # Load image and parse JSON
+    image = Image.open(image_path)
+    return read_scoreboard(image, json.loads(json_data), engine, workers)
 
+
+def read_scoreboard(image, result, engine=None, workers=OCR_WORKERS):
+    """process_scoreboard for an already opened image and a parsed workflow-4 response."""
+    data = result[0]["model_predictions"]
+
+    # Get original image dimensions
+    img_width = data["image"]["width"]
+
+    if workers > 1:
+        regions, texts = ocr_regions_parallel(image, data, engine, workers)
+    else:
+        regions = crop_regions(image, data)
+        texts = ocr_regions(regions, engine)
+    return merge_regions(regions, texts, img_width)
+
+
+def print_scoreboard(final):
     # Final formatting
     print("\nFinal Scoreboard Data:")
-    for cls in ["Score", "Quarter", "Down", "YardNumber", "PlayTime", "Clock"]:
+    for cls in SCOREBOARD_FIELDS:
         if cls in final:
             values = final[cls]
             if cls == "Score":
@@ -137,24 +266,57 @@ def process_scoreboard(image_path, json_data):
                 print(f"{cls}: {', '.join(values)}")
 
 
-def main(image_path):
-    client = InferenceHTTPClient(
-        api_url="https://detect.roboflow.com",
-        api_key="hB8S8n5OlohSOI3c51ic"
-    )
+def scoreboard_row(image_path, workers=OCR_WORKERS):
+    """Detect and extract one image into a flat row: path plus one string column per field."""
+    result = get_detector().run_workflow(image_path, workflow_id="custom-workflow-4")
+    with Image.open(image_path) as image:
+        final = read_scoreboard(image, result, workers=workers)
+    row = {"path": image_path}
+    for cls in SCOREBOARD_FIELDS:
+        values = final.get(cls, "")
+        row[cls] = values if isinstance(values, str) else ", ".join(values)
+    return row
+
+
+def _init_batch_worker():
+    # One inference client and OCR engine per worker process, reused for every image it handles.
+    get_detector()
+    get_ocr_engine()
 
-    result = client.run_workflow(
-        workspace_name="boilermake-2025",
-        workflow_id="custom-workflow-4",
-        images={"image": image_path},
-        use_cache=True
-    )
 
-    process_scoreboard(image_path, json.dumps(result))
+def run_batch(source, output, processes=None, fmt=None, workers=OCR_WORKERS):
+    """
+    Extract every image in a directory or manifest on a pool of
+    `processes` worker processes, streaming one row per image to `output`
+    (CSV, JSONL or Parquet) as results complete. Images already present in
+    `output` are skipped, so an interrupted run can simply be restarted.
+    """
+    processes = processes or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker)
+    process_batch(source, output, pool, functools.partial(scoreboard_row, workers=workers), processes * 2, fmt,
+                  verb="extracted")
+
+
+def main(image_path, workers=OCR_WORKERS):
+    result = get_detector().run_workflow(image_path, workflow_id="custom-workflow-4")
+    print_scoreboard(process_scoreboard(image_path, json.dumps(result), workers=workers))
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run inference on an image and extract scoreboard data.")
-    parser.add_argument("image", help="Path to the input image.")
+    parser.add_argument("image", nargs="?", help="Path to the input image.")
+    parser.add_argument("--workers", type=int, default=OCR_WORKERS, help="Threads for concurrent region OCR.")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="Extract every image in a directory or manifest file (one path per line).")
+    parser.add_argument("--output", default="scoreboards.csv",
+                        help="Batch output: a .csv or .jsonl file, or a .parquet directory.")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Batch output format (default: from --output).")
+    parser.add_argument("--processes", type=int, help="Worker processes for --batch (default: CPU count).")
     args = parser.parse_args()
-    main(args.image)
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.processes, args.format, args.workers)
+    elif not args.image:
+        parser.error("an image path is required unless --batch is given")
+    else:
+        main(args.image, args.workers)
@@ -0,0 +1,222 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def iter_inputs(source):
+    """
+    Yield image paths from a directory (walked recursively, sorted) or from
+    a manifest file with one path per line. Relative manifest entries are
+    resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line if os.path.isabs(line) else os.path.join(base, line)
+
+
+def _truncate_torn_line(path, block=65536):
+    # Cut a partial last line (from an interrupted run) back to the last newline.
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+class JsonlWriter:
+    """
+    Appends one JSON object per row, flushed as soon as it is written. A
+    torn last line left by an interrupted run is removed before appending.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            _truncate_torn_line(path)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def completed(path):
+        done = set()
+        if not os.path.exists(path):
+            return done
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue  # torn last line from an interrupted run
+        return done
+
+
+class CsvWriter:
+    """
+    Appends rows to a CSV file, flushed as they are written. The header
+    comes from the first row, or from the existing file when resuming.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        fieldnames = None
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                fieldnames = next(csv.reader(f), None)
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames, extrasaction="ignore") if fieldnames else None
+
+    def write(self, row):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, list(row), extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def completed(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return {row["path"] for row in csv.DictReader(f) if row.get("path")}
+
+
+class ParquetWriter:
+    """
+    Writes rows to a directory of Parquet part files, one part per
+    `rows_per_part` rows. Parts are never rewritten, so an interrupted run
+    keeps everything flushed before it stopped.
+    """
+
+    def __init__(self, path, rows_per_part=256):
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        self.part = len([n for n in os.listdir(path) if n.endswith(".parquet")])
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        final = os.path.join(self.path, f"part-{self.part:05d}.parquet")
+        tmp = final + ".tmp"
+        pq.write_table(pa.Table.from_pylist(self.rows), tmp)
+        os.replace(tmp, final)
+        self.part += 1
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+    @staticmethod
+    def completed(path):
+        if not os.path.isdir(path):
+            return set()
+        import pyarrow.parquet as pq
+
+        done = set()
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".parquet"):
+                done.update(pq.read_table(os.path.join(path, name), columns=["path"]).column("path").to_pylist())
+        return done
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def output_format(path, fmt=None):
+    """Pick the writer format from `fmt` or the output path's extension."""
+    if fmt:
+        return fmt
+    path = path.rstrip("/\\").lower()
+    if path.endswith(".parquet"):
+        return "parquet"
+    return "csv" if path.endswith(".csv") else "jsonl"
+
+
+def process_batch(source, output, executor, process, in_flight, fmt=None, verb="processed"):
+    """
+    Run `process(path)` for every image in a directory or manifest on
+    `executor` (shut down when done), streaming each returned row to
+    `output` (CSV, JSONL or Parquet) as results complete. At most
+    `in_flight` images are submitted at a time. Images already present in
+    `output` are skipped, so an interrupted run can simply be restarted;
+    failed images are reported on stderr and retried on the next run.
+    Returns (written, failed).
+    """
+    writer_cls = WRITERS[output_format(output, fmt)]
+    done = writer_cls.completed(output)
+    todo = [path for path in iter_inputs(source) if path not in done]
+    print(f"{len(done)} images already {verb}, {len(todo)} to go")
+
+    writer = writer_cls(output)
+    written = failed = 0
+    start = time.perf_counter()
+    try:
+        with executor as pool:
+            pending = {}
+            queue = iter(todo)
+            while True:
+                # Keep a bounded number of images in flight.
+                for path in queue:
+                    pending[pool.submit(process, path)] = path
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = pending.pop(future)
+                    try:
+                        writer.write(future.result())
+                        written += 1
+                    except Exception as e:
+                        failed += 1
+                        print(f"Failed on {path}: {e}", file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"{verb.capitalize()} {written} images ({failed} failed) in {elapsed:.1f}s, {rate:.1f} images/s")
+    return written, failed
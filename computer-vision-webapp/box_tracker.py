@@ -0,0 +1,188 @@
+import argparse
+import time
+
+import numpy as np
+
+
+def boxes_to_array(boxes):
+    """Convert get_boxes dicts to an (N, 4) float array of [x, y, w, h] plus labels."""
+    arr = np.array([[b["top_left_x"], b["top_left_y"], b["w"], b["h"]] for b in boxes],
+                   dtype=np.float32).reshape(-1, 4)
+    return arr, [b["label"] for b in boxes]
+
+
+def array_to_boxes(arr, labels):
+    """Convert an (N, 4) [x, y, w, h] array back to the dicts draw_boxes expects."""
+    rounded = np.rint(arr).astype(np.int32)
+    return [
+        {"top_left_x": int(x), "top_left_y": int(y), "w": int(w), "h": int(h), "label": label}
+        for (x, y, w, h), label in zip(rounded.tolist(), labels)
+    ]
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of [x, y, w, h] boxes."""
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = inter_w * inter_h
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def associate(a, b, min_iou=0.3):
+    """
+    Greedily match boxes in `a` to boxes in `b` by highest IoU.
+    Returns index arrays (rows into a, cols into b) of the matched pairs.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    iou = iou_matrix(a, b)
+    rows, cols = [], []
+    for _ in range(min(len(a), len(b))):
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < min_iou:
+            break
+        rows.append(i)
+        cols.append(j)
+        iou[i, :] = -1
+        iou[:, j] = -1
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+class BoxTracker:
+    """
+    Constant-velocity tracker driven by keyframe detections.
+
+    update() is called with the detections of each inferred frame. Boxes are
+    matched to the previous keyframe by IoU and each track gets a per-frame
+    velocity from its displacement. predict() extrapolates from the latest
+    keyframe; interpolate() blends the two most recent keyframes for frames
+    that lie between them.
+    """
+
+    def __init__(self, min_iou=0.3, max_coast=60):
+        self.min_iou = min_iou
+        self.max_coast = max_coast
+
+        self.frame = None
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocity = np.empty((0, 4), dtype=np.float32)
+        self.labels = []
+
+        self.prev_frame = None
+        self.prev_boxes = self.boxes
+        self.prev_velocity = self.velocity
+        self.prev_labels = []
+        self.match_prev = np.empty(0, dtype=np.intp)
+        self.match_cur = np.empty(0, dtype=np.intp)
+
+    def update(self, frame_count, boxes):
+        """Feed the detections (get_boxes dicts) of keyframe `frame_count`."""
+        detections, labels = boxes_to_array(boxes)
+
+        velocity = np.zeros_like(detections)
+        match_prev, match_cur = np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        if self.frame is not None and frame_count > self.frame:
+            dt = frame_count - self.frame
+            # Match against where the tracks are expected to be now.
+            match_prev, match_cur = associate(self._extrapolate(frame_count), detections, self.min_iou)
+            velocity[match_cur] = (detections[match_cur] - self.boxes[match_prev]) / dt
+
+        self.prev_frame, self.prev_boxes = self.frame, self.boxes
+        self.prev_velocity, self.prev_labels = self.velocity, self.labels
+        self.match_prev, self.match_cur = match_prev, match_cur
+
+        self.frame = frame_count
+        self.boxes = detections
+        self.velocity = velocity
+        self.labels = labels
+
+    def _extrapolate(self, frame_count):
+        dt = min(frame_count - self.frame, self.max_coast)
+        return self.boxes + self.velocity * dt
+
+    def predict(self, frame_count):
+        """Boxes for `frame_count`, extrapolated from the latest keyframe."""
+        if self.frame is None:
+            return []
+        predicted = self._extrapolate(frame_count)
+        predicted[:, 2:] = np.maximum(predicted[:, 2:], 1)
+        return array_to_boxes(predicted, self.labels)
+
+    def interpolate(self, frame_count):
+        """
+        Boxes for a frame between the previous and the latest keyframe.
+        Matched tracks are blended linearly; tracks that vanished at the
+        latest keyframe keep moving with their old velocity, and tracks that
+        first appear there are not drawn until their keyframe.
+        """
+        if self.prev_frame is None or not self.prev_frame < frame_count < self.frame:
+            return self.predict(frame_count)
+
+        t = (frame_count - self.prev_frame) / (self.frame - self.prev_frame)
+        blended = (1 - t) * self.prev_boxes[self.match_prev] + t * self.boxes[self.match_cur]
+        labels = [self.labels[j] for j in self.match_cur]
+
+        lost = np.setdiff1d(np.arange(len(self.prev_boxes)), self.match_prev)
+        if len(lost):
+            dt = min(frame_count - self.prev_frame, self.max_coast)
+            coasted = self.prev_boxes[lost] + self.prev_velocity[lost] * dt
+            blended = np.concatenate([blended, coasted])
+            labels += [self.prev_labels[i] for i in lost]
+
+        blended[:, 2:] = np.maximum(blended[:, 2:], 1)
+        return array_to_boxes(blended, labels)
+
+
+def benchmark(num_boxes=22, frames=3000, keyframe_interval=30, seed=0):
+    """Time per-frame tracking cost on synthetic players moving across a 1080p frame."""
+    rng = np.random.default_rng(seed)
+    start_pos = rng.uniform([0, 0], [1800, 1000], size=(num_boxes, 2))
+    speed = rng.normal(0, 3, size=(num_boxes, 2))
+    size = rng.uniform([30, 60], [60, 120], size=(num_boxes, 2))
+    labels = ["player"] * num_boxes
+
+    def detections(frame_count):
+        pos = start_pos + speed * frame_count + rng.normal(0, 1, size=start_pos.shape)
+        return array_to_boxes(np.hstack([pos, size]), labels)
+
+    keyframes = {f: detections(f) for f in range(0, frames, keyframe_interval)}
+
+    tracker = BoxTracker()
+    update_time = predict_time = 0.0
+    for frame_count in range(frames):
+        if frame_count in keyframes:
+            t0 = time.perf_counter()
+            tracker.update(frame_count, keyframes[frame_count])
+            update_time += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        tracker.predict(frame_count)
+        predict_time += time.perf_counter() - t0
+
+    interp_time = 0.0
+    for frame_count in range(frames - keyframe_interval, frames):
+        t0 = time.perf_counter()
+        tracker.interpolate(frame_count)
+        interp_time += time.perf_counter() - t0
+
+    per_frame = (update_time + predict_time) / frames
+    print(f"{num_boxes} boxes, keyframe every {keyframe_interval} frames, {frames} frames")
+    print(f"update:      {update_time / len(keyframes) * 1e6:8.1f} us per keyframe")
+    print(f"predict:     {predict_time / frames * 1e6:8.1f} us per frame")
+    print(f"interpolate: {interp_time / keyframe_interval * 1e6:8.1f} us per frame")
+    print(f"tracking:    {per_frame * 1e6:8.1f} us per frame ({1 / per_frame:,.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the keyframe box tracker.")
+    parser.add_argument("--boxes", type=int, default=22, help="Boxes per frame.")
+    parser.add_argument("--frames", type=int, default=3000, help="Frames to simulate.")
+    parser.add_argument("--keyframe-interval", type=int, default=30, help="Frames between detections.")
+    args = parser.parse_args()
+    benchmark(args.boxes, args.frames, args.keyframe_interval)
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from inference_client import InferenceClient, get_client
+
+DETECTOR_BACKEND = os.environ.get("DETECTOR_BACKEND")
+DETECTOR_CONFIG = os.environ.get("DETECTOR_CONFIG", "detector_config.json")
+
+
+def decode_image(image):
+    """Return a BGR numpy frame for a path, encoded bytes, PIL image or frame."""
+    import cv2
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            image = f.read()
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        frame = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode image.")
+        return frame
+    if hasattr(image, "save"):
+        return cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    return image
+
+
+class RemoteDetector:
+    """Hosted Roboflow models and workflows, through the shared InferenceClient."""
+
+    name = "remote"
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+        self.cache = self.client.cache
+
+    def infer(self, image, model_id):
+        return self.client.infer(image, model_id)
+
+    def infer_batch(self, images, model_id):
+        return [self.client.infer(image, model_id) for image in images]
+
+    def run_workflow(self, image, workflow_id):
+        return self.client.run_workflow(image, workflow_id)
+
+
+class OnnxDetector:
+    """
+    Runs exported YOLOv8-style ONNX detectors in-process on the CPU.
+
+    `config` maps hosted model IDs to local models, and workflows to the
+    model they wrap plus the output key their callers read:
+
+        {"models": {"presnaps-large-model/1": {"path": "presnaps.onnx",
+                                               "classes": ["qb", ...],
+                                               "input_size": 640}},
+         "workflows": {"custom-workflow-3": {"model": "presnaps-large-model/1",
+                                             "output": "predictions"}}}
+
+    Results use the same layout as the hosted API, so callers do not need
+    to know which backend produced them. They are deliberately not put in
+    the ResultCache: local inference costs no upload or network round trip,
+    and video frames rarely repeat, so hashing every frame would mostly
+    add work.
+    """
+
+    name = "onnx"
+    cache = None
+
+    def __init__(self, config, threads=None):
+        import onnxruntime
+
+        self.config = config
+        self.sessions = {}
+        self._options = onnxruntime.SessionOptions()
+        if threads:
+            self._options.intra_op_num_threads = threads
+        self._lock = threading.Lock()
+
+    def _session(self, model_id):
+        with self._lock:
+            if model_id not in self.sessions:
+                import onnxruntime
+
+                spec = self.config["models"][model_id]
+                session = onnxruntime.InferenceSession(
+                    spec["path"], self._options, providers=["CPUExecutionProvider"])
+                self.sessions[model_id] = (session, spec)
+            return self.sessions[model_id]
+
+    def _letterbox(self, frame, size):
+        import cv2
+
+        h, w = frame.shape[:2]
+        scale = min(size / w, size / h)
+        new_w, new_h = int(round(w * scale)), int(round(h * scale))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+        canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+            frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        blob = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return blob, scale, pad_x, pad_y
+
+    def _decode(self, output, spec, scale, pad_x, pad_y, width, height):
+        import cv2
+
+        # YOLOv8 export: (4 + num_classes, num_anchors) with cx, cy, w, h first.
+        rows = output.T
+        scores = rows[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(rows)), class_ids]
+        keep = confidence >= spec.get("confidence", 0.4)
+        rows, class_ids, confidence = rows[keep], class_ids[keep], confidence[keep]
+
+        # NMS runs in the model's input coordinates. Each class is shifted past the
+        # widest extent of the boxes, so NMS never suppresses across classes.
+        left = rows[:, 0] - rows[:, 2] / 2
+        extent = float(np.abs(np.concatenate([left, left + rows[:, 2]])).max()) if len(rows) else 0.0
+        offset = class_ids * (2 * extent + 1)
+        nms_boxes = np.stack([left + offset, rows[:, 1] - rows[:, 3] / 2, rows[:, 2], rows[:, 3]], axis=1)
+        kept = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidence.tolist(),
+                                spec.get("confidence", 0.4), spec.get("iou", 0.5))
+        kept = np.array(kept, dtype=np.intp).reshape(-1)
+
+        cx = (rows[:, 0] - pad_x) / scale
+        cy = (rows[:, 1] - pad_y) / scale
+        bw = rows[:, 2] / scale
+        bh = rows[:, 3] / scale
+
+        classes = spec["classes"]
+        predictions = [
+            {
+                "x": float(cx[i]),
+                "y": float(cy[i]),
+                "width": float(bw[i]),
+                "height": float(bh[i]),
+                "confidence": float(confidence[i]),
+                "class": classes[class_ids[i]],
+                "class_id": int(class_ids[i]),
+            }
+            for i in kept
+        ]
+        return {"image": {"width": width, "height": height}, "predictions": predictions}
+
+    def infer_batch(self, images, model_id):
+        """Detect on several images, batching them into one forward pass when the model allows it."""
+        session, spec = self._session(model_id)
+        size = spec.get("input_size", 640)
+        frames = [decode_image(image) for image in images]
+        prepared = [self._letterbox(frame, size) for frame in frames]
+
+        input_meta = session.get_inputs()[0]
+        fixed_batch = input_meta.shape[0] if isinstance(input_meta.shape[0], int) else None
+        chunk = fixed_batch or len(prepared)
+
+        results = []
+        for start in range(0, len(prepared), chunk):
+            part = prepared[start:start + chunk]
+            batch = np.stack([blob for blob, _, _, _ in part])
+            if len(part) < chunk:
+                # A fixed batch dimension only takes full batches: pad the last one and drop the extra outputs.
+                batch = np.concatenate([batch, np.zeros((chunk - len(part),) + batch.shape[1:], batch.dtype)])
+            outputs = session.run(None, {input_meta.name: batch})[0]
+            for i, (_, scale, pad_x, pad_y) in enumerate(part):
+                h, w = frames[start + i].shape[:2]
+                results.append(self._decode(outputs[i], spec, scale, pad_x, pad_y, w, h))
+        return results
+
+    def infer(self, image, model_id):
+        return self.infer_batch([image], model_id)[0]
+
+    def run_workflow(self, image, workflow_id):
+        workflow = self.config["workflows"][workflow_id]
+        return [{workflow["output"]: self.infer(image, workflow["model"])}]
+
+
+def load_config(path=DETECTOR_CONFIG):
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """
+    Return the process-wide detector. The backend comes from the
+    DETECTOR_BACKEND environment variable, else the "backend" key of
+    DETECTOR_CONFIG, else "remote".
+    """
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                config = load_config()
+                backend = DETECTOR_BACKEND or config.get("backend", "remote")
+                if backend == "onnx":
+                    _detector = OnnxDetector(config, threads=config.get("threads"))
+                elif backend == "remote":
+                    _detector = RemoteDetector()
+                else:
+                    raise ValueError(f"Unknown detector backend: {backend}")
+    return _detector
+
+
+def benchmark(images, model_id, frames=50, batch=4, config_path=None, stub_latency_ms=0.0):
+    """Compare per-frame detection latency of the remote (against a local stand-in server) and local backends."""
+    from stub_server import start_stub_server
+
+    frames_list = [decode_image(path) for path in images]
+    work = [frames_list[i % len(frames_list)] for i in range(frames)]
+
+    server, url = start_stub_server(stub_latency_ms)
+    remote = RemoteDetector(InferenceClient(api_url=url, cache=None))
+    remote.infer(work[0], model_id)  # open the connection
+    start = time.perf_counter()
+    for frame in work:
+        remote.infer(frame, model_id)
+    remote_ms = (time.perf_counter() - start) * 1000 / frames
+    server.shutdown()
+    print(f"remote (stand-in server, {stub_latency_ms:.0f} ms added latency): {remote_ms:.1f} ms/frame")
+
+    config = load_config(config_path)
+    if model_id not in config.get("models", {}):
+        print(f"No ONNX model configured for {model_id}; skipping the local backend.")
+        return
+
+    local = OnnxDetector(config, threads=config.get("threads"))
+    local.infer(work[0], model_id)  # load the session
+    start = time.perf_counter()
+    for frame in work:
+        local.infer(frame, model_id)
+    single_ms = (time.perf_counter() - start) * 1000 / frames
+    print(f"onnx, batch 1: {single_ms:.1f} ms/frame")
+
+    start = time.perf_counter()
+    for i in range(0, frames, batch):
+        local.infer_batch(work[i:i + batch], model_id)
+    batch_ms = (time.perf_counter() - start) * 1000 / frames
+    print(f"onnx, batch {batch}: {batch_ms:.1f} ms/frame")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark detector backends on sample images.")
+    parser.add_argument("images", nargs="+", help="Sample images to run detection on.")
+    parser.add_argument("--model", default="presnaps-large-model/1", help="Model ID to benchmark.")
+    parser.add_argument("--config", default=DETECTOR_CONFIG, help="Detector config with ONNX models.")
+    parser.add_argument("--frames", type=int, default=50, help="Frames to time per backend.")
+    parser.add_argument("--batch", type=int, default=4, help="Batch size for the local backend.")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0,
+                        help="Delay added by the stand-in server to mimic network latency.")
+    args = parser.parse_args()
+    benchmark(args.images, args.model, args.frames, args.batch, args.config, args.stub_latency_ms)
@@ -0,0 +1,143 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+POSITIONS = ["qb", "running_back", "tight_end", "wide_receiver"]
+# Index = formation code returned by formation_codes.
+FORMATIONS = np.array(["WILDCAT", "EMPTY", "JUMBO", "I_FORM", "PISTOL", "SINGLEBACK", "SHOTGUN", "UNKNOWN"])
+UNKNOWN = len(FORMATIONS) - 1
+
+
+def formation_codes(num_qbs, num_rbs, num_tes, num_wrs):
+    """
+    classify_formation over arrays of counts, as indices into FORMATIONS.
+    The conditions are the scalar if/elif chain in order; np.select keeps
+    the first one that matches, exactly like the chain.
+    """
+    qbs, rbs, tes, wrs = (np.asarray(a) for a in (num_qbs, num_rbs, num_tes, num_wrs))
+    one_qb = qbs == 1
+    one_rb = one_qb & (rbs == 1)
+    conditions = [
+        qbs == 0,                             # WILDCAT
+        rbs == 0,                             # EMPTY
+        one_rb & (tes >= 2) & (wrs <= 2),     # JUMBO
+        one_qb & (rbs == 2),                  # I_FORM
+        one_rb & (tes >= 1) & (wrs >= 2),     # PISTOL
+        one_rb,                               # SINGLEBACK
+        one_qb & (rbs >= 1),                  # SHOTGUN
+    ]
+    return np.select(conditions, np.arange(len(conditions), dtype=np.int8), UNKNOWN).astype(np.int8)
+
+
+def classify_formations(num_qbs, num_rbs, num_tes, num_wrs):
+    """Formation labels for arrays of per-image position counts."""
+    return FORMATIONS[formation_codes(num_qbs, num_rbs, num_tes, num_wrs)]
+
+
+def count_positions(frame_index, classes, num_frames=None):
+    """
+    Per-frame position counts from a columnar batch of detections:
+    `frame_index[i]` is the frame detection i belongs to and `classes[i]`
+    its class name. Returns an (num_frames, 4) array in POSITIONS order;
+    other classes are ignored.
+    """
+    frame_index = np.asarray(frame_index, dtype=np.intp)
+    num_frames = num_frames if num_frames is not None else (int(frame_index.max()) + 1 if len(frame_index) else 0)
+    classes = np.asarray(classes)
+    codes = np.full(len(frame_index), -1, dtype=np.intp)
+    for i, name in enumerate(POSITIONS):
+        codes[classes == name] = i
+    keep = codes >= 0
+    flat = np.bincount(frame_index[keep] * len(POSITIONS) + codes[keep], minlength=num_frames * len(POSITIONS))
+    return flat.reshape(num_frames, len(POSITIONS))
+
+
+def reclassify_table(table):
+    """Recompute the formation column of a batch table (path, per-position counts, formation) in place."""
+    table["formation"] = classify_formations(*(table[pos].to_numpy() for pos in POSITIONS))
+    return table
+
+
+def check_equivalence(max_count=8):
+    """Compare against the scalar rules on every count combination from 0 to max_count."""
+    from image_inference import classify_formation
+
+    grid = np.array(list(itertools.product(range(max_count + 1), repeat=4)))
+    expected = np.array([classify_formation(*row) for row in grid.tolist()])
+    got = classify_formations(*grid.T)
+    mismatched = np.flatnonzero(got != expected)
+    for i in mismatched[:10]:
+        print(f"MISMATCH counts={grid[i].tolist()}: scalar {expected[i]}, vectorized {got[i]}")
+    labels = ", ".join(f"{label} {n}" for label, n in zip(*np.unique(got, return_counts=True)))
+    print(f"{len(grid)} count combinations checked, {len(mismatched)} mismatches ({labels})")
+    return not len(mismatched)
+
+
+def benchmark(rows=500000, seed=0):
+    """Rows per second for the scalar chain, the DataFrame-per-image count path and the vectorized path."""
+    import pandas as pd
+    from image_inference import classify_formation
+
+    rng = np.random.default_rng(seed)
+    counts = np.column_stack([rng.integers(0, 3, rows), rng.integers(0, 4, rows),
+                              rng.integers(0, 4, rows), rng.integers(0, 6, rows)])
+
+    start = time.perf_counter()
+    scalar = [classify_formation(*row) for row in counts.tolist()]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = classify_formations(*counts.T)
+    vector_s = time.perf_counter() - start
+    assert list(vectorized) == scalar
+
+    # The per-image path callers use today: a DataFrame of detections and value_counts.
+    sample = min(rows, 2000)
+    detections = [np.repeat(POSITIONS, row) for row in counts[:sample]]
+    start = time.perf_counter()
+    for classes in detections:
+        value_counts = pd.DataFrame({"class": classes})["class"].value_counts()
+        classify_formation(*(value_counts.get(pos, 0) for pos in POSITIONS))
+    frame_s = (time.perf_counter() - start) * rows / sample
+
+    frame_index = np.concatenate([np.full(len(c), i) for i, c in enumerate(detections)])
+    classes = np.concatenate(detections)
+    start = time.perf_counter()
+    batch = classify_formations(*count_positions(frame_index, classes, sample).T)
+    batch_s = (time.perf_counter() - start) * rows / sample
+    assert list(batch) == scalar[:sample]
+
+    print(f"scalar if/elif:               {rows / scalar_s:>14,.0f} rows/s")
+    print(f"vectorized:                   {rows / vector_s:>14,.0f} rows/s")
+    print(f"DataFrame value_counts/image: {rows / frame_s:>14,.0f} images/s")
+    print(f"columnar count + vectorized:  {rows / batch_s:>14,.0f} images/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark vectorized formation classification.")
+    parser.add_argument("--rows", type=int, default=500000, help="Rows to classify in the benchmark.")
+    parser.add_argument("--reclassify", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="Recompute formations for a full_formation --batch table (.jsonl, .csv or .parquet).")
+    args = parser.parse_args()
+
+    if args.reclassify:
+        import pandas as pd
+
+        source, output = args.reclassify
+        readers = {".parquet": pd.read_parquet, ".csv": pd.read_csv}
+        read = next((r for ext, r in readers.items() if source.rstrip("/\\").endswith(ext)),
+                    lambda p: pd.read_json(p, lines=True))
+        table = reclassify_table(read(source))
+        if output.endswith(".parquet"):
+            table.to_parquet(output, index=False)
+        elif output.endswith(".csv"):
+            table.to_csv(output, index=False)
+        else:
+            table.to_json(output, orient="records", lines=True)
+        print(f"Reclassified {len(table)} rows into {output}")
+    else:
+        ok = check_equivalence()
+        benchmark(args.rows)
+        raise SystemExit(0 if ok else 1)
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+
+class FixedIntervalSampler:
+    """
+    Original policy: run inference on every `interval`-th frame
+    (one frame per second when interval is the rounded FPS).
+    """
+
+    def __init__(self, interval):
+        self.interval = max(1, int(interval))
+        self.frames = 0
+        self.inference_calls = 0
+
+    def should_infer(self, frame_count, frame):
+        self.frames += 1
+        if frame_count % self.interval == 0:
+            self.inference_calls += 1
+            return True
+        return False
+
+    def summary(self):
+        return f"Sampler: fixed every {self.interval} frames, {self.inference_calls} inference calls over {self.frames} frames"
+
+
+class AdaptiveSampler:
+    """
+    Motion-gated sampling. Each frame is shrunk to a small grayscale
+    thumbnail and compared with the thumbnail of the last inferred frame;
+    inference runs only when the mean absolute difference (0-255 scale)
+    reaches `threshold`. `min_interval` and `max_interval` (in frames) bound
+    the gap between two inference calls regardless of the motion score.
+    """
+
+    def __init__(self, baseline_interval, threshold=6.0, min_interval=5, max_interval=60, thumb_width=64):
+        self.baseline_interval = max(1, int(baseline_interval))
+        self.threshold = threshold
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.thumb_width = thumb_width
+
+        self.frames = 0
+        self.inference_calls = 0
+        self.last_keyframe = None
+        self.reference = None
+
+    def thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        thumb_height = max(1, int(round(h * self.thumb_width / w)))
+        small = cv2.resize(frame, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def motion_score(self, frame):
+        """Mean absolute thumbnail difference against the last inferred frame."""
+        if self.reference is None:
+            return float("inf")
+        return float(np.abs(self.thumbnail(frame) - self.reference).mean())
+
+    def should_infer(self, frame_count, frame):
+        self.frames += 1
+        if self.last_keyframe is not None:
+            since = frame_count - self.last_keyframe
+            if since < self.min_interval:
+                return False
+            if since < self.max_interval and self.motion_score(frame) < self.threshold:
+                return False
+
+        self.last_keyframe = frame_count
+        self.reference = self.thumbnail(frame)
+        self.inference_calls += 1
+        return True
+
+    @property
+    def baseline_calls(self):
+        """Calls the fixed once-per-second policy would have made."""
+        return self.frames // self.baseline_interval
+
+    @property
+    def calls_saved(self):
+        return self.baseline_calls - self.inference_calls
+
+    def summary(self):
+        return (f"Sampler: adaptive, {self.inference_calls} inference calls over {self.frames} frames "
+                f"vs {self.baseline_calls} at 1/sec ({self.calls_saved} saved)")
+
+
+def make_sampler(fps, adaptive=False, threshold=6.0, min_interval=0.2, max_interval=2.0):
+    """
+    Build the sampler for a clip. Intervals are given in seconds and
+    converted to frames using the clip's FPS.
+    """
+    round_fps = int(round(fps))
+    if not adaptive:
+        return FixedIntervalSampler(round_fps)
+    return AdaptiveSampler(
+        round_fps,
+        threshold=threshold,
+        min_interval=int(round(min_interval * fps)),
+        max_interval=int(round(max_interval * fps)),
+    )
@@ -1,6 +1,8 @@
 import argparse
-import pandas as pd
-from inference_sdk import InferenceHTTPClient
+import numpy as np
+from detector_backends import get_detector
+from formation_batch import count_positions
+from jsonl_worker import serve
 
 
 def classify_formation(num_qbs, num_rbs, num_tes, num_wrs):
@@ -20,46 +22,34 @@ def classify_formation(num_qbs, num_rbs, num_tes, num_wrs):
 
 
 def process_image(image_path):
-    client = InferenceHTTPClient(
-        api_url="https://detect.roboflow.com",
-        api_key="hB8S8n5OlohSOI3c51ic"
-    )
+    result = get_detector().run_workflow(image_path, workflow_id="custom-workflow-3")
 
-    result = client.run_workflow(
-        workspace_name="boilermake-2025",
-        workflow_id="custom-workflow-3",
-        images={"image": image_path},
-        use_cache=True
-    )
+    classes = [pred["class"] for item in result for pred in item.get("predictions", {}).get("predictions", [])]
 
-    positions = []
-    for item in result:
-        for pred in item.get("predictions", {}).get("predictions", []):
-            positions.append({"class": pred["class"]})
+    # qb, running_back, tight_end and wide_receiver counts for this one image.
+    counts = count_positions(np.zeros(len(classes), dtype=np.intp), classes, num_frames=1)[0]
+    return classify_formation(*counts.tolist())
 
-    df = pd.DataFrame(positions)
-    counts = df['class'].value_counts()
 
-    position_counts = {
-        'qb': counts.get('qb', 0),
-        'running_back': counts.get('running_back', 0),
-        'tight_end': counts.get('tight_end', 0),
-        'wide_receiver': counts.get('wide_receiver', 0)
-    }
-
-    return classify_formation(
-        position_counts['qb'],
-        position_counts['running_back'],
-        position_counts['tight_end'],
-        position_counts['wide_receiver']
-    )
+def handle_job(job):
+    """Worker-mode job: {"image": path} -> {"formation": ...}"""
+    return {"formation": process_image(job["image"])}
 
 
 def main():
     parser = argparse.ArgumentParser(description="Classify football formation from an image.")
-    parser.add_argument("image", help="Path to the input image.")
+    parser.add_argument("image", nargs="?", help="Path to the input image.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay running and serve JSON-lines jobs on stdin/stdout.")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent jobs in --serve mode.")
     args = parser.parse_args()
 
+    if args.serve:
+        serve(handle_job, workers=args.workers)
+        return
+    if not args.image:
+        parser.error("an image path is required unless --serve is given")
+
     formation = process_image(args.image)
     print(formation)
 
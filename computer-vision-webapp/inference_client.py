@@ -0,0 +1,308 @@
+import argparse
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from result_cache import ResultCache
+
+API_URL = os.environ.get("INFERENCE_API_URL", "https://detect.roboflow.com")
+API_KEY = os.environ.get("INFERENCE_API_KEY", "hB8S8n5OlohSOI3c51ic")
+WORKSPACE_NAME = "boilermake-2025"
+JPEG_QUALITY = int(os.environ.get("INFERENCE_JPEG_QUALITY", "90"))
+USE_CACHE = os.environ.get("INFERENCE_CACHE", "1") != "0"
+# Longest side, in pixels, of the image sent for inference (unset = full resolution).
+INFERENCE_SIZE = int(os.environ["INFERENCE_SIZE"]) if os.environ.get("INFERENCE_SIZE") else None
+LETTERBOX = os.environ.get("INFERENCE_LETTERBOX", "0") == "1"
+
+
+def encode_jpeg(image, quality=JPEG_QUALITY):
+    """
+    Return JPEG bytes for an image without writing anything to disk.
+    Accepts encoded bytes, a file path, a PIL image or a BGR numpy frame.
+    Files and bytes are sent as-is; decoded images are encoded in memory.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            return f.read()
+
+    if hasattr(image, "save"):
+        buf = io.BytesIO()
+        image.convert("RGB").save(buf, format="JPEG", quality=quality)
+        return buf.getvalue()
+
+    import cv2
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode frame as JPEG.")
+    return buf.tobytes()
+
+
+def resize_for_inference(image, size, letterbox=False):
+    """
+    Downscale `image` so its longest side is at most `size`, keeping the
+    aspect ratio, and optionally pad it to a `size` x `size` square.
+    Returns the resized image and (scale, pad_x, pad_y, width, height),
+    where width/height are the source dimensions. Images that are already
+    small enough (and not letterboxed) are returned unchanged.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        from PIL import Image
+        image = Image.open(io.BytesIO(image))
+        width, height = image.size
+        # Let the JPEG decoder skip detail we are about to throw away.
+        image.draft("RGB", (size, size))
+        image.load()
+    elif hasattr(image, "save"):
+        width, height = image.size
+    else:
+        height, width = image.shape[:2]
+
+    scale = min(1.0, size / max(width, height))
+    if scale == 1.0 and not letterbox:
+        return image, (1.0, 0, 0, width, height)
+
+    new_w, new_h = max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+    pad_x = (size - new_w) // 2 if letterbox else 0
+    pad_y = (size - new_h) // 2 if letterbox else 0
+
+    if hasattr(image, "save"):
+        from PIL import Image
+        resized = image.convert("RGB").resize((new_w, new_h), Image.BILINEAR)
+        if letterbox:
+            canvas = Image.new("RGB", (size, size), (114, 114, 114))
+            canvas.paste(resized, (pad_x, pad_y))
+            resized = canvas
+    else:
+        import cv2
+        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        if letterbox:
+            resized = cv2.copyMakeBorder(resized, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+                                         cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return resized, (scale, pad_x, pad_y, width, height)
+
+
+def rescale_predictions(result, transform):
+    """
+    Map boxes in a detect response or workflow output back to source-image
+    coordinates, in place. Every {"predictions": [...]} list of boxes is
+    rescaled and every {"image": {"width", "height"}} is reset to the
+    source size.
+    """
+    scale, pad_x, pad_y, width, height = transform
+    if isinstance(result, list):
+        for item in result:
+            rescale_predictions(item, transform)
+    elif isinstance(result, dict):
+        image = result.get("image")
+        if isinstance(image, dict) and "width" in image and "height" in image:
+            image["width"], image["height"] = width, height
+        for key, value in result.items():
+            if key == "predictions" and isinstance(value, list):
+                for pred in value:
+                    if isinstance(pred, dict) and "x" in pred:
+                        pred["x"] = (pred["x"] - pad_x) / scale
+                        pred["y"] = (pred["y"] - pad_y) / scale
+                        if "width" in pred:
+                            pred["width"] = pred["width"] / scale
+                            pred["height"] = pred["height"] / scale
+            elif key != "image":
+                rescale_predictions(value, transform)
+    return result
+
+
+def result_key(image, model_key):
+    """
+    Content hash identifying the result of running `model_key` on `image`.
+    Encoded images are hashed as-is; decoded ones by their pixels and shape.
+    """
+    h = hashlib.sha256(model_key.encode("utf-8") + b"\0")
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        h.update(image)
+    elif hasattr(image, "save"):
+        h.update(f"{image.mode}{image.size}".encode("utf-8"))
+        h.update(image.tobytes())
+    else:
+        h.update(str(image.shape).encode("utf-8"))
+        h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class InferenceClient:
+    """
+    Thin client for the Roboflow detect and workflow endpoints.
+    Requests go over one keep-alive connection pool, so repeated calls skip
+    the TCP/TLS handshake, and images are encoded in memory. Results are
+    looked up in `cache` (a ResultCache, or None to disable) before any
+    request is made.
+
+    With `inference_size` set, images are downscaled (and optionally
+    letterboxed) before upload and the returned boxes are mapped back to
+    source coordinates, so callers always see full-resolution boxes.
+    """
+
+    def __init__(self, api_url=API_URL, api_key=API_KEY, jpeg_quality=JPEG_QUALITY,
+                 pool_size=8, timeout=60, cache=None, inference_size=INFERENCE_SIZE,
+                 letterbox=LETTERBOX):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.jpeg_quality = jpeg_quality
+        self.timeout = timeout
+        self.cache = cache
+        self.inference_size = inference_size
+        self.letterbox = letterbox
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _encode(self, image):
+        data = encode_jpeg(image, self.jpeg_quality)
+        with self._lock:
+            self.bytes_sent += len(data)
+        return base64.b64encode(data).decode("ascii")
+
+    def _cached(self, image, model_key, request):
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, "rb") as f:
+                image = f.read()
+
+        def run():
+            if not self.inference_size:
+                return request(image)
+            resized, transform = resize_for_inference(image, self.inference_size, self.letterbox)
+            if transform[:3] == (1.0, 0, 0):
+                return request(image)
+            return rescale_predictions(request(resized), transform)
+
+        if self.cache is None:
+            return run()
+
+        key = result_key(image, f"{model_key}|q={self.jpeg_quality}|s={self.inference_size}|lb={self.letterbox}")
+        result = self.cache.get(key)
+        if result is None:
+            result = run()
+            self.cache.put(key, result)
+        return result
+
+    def infer(self, image, model_id):
+        """Run a hosted model on one image and return the raw JSON response."""
+        return self._cached(image, model_id, lambda data: self._infer(data, model_id))
+
+    def run_workflow(self, image, workflow_id, workspace_name=WORKSPACE_NAME, use_cache=True):
+        """
+        Run a workflow on one image and return its list of outputs.
+        `use_cache` is the server-side workflow definition cache, not the
+        local result cache.
+        """
+        return self._cached(
+            image, f"{workspace_name}/{workflow_id}",
+            lambda data: self._run_workflow(data, workflow_id, workspace_name, use_cache),
+        )
+
+    def _infer(self, image, model_id):
+        response = self.session.post(
+            f"{self.api_url}/{model_id}",
+            params={"api_key": self.api_key},
+            data=self._encode(image),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _run_workflow(self, image, workflow_id, workspace_name, use_cache):
+        payload = {
+            "api_key": self.api_key,
+            "use_cache": use_cache,
+            "inputs": {"image": {"type": "base64", "value": self._encode(image)}},
+        }
+        response = self.session.post(
+            f"{self.api_url}/infer/workflows/{workspace_name}/{workflow_id}",
+            json=payload,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()["outputs"]
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide InferenceClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(cache=ResultCache() if USE_CACHE else None)
+    return _client
+
+
+def compare_resolutions(images, model_id, size, letterbox=False, tolerance=0.02):
+    """
+    Run `model_id` on each image at full resolution and at `size`, match
+    boxes by nearest center, and report the largest coordinate error (as a
+    fraction of the image's longest side), bytes sent and latency.
+    """
+    import numpy as np
+
+    full = InferenceClient(cache=None)
+    small = InferenceClient(cache=None, inference_size=size, letterbox=letterbox)
+    worst = 0.0
+    full_time = small_time = 0.0
+    for path in images:
+        with open(path, "rb") as f:
+            data = f.read()
+        start = time.perf_counter()
+        reference = full.infer(data, model_id)
+        full_time += time.perf_counter() - start
+        start = time.perf_counter()
+        reduced = small.infer(data, model_id)
+        small_time += time.perf_counter() - start
+
+        ref = np.array([[p["x"], p["y"], p["width"], p["height"]] for p in reference["predictions"]]).reshape(-1, 4)
+        got = np.array([[p["x"], p["y"], p["width"], p["height"]] for p in reduced["predictions"]]).reshape(-1, 4)
+        longest = max(reference["image"]["width"], reference["image"]["height"])
+        if len(ref) and len(got):
+            dist = np.linalg.norm(ref[:, None, :2] - got[None, :, :2], axis=2)
+            nearest = got[dist.argmin(axis=1)]
+            error = np.abs(nearest - ref).max() / longest
+        else:
+            error = 0.0 if len(ref) == len(got) else 1.0
+        worst = max(worst, error)
+        print(f"{path}: {len(ref)} boxes at full size, {len(got)} at {size}px, max error {error:.2%}")
+
+    n = len(images)
+    print(f"Full resolution: {full.bytes_sent / n / 1024:.0f} KiB/image, {full_time / n * 1000:.0f} ms/image")
+    print(f"{size}px: {small.bytes_sent / n / 1024:.0f} KiB/image, {small_time / n * 1000:.0f} ms/image")
+    print(f"Max box error {worst:.2%} ({'within' if worst <= tolerance else 'exceeds'} {tolerance:.0%} tolerance)")
+    return worst <= tolerance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full- and reduced-resolution inference on sample images.")
+    parser.add_argument("images", nargs="+", help="Sample images.")
+    parser.add_argument("--model", default="presnaps-large-model/1", help="Hosted model ID.")
+    parser.add_argument("--size", type=int, default=640, help="Longest side of the reduced image.")
+    parser.add_argument("--letterbox", action="store_true", help="Pad reduced images to a square.")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Allowed box error as a fraction of the image's longest side.")
+    args = parser.parse_args()
+    ok = compare_resolutions(args.images, args.model, args.size, args.letterbox, args.tolerance)
+    raise SystemExit(0 if ok else 1)
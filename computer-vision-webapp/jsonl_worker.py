@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _to_json(obj):
+    # numpy / pandas scalars show up in class counts
+    return obj.item() if hasattr(obj, "item") else str(obj)
+
+
+def serve(handler, workers=1, stdin=None, stdout=None):
+    """
+    Serve jobs over a stdin/stdout JSON-lines protocol.
+
+    Every input line is a JSON object; it is passed to `handler` on a pool
+    of `workers` threads, and one response line is written per job:
+    {"id": ..., "ok": true, "result": ..., "latency_ms": ...} or
+    {"id": ..., "ok": false, "error": ..., "latency_ms": ...}.
+    Responses may come back out of order; match them by "id". A
+    {"event": "ready"} line is written once the worker can take jobs, and
+    a latency summary goes to stderr on EOF. While serving, anything the
+    handlers print goes to stderr; sys.stdout is restored on return.
+    """
+    protocol = stdout or sys.stdout
+    stdin = stdin or sys.stdin
+    lock = threading.Lock()
+    latencies = []
+
+    def send(message):
+        line = json.dumps(message, default=_to_json)
+        with lock:
+            protocol.write(line + "\n")
+            protocol.flush()
+
+    def run(job):
+        start = time.perf_counter()
+        job_id = None
+        try:
+            if not isinstance(job, dict):
+                raise ValueError(f"Invalid job: expected a JSON object, got {type(job).__name__}")
+            job_id = job.get("id")
+            message = {"id": job_id, "ok": True, "result": handler(job)}
+        except Exception as e:
+            message = {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        latency = (time.perf_counter() - start) * 1000
+        message["latency_ms"] = round(latency, 2)
+        with lock:
+            latencies.append(latency)
+        send(message)
+
+    send({"event": "ready", "workers": workers})
+    # Scripts print progress; keep that off the protocol stream, which is written through `protocol`.
+    with contextlib.redirect_stdout(sys.stderr), ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                send({"id": None, "ok": False, "error": f"Invalid job: {e}"})
+                continue
+            pool.submit(run, job)
+
+    if latencies:
+        print(f"Served {len(latencies)} jobs: mean {statistics.mean(latencies):.1f} ms, "
+              f"median {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms",
+              file=sys.stderr)
+
+
+def compare(script, job, cli_args, runs=5):
+    """
+    Time `runs` cold invocations of `script` (one interpreter per job, as
+    server.js does today) against the same job sent `runs` times to one
+    warm `script --serve` worker.
+    """
+    cold = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, *cli_args], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        cold.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, script, "--serve"], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    worker.stdout.readline()  # ready event
+    startup = (time.perf_counter() - start) * 1000
+
+    warm = []
+    for i in range(runs):
+        start = time.perf_counter()
+        worker.stdin.write(json.dumps(dict(job, id=i)) + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        if not response["ok"]:
+            print("Worker error:", response["error"], file=sys.stderr)
+        warm.append((time.perf_counter() - start) * 1000)
+    worker.stdin.close()
+    worker.wait()
+
+    print(f"Cold start: median {statistics.median(cold):.1f} ms per job over {runs} runs")
+    print(f"Warm worker: median {statistics.median(warm):.1f} ms per job over {runs} runs "
+          f"(one-time startup {startup:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cold-start and warm-worker latency for a script.")
+    parser.add_argument("script", help="Script with a --serve mode, e.g. image_inference.py.")
+    parser.add_argument("--job", required=True, help='Job to send to the worker, e.g. \'{"image": "a.jpg"}\'.')
+    parser.add_argument("--runs", type=int, default=5, help="Jobs to time in each mode.")
+    parser.add_argument("cli_args", nargs=argparse.REMAINDER, help="Arguments for the cold invocation.")
+    args = parser.parse_args()
+    compare(args.script, json.loads(args.job), args.cli_args, args.runs)
@@ -1,17 +1,23 @@
+import argparse
 import cv2
+import logging
 import sys
-import os
-import tempfile
-from inference_sdk import InferenceHTTPClient
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from box_tracker import BoxTracker
+from frame_sampler import make_sampler
+from detector_backends import get_detector
+from jsonl_worker import serve
+from overlay import OverlayRenderer, rate_limited_logger
 
-# Replace with your actual API key
-API_KEY = "hB8S8n5OlohSOI3c51ic"
 MODEL_ID = "presnaps-large-model/1"
 
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
-    api_key=API_KEY
-)
+DETECTOR = get_detector()
+
+# Per-box messages go through a rate-limited logger so they cannot flood stdout.
+log = rate_limited_logger("process_video")
 
 def get_boxes(frame):
     """
@@ -19,22 +25,14 @@ def get_boxes(frame):
     Each bbox is a dict with keys: 'top_left_x', 'top_left_y', 'w', 'h', and 'label'.
     """
     boxes = []
-    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-        tmp_filename = tmp.name
-        cv2.imwrite(tmp_filename, frame)
-    print("Saved temporary frame for inference:", tmp_filename)
-    
     try:
-        result = CLIENT.infer(tmp_filename, model_id=MODEL_ID)
+        # The frame is JPEG-encoded in memory; nothing is written to disk.
+        result = DETECTOR.infer(frame, model_id=MODEL_ID)
         print("Inference result:", result)
     except Exception as e:
         print("Inference error:", e)
-        os.remove(tmp_filename)
         return boxes
 
-    os.remove(tmp_filename)
-    print("Temporary file removed:", tmp_filename)
-
     if "predictions" in result:
         for pred in result["predictions"]:
             x = int(pred["x"])
@@ -51,12 +49,14 @@ def get_boxes(frame):
                 "label": pred.get("class", "object")
             }
             boxes.append(box)
-            print(f"Inferred box for {box['label']} at ({top_left_x}, {top_left_y}), w: {w}, h: {h}")
+            log.info("Inferred box for %s at (%d, %d), w: %d, h: %d", box["label"], top_left_x, top_left_y, w, h)
     return boxes
 
 def draw_boxes(frame, boxes):
     """
     Draw the given bounding boxes on the frame.
+    The video loops use OverlayRenderer, which draws the same overlay
+    without per-box OpenCV calls.
     """
     for box in boxes:
         tl_x = box["top_left_x"]
@@ -66,15 +66,14 @@ def draw_boxes(frame, boxes):
         cv2.rectangle(frame, (tl_x, tl_y), (tl_x + w, tl_y + h), (0, 255, 0), 2)
         cv2.putText(frame, box["label"], (tl_x, tl_y - 10),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-        print(f"Drawn persistent box for {box['label']} at ({tl_x}, {tl_y}), w: {w}, h: {h}")
+        log.info("Drawn persistent box for %s at (%d, %d), w: %d, h: %d", box["label"], tl_x, tl_y, w, h)
     return frame
 
-def process_video(input_path, output_path):
+def process_video(input_path, output_path, sampler_options=None, track=False):
     print("Opening input video:", input_path)
     cap = cv2.VideoCapture(input_path)
     if not cap.isOpened():
-        print("Error: Could not open input video.")
-        sys.exit(1)
+        raise ValueError(f"Could not open input video: {input_path}")
 
     fps = cap.get(cv2.CAP_PROP_FPS)
     if not fps or fps < 1:
@@ -90,13 +89,16 @@ def process_video(input_path, output_path):
     fourcc = cv2.VideoWriter_fourcc(*'avc1')
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
     if not out.isOpened():
-        print("Error: Could not open output video for writing.")
-        sys.exit(1)
+        cap.release()
+        raise RuntimeError(f"Could not open output video for writing: {output_path}")
     print("Writing output to:", output_path)
     
     frame_count = 0
     round_fps = int(round(fps))
-    cached_boxes = []  # holds the bounding boxes for the current second
+    sampler = make_sampler(fps, **(sampler_options or {}))
+    cached_boxes = []  # holds the bounding boxes since the last inferred frame
+    tracker = BoxTracker() if track else None
+    renderer = OverlayRenderer()
     
     while True:
         ret, frame = cap.read()
@@ -109,16 +111,18 @@ def process_video(input_path, output_path):
         # Determine the "second" for the current frame
         current_sec = frame_count // round_fps
 
-        # If this frame is the first of a new second, run inference and cache bbox data.
-        if frame_count % round_fps == 0:
+        # Run inference when the sampler asks for it (by default the first
+        # frame of every second) and cache the bbox data until the next one.
+        if sampler.should_infer(frame_count, frame):
             print(f"Running inference on frame {frame_count} (second {current_sec})")
             cached_boxes = get_boxes(frame)
-        else:
-            if frame_count % round_fps == 1:
-                print(f"Using cached boxes for second {current_sec}")
+            if tracker:
+                tracker.update(frame_count, cached_boxes)
     
-        # Draw the cached bounding boxes on the current frame.
-        output_frame = draw_boxes(frame.copy(), cached_boxes)
+        # Draw the cached (or tracked) bounding boxes on the current frame.
+        boxes = tracker.predict(frame_count) if tracker else cached_boxes
+        # The frame is not used again after this, so draw on it in place.
+        output_frame = renderer.draw(frame, boxes)
         
         out.write(output_frame)
     
@@ -127,13 +131,245 @@ def process_video(input_path, output_path):
     
     cap.release()
     out.release()
+    print(sampler.summary())
+    if DETECTOR.cache is not None:
+        print(DETECTOR.cache.summary())
+    print(f"Processing complete. Output saved to {output_path}")
+
+def process_video_pipelined(input_path, output_path, workers=4, queue_depth=64, sampler_options=None,
+                            track=False, interpolate=False):
+    """
+    Pipelined variant of process_video.
+
+    Decoding, inference and drawing/encoding run as separate stages joined by
+    bounded queues, so cap.read() and out.write() keep going while get_boxes
+    calls are in flight on a pool of `workers` threads. Frames are written in
+    input order. `queue_depth` bounds the number of decoded frames held
+    between stages. `sampler_options` is passed to make_sampler.
+
+    With `track`, boxes between keyframes are extrapolated by a BoxTracker.
+    With `interpolate`, frames after a keyframe are held back until the next
+    keyframe's boxes arrive and drawn with boxes blended between the two;
+    this buffers up to one sampling interval of frames.
+    """
+    print("Opening input video:", input_path)
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open input video: {input_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps < 1:
+        print("Warning: FPS not found. Defaulting to 25.")
+        fps = 25.0
+    print("Detected Frames Per Second (FPS):", fps)
+
+    width  = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    print("Frame dimensions (width x height): {} x {}".format(width, height))
+
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')
+    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    if not out.isOpened():
+        cap.release()
+        raise RuntimeError(f"Could not open output video for writing: {output_path}")
+    print("Writing output to:", output_path)
+    print(f"Pipelined mode: {workers} inference workers, queue depth {queue_depth}")
+
+    round_fps = int(round(fps))
+    sampler = make_sampler(fps, **(sampler_options or {}))
+    decoded = queue.Queue(maxsize=queue_depth)
+    dispatched = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item):
+        # Blocking put that gives up once the writer has stopped consuming.
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def decode_stage():
+        frame_count = 0
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame_count += 1
+                if not put(decoded, (frame_count, frame)):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(decoded, None)
+
+    def inference_stage(pool):
+        # Submits keyframes to the pool and tags every frame with the future
+        # holding the boxes it should be drawn with.
+        pending = Future()
+        pending.set_result([])
+        try:
+            while True:
+                item = get(decoded)
+                if item is None:
+                    break
+                frame_count, frame = item
+                keyframe = sampler.should_infer(frame_count, frame)
+                if keyframe:
+                    print(f"Submitting inference for frame {frame_count} (second {frame_count // round_fps})")
+                    pending = pool.submit(get_boxes, frame)
+                if not put(dispatched, (frame_count, frame, pending, keyframe)):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(dispatched, None)
+
+    tracker = BoxTracker() if track or interpolate else None
+    segment = []  # frames held back until the next keyframe when interpolating
+    renderer = OverlayRenderer()
+    frame_count = 0
+    written = 0
+    start = time.perf_counter()
+
+    def emit(frame, boxes):
+        nonlocal written
+        out.write(renderer.draw(frame, boxes))
+        written += 1
+        if written % 50 == 0:
+            elapsed = time.perf_counter() - start
+            print(f"Wrote {written} frames so far ({written / elapsed:.1f} fps)...")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        decoder = threading.Thread(target=decode_stage, name="decode", daemon=True)
+        dispatcher = threading.Thread(target=inference_stage, args=(pool,), name="inference", daemon=True)
+        decoder.start()
+        dispatcher.start()
+
+        try:
+            while True:
+                item = dispatched.get()
+                if item is None:
+                    break
+                frame_count, frame, pending, keyframe = item
+                # The keyframe itself is only drawn on after its inference
+                # has finished, so drawing in place is safe here.
+                if tracker is None:
+                    emit(frame, pending.result())
+                elif keyframe:
+                    tracker.update(frame_count, pending.result())
+                    for held_count, held in segment:
+                        emit(held, tracker.interpolate(held_count))
+                    segment = []
+                    emit(frame, tracker.predict(frame_count))
+                elif interpolate and tracker.frame is not None:
+                    segment.append((frame_count, frame))
+                else:
+                    emit(frame, tracker.predict(frame_count))
+
+            # No keyframe follows the last segment, so extrapolate it.
+            for held_count, held in segment:
+                emit(held, tracker.predict(held_count))
+        finally:
+            stop.set()
+            decoder.join()
+            dispatcher.join()
+
+    elapsed = time.perf_counter() - start
+    cap.release()
+    out.release()
+    if errors:
+        raise errors[0]
+    print("End of input video reached. Total frames processed:", frame_count)
+    print(sampler.summary())
+    if DETECTOR.cache is not None:
+        print(DETECTOR.cache.summary())
+    if elapsed > 0:
+        print(f"Sustained throughput: {frame_count / elapsed:.2f} fps over {elapsed:.2f}s")
     print(f"Processing complete. Output saved to {output_path}")
 
+def handle_job(job):
+    """
+    Worker-mode job: {"input": path, "output": path} plus any of the CLI
+    options ("pipeline", "workers", "queue_depth", "track", "interpolate",
+    "sampler": {...make_sampler options}). Returns {"output": path}.
+    """
+    if job.get("pipeline"):
+        process_video_pipelined(job["input"], job["output"],
+                                workers=job.get("workers", 4),
+                                queue_depth=job.get("queue_depth", 64),
+                                sampler_options=job.get("sampler"),
+                                track=job.get("track", False),
+                                interpolate=job.get("interpolate", False))
+    else:
+        process_video(job["input"], job["output"],
+                      sampler_options=job.get("sampler"), track=job.get("track", False))
+    return {"output": job["output"]}
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python process_video.py <input_video> <output_video>")
+    parser = argparse.ArgumentParser(description="Draw detected players on every frame of a video.")
+    parser.add_argument("input_video", nargs="?", help="Path to the input video.")
+    parser.add_argument("output_video", nargs="?", help="Path to write the annotated video.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay running and serve JSON-lines jobs on stdin/stdout.")
+    parser.add_argument("--serve-workers", type=int, default=1,
+                        help="Videos processed concurrently in --serve mode.")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run decode, inference and encode as concurrent stages.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Inference worker threads in pipelined mode.")
+    parser.add_argument("--queue-depth", type=int, default=64,
+                        help="Maximum frames buffered between pipeline stages.")
+    parser.add_argument("--track", action="store_true",
+                        help="Move boxes between inferred frames with a constant-velocity tracker.")
+    parser.add_argument("--interpolate", action="store_true",
+                        help="Blend boxes between consecutive inferred frames (pipelined mode only).")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Only run inference when the scene changes instead of once per second.")
+    parser.add_argument("--motion-threshold", type=float, default=6.0,
+                        help="Mean thumbnail difference (0-255) that triggers inference in adaptive mode.")
+    parser.add_argument("--min-interval", type=float, default=0.2,
+                        help="Minimum seconds between inference calls in adaptive mode.")
+    parser.add_argument("--max-interval", type=float, default=2.0,
+                        help="Maximum seconds between inference calls in adaptive mode.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s",
+                        stream=sys.stderr if args.serve else sys.stdout)
+    if args.serve:
+        serve(handle_job, workers=args.serve_workers)
+        sys.exit(0)
+    if not args.output_video:
+        parser.error("input and output video paths are required unless --serve is given")
+    if args.interpolate and not args.pipeline:
+        parser.error("--interpolate requires --pipeline")
+
+    sampler_options = {
+        "adaptive": args.adaptive,
+        "threshold": args.motion_threshold,
+        "min_interval": args.min_interval,
+        "max_interval": args.max_interval,
+    }
+    try:
+        if args.pipeline:
+            process_video_pipelined(args.input_video, args.output_video,
+                                    workers=args.workers, queue_depth=args.queue_depth,
+                                    sampler_options=sampler_options,
+                                    track=args.track, interpolate=args.interpolate)
+        else:
+            process_video(args.input_video, args.output_video,
+                          sampler_options=sampler_options, track=args.track)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
         sys.exit(1)
-    
-    input_video_path = sys.argv[1]
-    output_video_path = sys.argv[2]
-    process_video(input_video_path, output_video_path)
\ No newline at end of file
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+CACHE_DIR = os.environ.get(
+    "INFERENCE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bm_football_plays", "inference"),
+)
+CACHE_MAX_MB = float(os.environ.get("INFERENCE_CACHE_MAX_MB", "256"))
+
+
+class ResultCache:
+    """
+    On-disk cache of inference results, one JSON file per key.
+
+    Keys are content hashes (see inference_client.result_key), so the same
+    image sent to the same model hits regardless of its file name. Entries
+    are written to a temp file and os.replace()d into place, so readers in
+    other processes never see a partial file. Reads refresh the file's
+    mtime, and once the directory grows past `max_bytes` the least recently
+    used entries are deleted until it is back under 90% of the limit.
+
+    The size is tracked in memory between writes and re-read from disk at
+    least every `sync_seconds`, so processes sharing a directory also see
+    each other's writes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024), sync_seconds=10.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sync_seconds = sync_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._approx_bytes = None
+        self._synced = 0.0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """Return the cached result for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value).encode("utf-8")
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # An overwritten entry's bytes are replaced, not added to.
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            stale = self._approx_bytes is None or time.monotonic() - self._synced >= self.sync_seconds
+            if not stale:
+                self._approx_bytes += len(data) - replaced
+                over = self._approx_bytes > self.max_bytes
+        if stale:
+            # Other processes may have written since the last look; count what is on disk.
+            total = self.disk_usage()[1]
+            with self._lock:
+                self._approx_bytes = total
+                self._synced = time.monotonic()
+                over = total > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def disk_usage(self):
+        """Return (entry count, total bytes) currently on disk."""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def evict(self):
+        """Delete least recently used entries until under 90% of max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self.evictions += removed
+            self._approx_bytes = total
+            self._synced = time.monotonic()
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._approx_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"Inference cache: {s['hits']} hits, {s['misses']} misses "
+                f"({s['hit_rate']:.0%} hit rate), {s['evictions']} evictions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the inference result cache.")
+    parser.add_argument("--dir", default=CACHE_DIR, help="Cache directory.")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result.")
+    args = parser.parse_args()
+
+    cache = ResultCache(args.dir)
+    if args.clear:
+        cache.clear()
+    count, size = cache.disk_usage()
+    print(f"{args.dir}: {count} entries, {size / 1024 / 1024:.1f} MB (limit {cache.max_bytes / 1024 / 1024:.0f} MB)")
@@ -0,0 +1,70 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from detector_backends import decode_image
+
+
+def _find_boxes(upload):
+    # Boxes around the bright blobs of a base64 JPEG upload, in its own pixel coordinates.
+    import cv2
+
+    frame = decode_image(base64.b64decode(upload))
+    mask = (cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) > 200).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    predictions = [
+        {"x": left + width / 2, "y": top + height / 2, "width": float(width), "height": float(height),
+         "confidence": 0.9, "class": "player", "class_id": 0}
+        for left, top, width, height, _ in stats[1:].tolist()
+    ]
+    return json.dumps({"image": {"width": frame.shape[1], "height": frame.shape[0]},
+                       "predictions": predictions}).encode("utf-8")
+
+
+class _StubDetectHandler(BaseHTTPRequestHandler):
+    # Stand-in for detect.roboflow.com: reads the upload and returns canned boxes,
+    # or with find_boxes the boxes of the bright blobs in the upload.
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    response = b""
+    find_boxes = False
+
+    def do_POST(self):
+        upload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        response = _find_boxes(upload) if self.find_boxes else self.response
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(latency_ms=0.0, num_boxes=22, find_boxes=False):
+    """
+    Start a local stand-in detect server on a free port; returns (server, url).
+    It answers with `num_boxes` canned boxes, or with `find_boxes` with the
+    boxes of the bright (> 200 grey) blobs in the uploaded image, so resized
+    uploads can be checked against full-size ones without the live service.
+    """
+    predictions = [
+        {"x": 100.0 + 40 * i, "y": 300.0, "width": 30.0, "height": 60.0,
+         "confidence": 0.9, "class": "player", "class_id": 0}
+        for i in range(num_boxes)
+    ]
+    handler = type("StubHandler", (_StubDetectHandler,), {
+        "latency": latency_ms / 1000.0,
+        "find_boxes": find_boxes,
+        "response": json.dumps({"image": {"width": 1920, "height": 1080},
+                                "predictions": predictions}).encode("utf-8"),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
@@ -0,0 +1,277 @@
+import argparse
+import csv
+import os
+import re
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DIGIT_TEMPLATES = os.environ.get("DIGIT_TEMPLATES", "digit_templates.npz")
+MIN_CONFIDENCE = float(os.environ.get("DIGIT_MIN_CONFIDENCE", "0.8"))
+# Off until its accuracy has been measured against Tesseract on real crops
+# (python digit_recognizer.py labels.csv); set DIGIT_RECOGNIZER=1 to use it.
+USE_RECOGNIZER = os.environ.get("DIGIT_RECOGNIZER", "0") == "1"
+
+GLYPH_W, GLYPH_H = 16, 24
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_COMPLEX,
+         cv2.FONT_HERSHEY_TRIPLEX, cv2.FONT_HERSHEY_PLAIN]
+
+
+def _normalize(glyph):
+    """Scale a boolean/uint8 glyph to GLYPH_H rows, keep its aspect, centre it, and unit-normalize."""
+    h, w = glyph.shape
+    new_w = max(1, min(GLYPH_W, int(round(w * GLYPH_H / h))))
+    resized = cv2.resize(glyph.astype(np.float32), (new_w, GLYPH_H), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((GLYPH_H, GLYPH_W), dtype=np.float32)
+    left = (GLYPH_W - new_w) // 2
+    canvas[:, left:left + new_w] = resized
+    vec = canvas.ravel()
+    vec = vec - vec.mean()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def render_templates():
+    """Digit templates rasterised from OpenCV's Hershey fonts at a few stroke widths."""
+    vectors, labels = [], []
+    for font in FONTS:
+        for thickness in (1, 2, 3):
+            for digit in "0123456789":
+                canvas = np.zeros((80, 60), dtype=np.uint8)
+                cv2.putText(canvas, digit, (8, 62), font, 2.0, 255, thickness)
+                ys, xs = np.nonzero(canvas)
+                vectors.append(_normalize(canvas[ys.min():ys.max() + 1, xs.min():xs.max() + 1] > 127))
+                labels.append(digit)
+    return np.stack(vectors), np.array(labels)
+
+
+def binarize(image):
+    """Otsu-threshold an autocontrasted crop into an ink mask, with ink as the minority class."""
+    gray = np.asarray(image.convert("L") if hasattr(image, "convert") else image, dtype=np.uint8)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ink = binary > 0
+    return ~ink if ink.mean() > 0.5 else ink
+
+
+def segment(ink, allow_colon=False):
+    """
+    Split an ink mask into glyphs by column projection. Returns a list of
+    boolean glyph arrays, with the string ":" standing in for colons.
+    Runs too wide for one digit are split at their thinnest columns; short
+    blobs are dropped as noise, and narrow two-piece blobs are colons.
+    """
+    cols = ink.any(axis=0)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], cols.astype(np.int8), [0]))))
+    runs = []
+    for start, stop in zip(edges[::2], edges[1::2]):
+        rows = np.flatnonzero(ink[:, start:stop].any(axis=1))
+        runs.append((start, stop, rows[0], rows[-1] + 1))
+    if not runs:
+        return []
+
+    height = max(bottom - top for _, _, top, bottom in runs)
+    glyphs = []
+    for start, stop, top, bottom in runs:
+        h, w = bottom - top, stop - start
+        if w < 0.5 * height:
+            # A colon is two dots stacked with a gap between them; digits are one vertical piece.
+            rows = ink[top:bottom, start:stop].any(axis=1)
+            if np.count_nonzero(np.diff(rows.astype(np.int8)) == 1) >= 1:
+                if allow_colon:
+                    glyphs.append(":")
+                continue
+        if h < 0.5 * height:
+            continue
+        glyph = ink[top:bottom, start:stop]
+        # Touching digits: cut at the thinnest column near each even split point.
+        parts = max(1, int(round(w / (0.75 * h)))) if w > 1.1 * h else 1
+        counts = glyph.sum(axis=0)
+        cuts = [0]
+        for i in range(1, parts):
+            lo, hi = (4 * i - 1) * w // (4 * parts), (4 * i + 1) * w // (4 * parts) + 1
+            cuts.append(lo + int(counts[lo:hi].argmin()))
+        cuts.append(w)
+        for left, right in zip(cuts, cuts[1:]):
+            piece = glyph[:, left:right]
+            rows = np.flatnonzero(piece.any(axis=1))
+            if len(rows):
+                glyphs.append(piece[rows[0]:rows[-1] + 1])
+    return glyphs
+
+
+class DigitRecognizer:
+    """
+    Nearest-template digit reader for Score, PlayTime and YardNumber crops.
+    Glyphs are segmented from the autocontrasted crop and matched by
+    normalized correlation against the templates; a read's confidence is
+    its weakest glyph's best correlation. Upside-down crops are handled by
+    also matching the flipped mask and keeping the better orientation.
+    """
+
+    def __init__(self, templates=None, labels=None):
+        if templates is None:
+            templates, labels = render_templates()
+        self.templates = templates
+        self.labels = labels
+
+    @classmethod
+    def load(cls, path=DIGIT_TEMPLATES):
+        """Learned templates from `path` when it exists, else the rendered font templates."""
+        if path and os.path.exists(path):
+            data = np.load(path)
+            return cls(data["templates"], data["labels"])
+        return cls()
+
+    def save(self, path):
+        np.savez_compressed(path, templates=self.templates, labels=self.labels)
+
+    def _classify(self, glyphs):
+        text, confidence = [], 1.0
+        for glyph in glyphs:
+            if isinstance(glyph, str):
+                text.append(glyph)
+                continue
+            scores = self.templates @ _normalize(glyph)
+            best = int(scores.argmax())
+            text.append(str(self.labels[best]))
+            confidence = min(confidence, float(scores[best]))
+        if not any(c.isdigit() for c in text):
+            return "", 0.0
+        return "".join(text), confidence
+
+    def read(self, image, allow_colon=False, try_rotated=False):
+        """Return (text, confidence) for one crop."""
+        ink = binarize(image)
+        text, confidence = self._classify(segment(ink, allow_colon))
+        if try_rotated:
+            flipped, flipped_conf = self._classify(segment(ink[::-1, ::-1], allow_colon))
+            if flipped_conf > confidence:
+                return flipped, flipped_conf
+        return text, confidence
+
+    @classmethod
+    def fit(cls, samples):
+        """
+        Learn one mean template per digit (plus the font templates) from
+        (image, text) pairs. Samples whose glyph count does not match their
+        label are skipped.
+        """
+        base, base_labels = render_templates()
+        sums = {}
+        for image, text in samples:
+            digits = re.sub(r"\D", "", text)
+            glyphs = [g for g in segment(binarize(image)) if not isinstance(g, str)]
+            if len(glyphs) != len(digits):
+                continue
+            for glyph, digit in zip(glyphs, digits):
+                vec = _normalize(glyph)
+                total, count = sums.get(digit, (0, 0))
+                sums[digit] = (total + vec, count + 1)
+        learned = []
+        labels = []
+        for digit, (total, count) in sorted(sums.items()):
+            vec = total / count
+            learned.append(vec / (np.linalg.norm(vec) or 1.0))
+            labels.append(digit)
+        if not learned:
+            return cls(base, base_labels)
+        return cls(np.concatenate([np.stack(learned), base]), np.concatenate([np.array(labels), base_labels]))
+
+
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+
+def get_digit_recognizer():
+    """Return the process-wide DigitRecognizer, or None unless DIGIT_RECOGNIZER=1."""
+    global _recognizer
+    if not USE_RECOGNIZER:
+        return None
+    if _recognizer is None:
+        with _recognizer_lock:
+            if _recognizer is None:
+                _recognizer = DigitRecognizer.load()
+    return _recognizer
+
+
+def load_labeled_crops(labels_path):
+    """
+    Read a labeled crop set: a CSV with `file,text,class` columns, where
+    `file` is relative to the CSV and `class` is Score, PlayTime or YardNumber.
+    """
+    from PIL import Image
+
+    base = os.path.dirname(os.path.abspath(labels_path))
+    crops = []
+    with open(labels_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            image = Image.open(os.path.join(base, row["file"])).convert("L")
+            crops.append((image, row["text"], row.get("class") or "Score"))
+    return crops
+
+
+def evaluate(labels_path, templates=DIGIT_TEMPLATES, min_confidence=MIN_CONFIDENCE):
+    """Compare accuracy and latency of the recognizer, recognizer + fallback, and pytesseract alone."""
+    from ocr_engine import PytesseractEngine
+
+    crops = load_labeled_crops(labels_path)
+    recognizer = DigitRecognizer.load(templates)
+    tesseract = PytesseractEngine()
+
+    def canonical(text):
+        return re.sub(r"[^\d:]", "", text)
+
+    def tesseract_read(image, cls):
+        # The current Scoreboard path, including the YardNumber rotation retry.
+        text = tesseract.read(image, digits_only=cls != "PlayTime")
+        if cls == "YardNumber" and not any(c.isdigit() for c in text):
+            text += tesseract.read(image.rotate(180), digits_only=True)
+        return text
+
+    results = {"recognizer": [0, 0.0], "recognizer+fallback": [0, 0.0], "pytesseract": [0, 0.0]}
+    fallbacks = 0
+    for image, label, cls in crops:
+        expected = canonical(label)
+        kwargs = {"allow_colon": cls == "PlayTime", "try_rotated": cls == "YardNumber"}
+
+        start = time.perf_counter()
+        text, confidence = recognizer.read(image, **kwargs)
+        elapsed = time.perf_counter() - start
+        results["recognizer"][0] += canonical(text) == expected
+        results["recognizer"][1] += elapsed
+
+        if confidence < min_confidence:
+            fallbacks += 1
+            start = time.perf_counter()
+            text = tesseract_read(image, cls)
+            elapsed += time.perf_counter() - start
+        results["recognizer+fallback"][0] += canonical(text) == expected
+        results["recognizer+fallback"][1] += elapsed
+
+        start = time.perf_counter()
+        text = tesseract_read(image, cls)
+        results["pytesseract"][1] += time.perf_counter() - start
+        results["pytesseract"][0] += canonical(text) == expected
+
+    n = len(crops)
+    print(f"{n} labeled crops, {fallbacks} fell back to tesseract (min confidence {min_confidence})")
+    for name, (correct, seconds) in results.items():
+        print(f"{name}: accuracy {correct / n:.1%}, {seconds / n * 1000:.2f} ms/crop")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate or train the scoreboard digit recognizer.")
+    parser.add_argument("labels", help="CSV of labeled crops (file,text,class).")
+    parser.add_argument("--templates", default=DIGIT_TEMPLATES, help="Learned template file.")
+    parser.add_argument("--fit", action="store_true", help="Learn templates from the labeled crops and save them.")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE,
+                        help="Reads below this confidence fall back to tesseract.")
+    args = parser.parse_args()
+    if args.fit:
+        samples = [(image, text) for image, text, _ in load_labeled_crops(args.labels)]
+        DigitRecognizer.fit(samples).save(args.templates)
+        print(f"Saved templates to {args.templates}")
+    else:
+        evaluate(args.labels, args.templates, args.min_confidence)
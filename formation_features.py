@@ -0,0 +1,181 @@
+import argparse
+import time
+
+import numpy as np
+
+from formation_batch import POSITIONS
+
+QB, RB, TE, WR = range(len(POSITIONS))
+
+FEATURE_NAMES = [
+    "num_qb", "num_rb", "num_te", "num_wr",
+    "qb_depth",            # QB distance behind the line (shotgun deep, under center shallow)
+    "rb_depth",            # mean RB distance behind the line
+    "rb_behind_qb",        # RB depth minus QB depth (> 0 for pistol / I-form, ~0 for shotgun offset)
+    "rb_lateral_offset",   # mean RB distance from the QB along the line (0 = stacked behind him)
+    "wr_split_max",        # widest receiver split from the QB
+    "wr_split_mean",
+    "wr_left",             # receivers on each side of the QB
+    "wr_right",
+    "te_split_min",        # closest TE to the QB along the line (small = attached)
+    "te_depth",            # mean TE distance off the line
+]
+GEOMETRIC_FEATURES = FEATURE_NAMES[len(POSITIONS):]
+
+
+def _group_mean(frame, values, mask, num_frames):
+    count = np.bincount(frame[mask], minlength=num_frames)
+    total = np.bincount(frame[mask], weights=values[mask], minlength=num_frames)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan), count
+
+
+def _group_extreme(ufunc, frame, values, mask, num_frames, initial):
+    out = np.full(num_frames, initial, dtype=np.float64)
+    ufunc.at(out, frame[mask], values[mask])
+    return out
+
+
+def position_columns(positions_by_frame):
+    """
+    Flatten per-frame position lists ({"class", "x", "y"} dicts, as from
+    get_class_counts_and_positions) into the columnar arrays
+    formation_features takes.
+    """
+    frame, classes, xs, ys = [], [], [], []
+    for i, positions in enumerate(positions_by_frame):
+        for p in positions:
+            frame.append(i)
+            classes.append(p["class"])
+            xs.append(p["x"])
+            ys.append(p["y"])
+    return np.array(frame, dtype=np.intp), np.array(classes, dtype=object), np.array(xs), np.array(ys)
+
+
+def formation_features(frame, classes, x, y, num_frames=None):
+    """
+    Fixed-length geometric features for a columnar batch of detections.
+    Detection i is in frame `frame[i]`, has class `classes[i]` (a name from
+    POSITIONS; anything else is ignored) and centre (`x[i]`, `y[i]`).
+    Returns a (num_frames, len(FEATURE_NAMES)) float32 array, NaN where a
+    feature is undefined (e.g. RB features with no RB).
+
+    The line of scrimmage is taken as the receivers' (WR and TE) mean
+    position across the axis they spread along; depths are measured away
+    from it on the QB's side, and every distance is divided by the
+    receivers' spread so features do not depend on zoom.
+    """
+    frame = np.asarray(frame, dtype=np.intp)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    classes = np.asarray(classes)
+    num_frames = num_frames if num_frames is not None else (int(frame.max()) + 1 if len(frame) else 0)
+    code = np.full(len(frame), -1, dtype=np.intp)
+    if classes.dtype.kind in "iu":
+        code[:] = classes
+    else:
+        for i, name in enumerate(POSITIONS):
+            code[classes == name] = i
+    keep = code >= 0
+    frame, code, x, y = frame[keep], code[keep], x[keep], y[keep]
+
+    counts = np.bincount(frame * len(POSITIONS) + code, minlength=num_frames * len(POSITIONS))
+    counts = counts.reshape(num_frames, len(POSITIONS))
+
+    qb, rb, te, wr = (code == c for c in (QB, RB, TE, WR))
+    receivers = te | wr
+    inf = np.inf
+
+    # Which image axis the line runs along: the one the receivers spread across.
+    spread_x = (_group_extreme(np.maximum, frame, x, receivers, num_frames, -inf) -
+                _group_extreme(np.minimum, frame, x, receivers, num_frames, inf))
+    spread_y = (_group_extreme(np.maximum, frame, y, receivers, num_frames, -inf) -
+                _group_extreme(np.minimum, frame, y, receivers, num_frames, inf))
+    along_x = ~(spread_y > spread_x)
+    lateral = np.where(along_x[frame], x, y)
+    depth = np.where(along_x[frame], y, x)
+    spread = np.where(along_x, spread_x, spread_y)
+    scale = np.where(np.isfinite(spread) & (spread > 0), spread, 1.0)
+
+    qb_lat, _ = _group_mean(frame, lateral, qb, num_frames)
+    qb_dep, _ = _group_mean(frame, depth, qb, num_frames)
+    line, _ = _group_mean(frame, depth, receivers, num_frames)
+    all_lat, _ = _group_mean(frame, lateral, np.ones(len(frame), dtype=bool), num_frames)
+    center = np.where(np.isnan(qb_lat), all_lat, qb_lat)
+
+    # Backfield direction: towards the QB; default to +depth without one.
+    direction = np.sign(np.nan_to_num(qb_dep - line))
+    direction[direction == 0] = 1.0
+    rel_depth = (depth - line[frame]) * direction[frame] / scale[frame]
+    rel_lat = np.abs(lateral - center[frame]) / scale[frame]
+
+    qb_depth = (qb_dep - line) * direction / scale
+    rb_depth, _ = _group_mean(frame, rel_depth, rb, num_frames)
+    rb_lateral, _ = _group_mean(frame, np.abs(lateral - qb_lat[frame]) / scale[frame], rb, num_frames)
+    wr_split_mean, wr_count = _group_mean(frame, rel_lat, wr, num_frames)
+    wr_split_max = _group_extreme(np.maximum, frame, rel_lat, wr, num_frames, -inf)
+    left = wr & (lateral < center[frame])
+    wr_left = np.bincount(frame[left], minlength=num_frames)
+    te_split_min = _group_extreme(np.minimum, frame, rel_lat, te, num_frames, inf)
+    te_depth, te_count = _group_mean(frame, rel_depth, te, num_frames)
+
+    features = np.column_stack([
+        counts,
+        qb_depth,
+        rb_depth,
+        rb_depth - qb_depth,
+        rb_lateral,
+        np.where(wr_count > 0, wr_split_max, np.nan),
+        wr_split_mean,
+        wr_left,
+        wr_count - wr_left,
+        np.where(te_count > 0, te_split_min, np.nan),
+        te_depth,
+    ])
+    return features.astype(np.float32)
+
+
+def frame_features(positions):
+    """Geometric features for one frame's positions, as a {name: value} dict (None where undefined)."""
+    row = formation_features(*position_columns([positions]), num_frames=1)[0]
+    return {name: (None if np.isnan(v) else float(v)) for name, v in zip(FEATURE_NAMES, row.tolist())}
+
+
+def synthetic_batch(num_frames, seed=0):
+    """Random but plausible formations: an 11-man offense around a horizontal line at y=400."""
+    rng = np.random.default_rng(seed)
+    layout = np.array([QB] + [RB] * 2 + [TE] * 2 + [WR] * 6)
+    frame = np.repeat(np.arange(num_frames), len(layout))
+    code = np.tile(layout, num_frames)
+    x = 960 + rng.normal(0, 300, len(code))
+    y = 400 + np.select([code == QB, code == RB], [rng.uniform(10, 120, len(code)), rng.uniform(40, 160, len(code))],
+                        rng.normal(0, 8, len(code)))
+    return frame, code, x, y
+
+
+def benchmark(num_frames=100000):
+    frame, code, x, y = synthetic_batch(num_frames)
+    classes = np.array(POSITIONS, dtype=object)[code]
+    formation_features(frame[:1000], classes[:1000], x[:1000], y[:1000])
+
+    start = time.perf_counter()
+    features = formation_features(frame, classes, x, y, num_frames)
+    elapsed = time.perf_counter() - start
+    print(f"{num_frames} frames ({len(frame)} detections): {elapsed * 1000:.0f} ms, "
+          f"{num_frames / elapsed:,.0f} frames/s")
+
+    per_frame = [
+        [{"class": classes[i], "x": x[i], "y": y[i]} for i in range(j * 11, j * 11 + 11)] for j in range(1000)]
+    start = time.perf_counter()
+    for positions in per_frame:
+        frame_features(positions)
+    elapsed = time.perf_counter() - start
+    print(f"one frame per call: {1000 / elapsed:,.0f} frames/s")
+    print("feature means:", {n: round(float(v), 3) for n, v in zip(FEATURE_NAMES, np.nanmean(features, axis=0))})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark columnar formation features.")
+    parser.add_argument("--frames", type=int, default=100000, help="Synthetic frames to featurize.")
+    args = parser.parse_args()
+    benchmark(args.frames)
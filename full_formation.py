@@ -1,6 +1,13 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from inference_sdk import InferenceHTTPClient
+from batch_io import WRITERS, process_batch
+from detector_backends import get_detector
+from formation_features import GEOMETRIC_FEATURES, frame_features
+from image_inference import classify_formation
+from jsonl_worker import serve
+
+POSITIONS = ["qb", "running_back", "tight_end", "wide_receiver"]
 
 
 def get_class_counts_and_positions(json_data):
@@ -19,29 +26,68 @@ def get_class_counts_and_positions(json_data):
     return class_counts, positions
 
 
+def process_image(image_path):
+    result = get_detector().run_workflow(image_path, workflow_id="custom-workflow-3")
+    return get_class_counts_and_positions(result)
+
+
 def main(image_path):
-    client = InferenceHTTPClient(
-        api_url="https://detect.roboflow.com",
-        api_key="hB8S8n5OlohSOI3c51ic"
-    )
-
-    result = client.run_workflow(
-        workspace_name="boilermake-2025",
-        workflow_id="custom-workflow-3",
-        images={"image": image_path},
-        use_cache=True  # Cache workflow definition for 15 minutes
-    )
-
-    class_counts, positions = get_class_counts_and_positions(result)
+    class_counts, positions = process_image(image_path)
     df = pd.DataFrame(positions)
 
     print("Class Counts:", class_counts)
     print(df)
+    print("Geometry:", frame_features(positions))
+
+
+def handle_job(job):
+    """Worker-mode job: {"image": path} -> {"class_counts": ..., "positions": ...}"""
+    class_counts, positions = process_image(job["image"])
+    return {"class_counts": class_counts, "positions": positions}
+
+
+def classify_row(image_path):
+    class_counts, positions = process_image(image_path)
+    row = {"path": image_path}
+    row.update({pos: class_counts.get(pos, 0) for pos in POSITIONS})
+    row["formation"] = classify_formation(*(row[pos] for pos in POSITIONS))
+    features = frame_features(positions)
+    row.update({name: features[name] for name in GEOMETRIC_FEATURES})
+    return row
+
+
+def run_batch(source, output, workers=8, fmt=None):
+    """
+    Classify every image in a directory or manifest on a pool of `workers`
+    threads, streaming one row per image (path, per-position counts,
+    formation, geometric features) to `output` as results complete.
+    Images already present in `output` are skipped, so an interrupted run
+    can simply be restarted.
+    Failed images are reported on stderr and retried on the next run.
+    """
+    process_batch(source, output, ThreadPoolExecutor(max_workers=workers), classify_row, workers * 2, fmt,
+                  verb="classified")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run inference on an image and display results.")
-    parser.add_argument("image", help="Path to the input image.")
+    parser.add_argument("image", nargs="?", help="Path to the input image.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay running and serve JSON-lines jobs on stdin/stdout.")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="Classify every image in a directory or manifest file (one path per line).")
+    parser.add_argument("--output", default="formations.jsonl",
+                        help="Batch output: a .jsonl file or a .parquet directory.")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Batch output format (default: from --output).")
+    parser.add_argument("--workers", type=int,
+                        help="Concurrent jobs (default 1 with --serve, 8 with --batch).")
     args = parser.parse_args()
 
-    main(args.image)
+    if args.serve:
+        serve(handle_job, workers=args.workers or 1)
+    elif args.batch:
+        run_batch(args.batch, args.output, workers=args.workers or 8, fmt=args.format)
+    elif not args.image:
+        parser.error("an image path is required unless --serve is given")
+    else:
+        main(args.image)
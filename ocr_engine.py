@@ -0,0 +1,195 @@
+import argparse
+import os
+import threading
+import time
+
+from PIL import ImageOps
+
+DIGITS = "0123456789"
+OCR_ENGINE = os.environ.get("OCR_ENGINE")
+
+
+class PytesseractEngine:
+    """The original path: one tesseract subprocess per crop."""
+
+    name = "pytesseract"
+
+    def read(self, image, digits_only=False):
+        import pytesseract
+
+        config = '--psm 7 --oem 3'
+        if digits_only:
+            config += f' -c tessedit_char_whitelist={DIGITS}'
+        return pytesseract.image_to_string(image, config=config)
+
+    def read_many(self, items):
+        """OCR a list of (image, digits_only) pairs; returns one string per pair."""
+        return [self.read(image, digits_only) for image, digits_only in items]
+
+
+class TesserocrEngine:
+    """
+    Keeps tesseract loaded in-process through tesserocr, so there is no
+    subprocess launch or temp file per crop. Each thread gets its own API
+    handles (they are not thread-safe), one per whitelist, reused across
+    crops and across images.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr  # noqa: F401  (fail early if it is not installed)
+        self._local = threading.local()
+
+    def _api(self, digits_only):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(digits_only)
+        if api is None:
+            from tesserocr import OEM, PSM, PyTessBaseAPI
+
+            api = PyTessBaseAPI(psm=PSM.SINGLE_LINE, oem=OEM.DEFAULT)
+            if digits_only:
+                api.SetVariable("tessedit_char_whitelist", DIGITS)
+            apis[digits_only] = api
+        return api
+
+    def read(self, image, digits_only=False):
+        api = self._api(digits_only)
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+    def read_many(self, items):
+        return [self.read(image, digits_only) for image, digits_only in items]
+
+
+def _edge_fill(image):
+    # Pad with the crop's own background so the composite keeps its polarity.
+    pixels = list(image.crop((0, 0, image.width, 1)).getdata())
+    pixels += list(image.crop((0, image.height - 1, image.width, image.height)).getdata())
+    return sorted(pixels)[len(pixels) // 2]
+
+
+class CompositeEngine:
+    """
+    Tiles all crops that share a whitelist into one tall image, runs
+    tesseract once on it, and splits the recognised words back out by the
+    vertical band each crop occupies. One scoreboard therefore costs at most
+    two tesseract calls, whatever the number of regions.
+    """
+
+    name = "composite"
+    # read_many output depends on which crops are tiled together, so callers
+    # must not swap it for per-crop read calls.
+    batches = True
+
+    def __init__(self, gap=20):
+        self.gap = gap
+
+    def _compose(self, images):
+        from PIL import Image
+
+        padded = [ImageOps.expand(img, border=self.gap // 2, fill=_edge_fill(img)) for img in images]
+        width = max(img.width for img in padded)
+        height = sum(img.height for img in padded)
+        composite = Image.new("L", (width, height), 255)
+        bands = []
+        top = 0
+        for img in padded:
+            composite.paste(img, (0, top))
+            bands.append((top, top + img.height))
+            top += img.height
+        return composite, bands
+
+    def _words(self, composite, digits_only):
+        """Yield (text, left, center_y) for every recognised word."""
+        import pytesseract
+
+        config = '--psm 6 --oem 3'
+        if digits_only:
+            config += f' -c tessedit_char_whitelist={DIGITS}'
+        data = pytesseract.image_to_data(composite, config=config, output_type=pytesseract.Output.DICT)
+        for text, left, top, height in zip(data["text"], data["left"], data["top"], data["height"]):
+            if text.strip():
+                yield text, left, top + height / 2
+
+    def read(self, image, digits_only=False):
+        return self.read_many([(image, digits_only)])[0]
+
+    def read_many(self, items):
+        texts = [""] * len(items)
+        for digits_only in (False, True):
+            indices = [i for i, (_, d) in enumerate(items) if d == digits_only]
+            if not indices:
+                continue
+            composite, bands = self._compose([items[i][0].convert("L") for i in indices])
+            words = [[] for _ in indices]
+            for text, left, center_y in self._words(composite, digits_only):
+                for band, (top, bottom) in enumerate(bands):
+                    if top <= center_y < bottom:
+                        words[band].append((left, text))
+                        break
+            for band, i in enumerate(indices):
+                texts[i] = " ".join(text for _, text in sorted(words[band]))
+        return texts
+
+
+ENGINES = {
+    "pytesseract": PytesseractEngine,
+    "tesserocr": TesserocrEngine,
+    "composite": CompositeEngine,
+}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """
+    Return the process-wide OCR engine: OCR_ENGINE if set, otherwise
+    tesserocr when it is installed, falling back to pytesseract.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if OCR_ENGINE:
+                    _engine = ENGINES[OCR_ENGINE]()
+                else:
+                    try:
+                        _engine = TesserocrEngine()
+                    except ImportError:
+                        _engine = PytesseractEngine()
+    return _engine
+
+
+def benchmark(image_path, json_path, engines=tuple(ENGINES), runs=5):
+    """Time scoreboard extraction per image with each OCR engine on a saved workflow response."""
+    from Scoreboard import process_scoreboard
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        json_data = f.read()
+
+    for name in engines:
+        try:
+            engine = ENGINES[name]()
+        except ImportError as e:
+            print(f"{name}: unavailable ({e})")
+            continue
+        result = process_scoreboard(image_path, json_data, engine)  # warm up
+        start = time.perf_counter()
+        for _ in range(runs):
+            process_scoreboard(image_path, json_data, engine)
+        ms = (time.perf_counter() - start) * 1000 / runs
+        print(f"{name}: {ms:.1f} ms per scoreboard -> {result}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OCR engines on one scoreboard image.")
+    parser.add_argument("image", help="Scoreboard image.")
+    parser.add_argument("json", help="Saved custom-workflow-4 response for the image.")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per engine.")
+    args = parser.parse_args()
+    benchmark(args.image, args.json, args.engines, args.runs)
@@ -16,6 +16,9 @@ from sklearn.metrics import precision_score, recall_score
 from sklearn.model_selection import RandomizedSearchCV
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
+from play_model import save_bundle
+from play_training import make_search
+from training_data import load_training_data
 
 
 # In[2]:
@@ -27,95 +30,10 @@ pd.set_option('display.max_columns', None)
 # In[3]:
 
 
-df_big_data_bowl = pd.read_csv(r"C:\Users\davep\Downloads\plays.csv")
-df_nfl_verse = pd.read_csv(r"C:\Users\davep\Downloads\play_by_play_2022.csv")
-
-
-# In[4]:
-
-
-df_nfl_verse
-
-
-# In[5]:
-
-
-df_big_data_bowl
-
-
-# In[6]:
-
-
-df_big_data_bowl[(df_big_data_bowl["gameId"] == 2022102302) & (df_big_data_bowl["gameClock"] == "01:54")]
-
-
-# In[7]:
-
-
-pd.set_option('display.max_columns', None)
-#pd.set_option('display.max_rows', None)
-
-
-# In[8]:
-
-
-df_big_data_bowl = df_big_data_bowl[[
-    "quarter", "down", "yardsToGo", "possessionTeam",
-    "defensiveTeam", "yardlineNumber",
-    "preSnapHomeScore", "preSnapVisitorScore", 
-    "offenseFormation", "playClockAtSnap", "rushLocationType", "gameId", "playId"
-]]
-
-
-# In[9]:
-
-
-df_nfl_verse = df_nfl_verse[["home_team", "away_team", "quarter_seconds_remaining", 
-                            "down", "goal_to_go", "ydstogo", "play_type", "pass_length", "pass_location",
-                            "shotgun", "qb_dropback", "qb_kneel", "qb_spike", "qb_scramble", "run_location",
-                            "run_gap", "old_game_id", "play_id", "qtr", "posteam"]]
-
-
-# In[10]:
-
-
-merge_columns_big_data_bowl = ["gameId", "playId", "quarter", "down", "yardsToGo", "possessionTeam"]
-
-
-# In[11]:
-
-
-merge_columns_nfl_verse = ["old_game_id", "play_id", "qtr", "down", "ydstogo", "posteam"]
-
-
-# In[12]:
-
-
-merged = df_nfl_verse.merge(
-    df_big_data_bowl, 
-    left_on=merge_columns_nfl_verse, 
-    right_on=merge_columns_big_data_bowl, 
-    how="inner"
-)
-
-
-# In[13]:
-
-
-merged
-
-
-# In[14]:
-
-
-merged = merged[["down", "ydstogo", "play_type", "qtr", "yardlineNumber", "quarter_seconds_remaining", "offenseFormation", 
-                "playClockAtSnap"]]
-
-
-# In[15]:
-
-
-merged
+# Column-pruned, compactly typed and merged on the six play keys; cached as
+# Parquet keyed on the source files' hashes. Source paths come from
+# BDB_PLAYS_CSV and NFLVERSE_PBP_CSV (see training_data.py).
+merged = load_training_data()
 
 
 # In[16]:
@@ -131,18 +49,6 @@ for col in merged.columns:
 merged['offenseFormation'].value_counts()
 
 
-# In[18]:
-
-
-merged = merged.dropna(subset=["offenseFormation"])
-
-
-# In[19]:
-
-
-merged["playClockAtSnap"].fillna(merged["playClockAtSnap"].mean(), inplace=True)
-
-
 # In[20]:
 
 
@@ -296,6 +202,12 @@ random_search = RandomizedSearchCV(
     n_jobs=-1
 )
 
+# "halving" (successive halving) and "early-stopping" use hist trees and split the
+# cores between the search and XGBoost; `python play_training.py` compares them.
+SEARCH_MODE = "random"
+if SEARCH_MODE != "random":
+    random_search = make_search(SEARCH_MODE, param_grid, n_iter=30, verbose=2)
+
 
 # In[38]:
 
@@ -389,6 +301,19 @@ recall
 y_test.value_counts()
 
 
+# In[52]:
+
+
+# Everything play_model.PlayPredictor needs to score live snaps without retraining.
+save_bundle(
+    "play_model.joblib",
+    random_search.best_estimator_,
+    preprocessor,
+    label_encoder,
+    defaults={"playClockAtSnap": float(merged["playClockAtSnap"].mean())},
+)
+
+
 # # Formation Terminology
 
 # Worst case option: From nflverse, use qb_dropback booelan feature as a heuristic for yards between o line and qb. 
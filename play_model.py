@@ -0,0 +1,316 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+PLAY_MODEL_PATH = os.environ.get("PLAY_MODEL_PATH", "play_model.joblib")
+
+NUMERICAL_FEATURES = ["down", "ydstogo", "qtr", "yardlineNumber", "quarter_seconds_remaining", "playClockAtSnap",
+                      "total_seconds_remaining"]
+CATEGORICAL_FEATURES = ["offenseFormation"]
+
+
+def add_total_seconds_remaining(X):
+    """The derived clock feature the notebook adds before preprocessing."""
+    X["total_seconds_remaining"] = (4 - X["qtr"]) * 900 + X["quarter_seconds_remaining"]
+    return X
+
+
+def save_bundle(path, model, preprocessor, label_encoder, defaults=None,
+                numerical_features=NUMERICAL_FEATURES, categorical_features=CATEGORICAL_FEATURES):
+    """
+    Save everything needed to score new plays: the fitted XGBClassifier,
+    the fitted ColumnTransformer, the LabelEncoder, the feature lists and
+    fill-in values for inputs that may be missing at snap time (e.g. the
+    training mean of playClockAtSnap).
+    """
+    import joblib
+
+    joblib.dump({
+        "model": model,
+        "preprocessor": preprocessor,
+        "label_encoder": label_encoder,
+        "numerical_features": list(numerical_features),
+        "categorical_features": list(categorical_features),
+        "defaults": dict(defaults or {}),
+    }, path)
+
+
+class CompiledTrees:
+    """
+    A binary:logistic booster flattened into node arrays, so one row is
+    scored by stepping every tree down a level at a time with NumPy instead
+    of going through XGBoost's per-call setup, which dominates at batch
+    size one. Leaves point to themselves, so trees that finish early just
+    stay put until the deepest tree is done.
+    """
+
+    def __init__(self, booster, iteration_range=(0, 0)):
+        import json
+
+        trees = booster.trees_to_dataframe()
+        start, stop = iteration_range
+        selected = range(start, stop if stop else int(trees["Tree"].max()) + 1)
+        trees = trees[trees["Tree"].isin(selected)]
+
+        width = int(trees["Node"].max()) + 1
+        size = len(selected) * width
+        self.feature = np.zeros(size, dtype=np.intp)
+        self.threshold = np.zeros(size, dtype=np.float32)
+        self.value = np.zeros(size, dtype=np.float64)
+        self.yes = np.arange(size, dtype=np.intp)
+        self.no = np.arange(size, dtype=np.intp)
+        self.missing = np.arange(size, dtype=np.intp)
+        self.roots = np.arange(len(selected), dtype=np.intp) * width
+
+        names = booster.feature_names
+        index = {name: i for i, name in enumerate(names)} if names else {}
+        depth = {}
+        self.depth = 0
+        for tree, node, feature, split, yes, no, missing, gain in trees[
+                ["Tree", "Node", "Feature", "Split", "Yes", "No", "Missing", "Gain"]].itertuples(index=False):
+            base = (tree - start) * width
+            i = base + node
+            level = depth.get(i, 0)
+            self.depth = max(self.depth, level)
+            if feature == "Leaf":
+                self.value[i] = gain
+                continue
+            self.feature[i] = index[feature] if feature in index else int(feature[1:])
+            self.threshold[i] = split
+            for target, child in ((self.yes, yes), (self.no, no), (self.missing, missing)):
+                target[i] = base + int(child.split("-")[1])
+                depth[target[i]] = level + 1
+
+        base_score = json.loads(booster.save_config())["learner"]["learner_model_param"]["base_score"]
+        base_score = float(str(base_score).strip("[]"))
+        self.base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+    def predict(self, x):
+        """Probability of the positive class for one float32 feature row (NaN = missing)."""
+        idx = self.roots
+        has_missing = np.isnan(x).any()
+        for _ in range(self.depth):
+            value = x[self.feature[idx]]
+            step = np.where(value < self.threshold[idx], self.yes[idx], self.no[idx])
+            if has_missing:
+                step = np.where(np.isnan(value), self.missing[idx], step)
+            idx = step
+        margin = self.value[idx].sum() + self.base_margin
+        return 1.0 / (1.0 + np.exp(-margin))
+
+
+class PlayPredictor:
+    """
+    Scores run/pass for game situations from a saved bundle.
+
+    The ColumnTransformer is unrolled once at load time: MinMaxScaler
+    becomes `x * scale_ + min_` and the one-hot encoder becomes a category
+    to column lookup. Single plays are scored with the booster's trees
+    flattened into NumPy arrays (CompiledTrees); batches go straight to
+    the booster with inplace_predict. Neither path builds a DataFrame or
+    runs the transformer.
+    """
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.model = bundle["model"]
+        self.preprocessor = bundle["preprocessor"]
+        self.classes = np.asarray(bundle["label_encoder"].classes_)
+        self.numerical = bundle["numerical_features"]
+        self.categorical = bundle["categorical_features"]
+        self.defaults = bundle["defaults"]
+
+        scaler = self.preprocessor.named_transformers_["num"]
+        encoder = self.preprocessor.named_transformers_["cat"]
+        self.scale = scaler.scale_.astype(np.float64)
+        self.offset = scaler.min_.astype(np.float64)
+        self.categories = list(encoder.categories_[0])
+        self.column = {category: len(self.numerical) + i for i, category in enumerate(self.categories)}
+        self.width = len(self.numerical) + len(self.categories)
+        # XGBoost treats entries absent from a sparse training matrix as missing, not zero.
+        self.zero_is_missing = bool(getattr(self.preprocessor, "sparse_output_", False))
+
+        # One thread for single plays (no pool wake-up cost), all cores for batches.
+        self.booster = self.model.get_booster().copy()
+        self.booster.set_param({"nthread": 1})
+        self.batch_booster = self.model.get_booster().copy()
+        self.batch_booster.set_param({"nthread": 0})
+        best = getattr(self.model, "best_iteration", None)
+        self.iteration_range = (0, best + 1) if best is not None else (0, 0)
+        self._local = threading.local()
+
+        self.trees = None
+        if self.model.get_params().get("objective") == "binary:logistic":
+            self.trees = CompiledTrees(self.booster, self.iteration_range)
+            # Only use the flattened trees if they reproduce XGBoost on a sample of inputs.
+            sample = np.random.default_rng(0).random((64, self.width)).astype(np.float32)
+            expected = self.booster.inplace_predict(sample, iteration_range=self.iteration_range)
+            got = np.array([self.trees.predict(row) for row in sample])
+            if np.abs(got - expected).max() > 1e-5:
+                self.trees = None
+
+    @classmethod
+    def load(cls, path=PLAY_MODEL_PATH):
+        import joblib
+
+        return cls(joblib.load(path))
+
+    def _value(self, situation, name):
+        if name == "total_seconds_remaining":
+            return (4 - self._value(situation, "qtr")) * 900 + self._value(situation, "quarter_seconds_remaining")
+        value = situation.get(name)
+        if value is None or value != value:
+            value = self.defaults[name]
+        return float(value)
+
+    def _row(self, situation):
+        # One reusable row per thread; inplace_predict does not keep a reference to it.
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, self.width), dtype=np.float32)
+        raw = np.array([self._value(situation, name) for name in self.numerical])
+        row[0, :len(self.numerical)] = raw * self.scale + self.offset
+        row[0, len(self.numerical):] = 0.0
+        column = self.column.get(situation.get(self.categorical[0]))
+        if column is not None:
+            row[0, column] = 1.0
+        if self.zero_is_missing:
+            row[row == 0] = np.nan
+        return row
+
+    def predict_proba(self, situation):
+        """
+        Class probabilities for one situation, a dict with down, ydstogo,
+        qtr, yardlineNumber, quarter_seconds_remaining, offenseFormation
+        and optionally playClockAtSnap. Order follows `self.classes`.
+        """
+        row = self._row(situation)
+        if self.trees is not None:
+            p = float(self.trees.predict(row[0]))
+        else:
+            p = float(self.booster.inplace_predict(row, iteration_range=self.iteration_range)[0])
+        return np.array([1.0 - p, p])
+
+    def predict(self, situation):
+        """Predicted play type ("pass" or "run") and its probability."""
+        proba = self.predict_proba(situation)
+        best = int(proba[1] >= 0.5)
+        return str(self.classes[best]), float(proba[best])
+
+    def transform_batch(self, situations):
+        """Model input matrix for a DataFrame (or dict of columns) of situations."""
+        n = len(situations[self.categorical[0]])
+        raw = np.empty((n, len(self.numerical)), dtype=np.float64)
+        for j, name in enumerate(self.numerical):
+            if name == "total_seconds_remaining":
+                qtr = raw[:, self.numerical.index("qtr")]
+                clock = raw[:, self.numerical.index("quarter_seconds_remaining")]
+                raw[:, j] = (4 - qtr) * 900 + clock
+            elif name in situations:
+                values = np.asarray(situations[name], dtype=np.float64)
+                raw[:, j] = np.where(np.isnan(values), self.defaults.get(name, np.nan), values)
+            else:
+                raw[:, j] = self.defaults[name]
+
+        X = np.zeros((n, self.width), dtype=np.float32)
+        X[:, :len(self.numerical)] = raw * self.scale + self.offset
+        import pandas as pd
+
+        codes = pd.Categorical(np.asarray(situations[self.categorical[0]], dtype=object),
+                               categories=self.categories).codes.astype(np.intp)
+        known = codes >= 0
+        X[np.flatnonzero(known), len(self.numerical) + codes[known]] = 1.0
+        if self.zero_is_missing:
+            X[X == 0] = np.nan
+        return X
+
+    def predict_batch(self, situations):
+        """Vectorized predict: returns (labels, probabilities) with probabilities shaped (n, 2)."""
+        p = self.batch_booster.inplace_predict(self.transform_batch(situations),
+                                               iteration_range=self.iteration_range)
+        proba = np.column_stack([1.0 - p, p])
+        return self.classes[(p >= 0.5).astype(np.intp)], proba
+
+    def predict_reference(self, situations):
+        """The notebook's path (DataFrame, ColumnTransformer, predict_proba), for checking and timing."""
+        import pandas as pd
+
+        X = add_total_seconds_remaining(pd.DataFrame(situations).copy())
+        for name, value in self.defaults.items():
+            if name in X:
+                X[name] = X[name].fillna(value)
+        return self.model.predict_proba(self.preprocessor.transform(X))
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor():
+    """Return the process-wide PlayPredictor, loading PLAY_MODEL_PATH on first use."""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = PlayPredictor.load()
+    return _predictor
+
+
+def random_situations(predictor, n, seed=0):
+    """Plausible random situations covering the bundle's formations."""
+    rng = np.random.default_rng(seed)
+    return {
+        "down": rng.integers(1, 5, n),
+        "ydstogo": rng.integers(1, 21, n),
+        "qtr": rng.integers(1, 5, n),
+        "yardlineNumber": rng.integers(1, 51, n),
+        "quarter_seconds_remaining": rng.integers(0, 901, n).astype(np.float64),
+        "offenseFormation": rng.choice(np.array(predictor.categories, dtype=object), n),
+        "playClockAtSnap": rng.integers(0, 41, n).astype(np.float64),
+    }
+
+
+def benchmark(path=PLAY_MODEL_PATH, plays=2000, batch=10000):
+    """Time single-play and batch scoring against the DataFrame + ColumnTransformer path."""
+    import pandas as pd
+
+    predictor = PlayPredictor.load(path)
+    columns = random_situations(predictor, max(plays, batch))
+    frame = pd.DataFrame(columns)
+    singles = frame.iloc[:plays].to_dict("records")
+
+    predictor.predict(singles[0])
+    start = time.perf_counter()
+    fast = [predictor.predict_proba(s)[1] for s in singles]
+    fast_us = (time.perf_counter() - start) * 1e6 / plays
+
+    start = time.perf_counter()
+    reference = [predictor.predict_reference([s])[0, 1] for s in singles[:200]]
+    reference_us = (time.perf_counter() - start) * 1e6 / 200
+    single_diff = np.abs(np.array(fast[:200]) - np.array(reference)).max()
+
+    big = frame.iloc[:batch]
+    start = time.perf_counter()
+    _, proba = predictor.predict_batch(big)
+    batch_us = (time.perf_counter() - start) * 1e6 / batch
+    start = time.perf_counter()
+    reference_proba = predictor.predict_reference(big)
+    reference_batch_us = (time.perf_counter() - start) * 1e6 / batch
+    batch_diff = np.abs(proba - reference_proba).max()
+
+    print(f"single play: {fast_us:.1f} us predictor vs {reference_us:.1f} us DataFrame path "
+          f"(max probability difference {single_diff:.2e})")
+    print(f"batch of {batch}: {batch_us:.2f} us/play predictor vs {reference_batch_us:.2f} us/play DataFrame path "
+          f"(max probability difference {batch_diff:.2e})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the saved play-type predictor.")
+    parser.add_argument("--model", default=PLAY_MODEL_PATH, help="Saved model bundle.")
+    parser.add_argument("--plays", type=int, default=2000, help="Single plays to time.")
+    parser.add_argument("--batch", type=int, default=10000, help="Batch size to time.")
+    args = parser.parse_args()
+    benchmark(args.model, args.plays, args.batch)
@@ -0,0 +1,206 @@
+import argparse
+import io
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from Scoreboard import OCR_WORKERS, read_scoreboard
+from detector_backends import get_detector
+from formation_features import frame_features
+from full_formation import POSITIONS, get_class_counts_and_positions
+from image_inference import classify_formation
+from play_model import get_predictor
+
+FORMATION_WORKFLOW = "custom-workflow-3"
+SCOREBOARD_WORKFLOW = "custom-workflow-4"
+# Model inputs that have no training default and must come from the scoreboard.
+REQUIRED_FEATURES = ["down", "ydstogo", "qtr", "yardlineNumber", "quarter_seconds_remaining"]
+
+
+def parse_clock(text):
+    """Seconds in a "mm:ss" or plain-seconds clock reading; None if it does not parse."""
+    match = re.fullmatch(r"\s*(?:(\d{1,2}):)?(\d{1,2})\s*", text or "")
+    if not match:
+        return None
+    minutes, seconds = match.groups()
+    return int(minutes or 0) * 60 + int(seconds)
+
+
+def parse_down(text, yardline=None):
+    """(down, yards to go) from a cleaned Down field such as "3Rd & 7"; "& Goal" uses the yard line."""
+    match = re.match(r"\s*([1-4])(?:st|nd|rd|th)?(.*)", text or "", re.IGNORECASE)
+    if not match:
+        return None, None
+    down, rest = int(match.group(1)), match.group(2)
+    # Cleaning turns "Goal" into something like "G0A1", so check for it before digits.
+    if re.search(r"g[0o]", rest, re.IGNORECASE):
+        return down, yardline
+    distance = re.search(r"\d+", rest)
+    return down, int(distance.group()) if distance else None
+
+
+def parse_quarter(text):
+    """Quarter number from a cleaned Quarter field ("2nd Quarter" -> 2, overtime -> 5)."""
+    if re.search(r"[0O]T", text or "", re.IGNORECASE):
+        return 5
+    match = re.search(r"[1-4]", text or "")
+    return int(match.group()) if match else None
+
+
+def _first(values):
+    if isinstance(values, str):
+        return values
+    return values[0] if values else None
+
+
+def situation_features(scoreboard, formation, clock_field="Clock"):
+    """
+    Map scoreboard fields and a formation to the play model's inputs.
+    PlayTime (the game clock) becomes quarter_seconds_remaining, the
+    play clock becomes playClockAtSnap when it reads 0-40, and the first
+    YardNumber between 1 and 50 is taken as the line of scrimmage.
+    Returns (situation, missing) where `missing` lists required inputs
+    the scoreboard did not provide.
+    """
+    yardlines = [int(v) for v in scoreboard.get("YardNumber", []) if v.isdigit() and 1 <= int(v) <= 50]
+    yardline = yardlines[0] if yardlines else None
+    down, distance = parse_down(_first(scoreboard.get("Down")), yardline)
+    play_clock = parse_clock(_first(scoreboard.get(clock_field)))
+    situation = {
+        "down": down,
+        "ydstogo": distance,
+        "qtr": parse_quarter(_first(scoreboard.get("Quarter"))),
+        "yardlineNumber": yardline,
+        "quarter_seconds_remaining": parse_clock(_first(scoreboard.get("PlayTime"))),
+        "offenseFormation": formation,
+        "playClockAtSnap": play_clock if play_clock is not None and play_clock <= 40 else None,
+    }
+    return situation, [name for name in REQUIRED_FEATURES if situation[name] is None]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # One thread per workflow, kept for the life of the process.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=2)
+        return _pool
+
+
+def _formation_stage(detector, source, timings):
+    start = time.perf_counter()
+    result = detector.run_workflow(source, workflow_id=FORMATION_WORKFLOW)
+    timings["workflow3"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    class_counts, positions = get_class_counts_and_positions(result)
+    counts = [class_counts.get(pos, 0) for pos in POSITIONS]
+    formation = {"formation": classify_formation(*counts), "counts": dict(zip(POSITIONS, counts)),
+                 "geometry": frame_features(positions)}
+    timings["formation"] = time.perf_counter() - start
+    return formation
+
+
+def _scoreboard_stage(detector, source, image, engine, workers, timings):
+    start = time.perf_counter()
+    result = detector.run_workflow(source, workflow_id=SCOREBOARD_WORKFLOW)
+    timings["workflow4"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scoreboard = read_scoreboard(image, result, engine, workers)
+    timings["ocr"] = time.perf_counter() - start
+    return scoreboard
+
+
+def analyze_play(image_path, detector=None, engine=None, predictor=None, concurrent=True, workers=OCR_WORKERS):
+    """
+    Formation, scoreboard and run/pass prediction for one broadcast frame.
+
+    The file is read and decoded once; both workflows get the same bytes
+    (or the decoded frame, for the local ONNX backend) and, with
+    `concurrent`, run at the same time, each followed by its own
+    post-processing. Returns a dict with the formation, position counts,
+    geometry, scoreboard fields, model features, prediction (None when a
+    required feature is missing) and per-stage timings in milliseconds.
+    """
+    detector = detector or get_detector()
+    timings = {}
+    total_start = start = time.perf_counter()
+    with open(image_path, "rb") as f:
+        data = f.read()
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    source = data
+    if getattr(detector, "name", None) == "onnx":
+        source = np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrent:
+        formation_future = _get_pool().submit(_formation_stage, detector, source, timings)
+        scoreboard_future = _get_pool().submit(_scoreboard_stage, detector, source, image, engine, workers,
+                                               timings)
+        formation, scoreboard = formation_future.result(), scoreboard_future.result()
+    else:
+        formation = _formation_stage(detector, source, timings)
+        scoreboard = _scoreboard_stage(detector, source, image, engine, workers, timings)
+    timings["detect_and_read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    situation, missing = situation_features(scoreboard, formation["formation"])
+    prediction = None
+    if not missing:
+        predictor = predictor or get_predictor()
+        proba = predictor.predict_proba(situation)
+        best = int(proba[1] >= 0.5)
+        prediction = {"play_type": str(predictor.classes[best]), "probability": float(proba[best]),
+                      "probabilities": {str(c): float(p) for c, p in zip(predictor.classes, proba)}}
+    timings["predict"] = time.perf_counter() - start
+    timings["total"] = time.perf_counter() - total_start
+
+    return dict(formation, scoreboard=scoreboard, features=situation, missing=missing, prediction=prediction,
+                timings_ms={stage: round(seconds * 1000, 2) for stage, seconds in timings.items()})
+
+
+def compare(image_path, runs=5, workers=OCR_WORKERS):
+    """Mean per-stage timings for sequential and concurrent runs, checking both give the same answer."""
+    analyze_play(image_path, workers=workers)  # load the detector, OCR engine and model first
+    results, means = {}, {}
+    for concurrent in (False, True):
+        samples = []
+        for _ in range(runs):
+            result = analyze_play(image_path, concurrent=concurrent, workers=workers)
+            samples.append(result.pop("timings_ms"))
+        results[concurrent] = result
+        means[concurrent] = {stage: sum(s[stage] for s in samples) / runs for stage in samples[0]}
+
+    print(f"{'stage':<16}{'sequential ms':>14}{'concurrent ms':>15}")
+    for stage in means[False]:
+        print(f"{stage:<16}{means[False][stage]:>14.1f}{means[True][stage]:>15.1f}")
+    if results[False] != results[True]:
+        print("MISMATCH between sequential and concurrent results")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Formation, scoreboard and run/pass prediction for one frame.")
+    parser.add_argument("image", help="Path to the input image.")
+    parser.add_argument("--sequential", action="store_true", help="Run the two workflows one after the other.")
+    parser.add_argument("--workers", type=int, default=OCR_WORKERS, help="Threads for scoreboard region OCR.")
+    parser.add_argument("--compare", type=int, metavar="RUNS",
+                        help="Time sequential against concurrent over RUNS runs each.")
+    args = parser.parse_args()
+
+    if args.compare:
+        raise SystemExit(0 if compare(args.image, args.compare, args.workers) else 1)
+    print(json.dumps(analyze_play(args.image, concurrent=not args.sequential, workers=args.workers), indent=2))
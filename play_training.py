@@ -0,0 +1,330 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterSampler, RandomizedSearchCV, train_test_split
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, OneHotEncoder
+from xgboost import XGBClassifier
+
+from play_model import (CATEGORICAL_FEATURES, NUMERICAL_FEATURES, PLAY_MODEL_PATH, add_total_seconds_remaining,
+                        save_bundle)
+
+PARAM_GRID = {
+    'n_estimators': np.arange(100, 500, 50),
+    'max_depth': np.arange(3, 10, 1),
+    'learning_rate': np.linspace(0.01, 0.3, 10),
+    'subsample': np.linspace(0.5, 1.0, 5),
+    'colsample_bytree': np.linspace(0.5, 1.0, 5),
+    'gamma': np.linspace(0, 5, 5),
+    'reg_alpha': np.logspace(-3, 1, 5),
+    'reg_lambda': np.logspace(-3, 1, 5)
+}
+SEARCH_MODES = ["random", "halving", "early-stopping"]
+
+
+def make_preprocessor():
+    """The notebook's ColumnTransformer: min-max scaled numbers, one-hot formation."""
+    return ColumnTransformer(
+        transformers=[
+            ("num", MinMaxScaler(), NUMERICAL_FEATURES),
+            ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=True), CATEGORICAL_FEATURES)
+        ]
+    )
+
+
+def split_target(rows):
+    """Features (with total_seconds_remaining added) and play_type labels of a training table."""
+    return add_total_seconds_remaining(rows.drop(columns=["play_type"]).copy()), rows["play_type"]
+
+
+def prepare_features(merged, test_size=0.2, random_state=42):
+    """
+    The notebook's split and preprocessing: returns X_train, X_test,
+    y_train and y_test (label-encoded), the fitted preprocessor and the
+    label encoder.
+    """
+    X, y = split_target(merged)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    preprocessor = make_preprocessor()
+    X_train = preprocessor.fit_transform(X_train)
+    X_test = preprocessor.transform(X_test)
+
+    label_encoder = LabelEncoder()
+    return (X_train, X_test, label_encoder.fit_transform(y_train), label_encoder.transform(y_test),
+            preprocessor, label_encoder)
+
+
+def split_threads(search_jobs=None, cores=None):
+    """
+    Divide the cores between concurrent candidate fits and XGBoost's own
+    threads, so search_jobs * model_threads never exceeds the core count.
+    Returns (search_jobs, model_threads).
+    """
+    cores = cores or os.cpu_count() or 1
+    search_jobs = max(1, min(search_jobs or max(1, cores // 2), cores))
+    return search_jobs, max(1, cores // search_jobs)
+
+
+class EarlyStoppingSearch:
+    """
+    Random search where each candidate trains on one split with early
+    stopping against a held-out validation set, instead of fitting every
+    fold to its full n_estimators. The best candidate is refit on all the
+    data with the number of rounds it actually used. Exposes the
+    best_estimator_, best_params_ and best_score_ of a scikit-learn search.
+    """
+
+    def __init__(self, param_distributions, n_iter=30, validation_size=0.2, early_stopping_rounds=20,
+                 search_jobs=None, random_state=42, verbose=0):
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.validation_size = validation_size
+        self.early_stopping_rounds = early_stopping_rounds
+        self.search_jobs, self.model_threads = split_threads(search_jobs)
+        self.random_state = random_state
+        self.verbose = verbose
+
+    def _fit_candidate(self, params, X_fit, y_fit, X_val, y_val):
+        model = XGBClassifier(objective='binary:logistic', random_state=self.random_state, tree_method="hist",
+                              n_jobs=self.model_threads, early_stopping_rounds=self.early_stopping_rounds,
+                              **params)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        score = f1_score(y_val, model.predict(X_val))
+        if self.verbose:
+            print(f"f1={score:.4f} rounds={model.best_iteration + 1} {params}")
+        return score, model.best_iteration + 1
+
+    def fit(self, X, y):
+        from joblib import Parallel, delayed
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X, y, test_size=self.validation_size, random_state=self.random_state, stratify=y)
+        candidates = list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+        results = Parallel(n_jobs=self.search_jobs, prefer="threads")(
+            delayed(self._fit_candidate)(params, X_fit, y_fit, X_val, y_val) for params in candidates)
+
+        best = int(np.argmax([score for score, _ in results]))
+        self.best_score_, rounds = results[best]
+        self.best_params_ = dict(candidates[best], n_estimators=rounds)
+        self.best_estimator_ = XGBClassifier(objective='binary:logistic', random_state=self.random_state,
+                                             tree_method="hist", n_jobs=self.search_jobs * self.model_threads,
+                                             **self.best_params_)
+        self.best_estimator_.fit(X, y)
+        return self
+
+
+def make_search(mode="random", param_distributions=PARAM_GRID, n_iter=30, search_jobs=None, verbose=0):
+    """
+    Build the hyperparameter search for the play model.
+
+    "random" is the notebook's RandomizedSearchCV: 5-fold, default tree
+    method, n_jobs=-1 for the search on top of XGBoost's own threads.
+    "halving" runs the same candidates through successive halving on the
+    number of training rows with the hist tree method. "early-stopping"
+    is EarlyStoppingSearch. The last two split the cores between the
+    search and XGBoost (see split_threads).
+    """
+    if mode == "random":
+        xgb = XGBClassifier(objective='binary:logistic', random_state=42)
+        return RandomizedSearchCV(estimator=xgb, param_distributions=param_distributions, n_iter=n_iter,
+                                  scoring='f1', cv=5, verbose=verbose, n_jobs=-1)
+
+    if mode == "halving":
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingRandomSearchCV
+
+        jobs, threads = split_threads(search_jobs)
+        xgb = XGBClassifier(objective='binary:logistic', random_state=42, tree_method="hist", n_jobs=threads)
+        return HalvingRandomSearchCV(estimator=xgb, param_distributions=param_distributions, n_candidates=n_iter,
+                                     factor=3, min_resources="exhaust", scoring='f1', cv=5, verbose=verbose,
+                                     n_jobs=jobs, random_state=42)
+
+    if mode == "early-stopping":
+        return EarlyStoppingSearch(param_distributions, n_iter=n_iter, search_jobs=search_jobs, verbose=verbose)
+
+    raise ValueError(f"Unknown search mode: {mode}")
+
+
+def compare(merged, modes=SEARCH_MODES, n_iter=30, search_jobs=None):
+    """Run each search mode on the notebook's split and report wall time, CV F1 and test F1."""
+    X_train, X_test, y_train, y_test, _, _ = prepare_features(merged)
+    jobs, threads = split_threads(search_jobs)
+    print(f"{X_train.shape[0]} training rows, {os.cpu_count()} cores "
+          f"(halving/early-stopping: {jobs} concurrent fits x {threads} XGBoost threads)")
+    for mode in modes:
+        search = make_search(mode, n_iter=n_iter, search_jobs=search_jobs)
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        elapsed = time.perf_counter() - start
+        test_f1 = f1_score(y_test, search.best_estimator_.predict(X_test))
+        print(f"{mode}: {elapsed:.1f}s, best search F1 {search.best_score_:.4f}, test F1 {test_f1:.4f}")
+
+
+def transform_new_rows(bundle, rows):
+    """
+    Run new plays through a bundle's fitted preprocessor and label encoder
+    without refitting either. Returns (X, y, drift), where drift counts the
+    rows the frozen preprocessor cannot fully represent: numbers outside the
+    scaler's training range and formations the encoder has never seen
+    (those rows get an all-zero formation encoding). A play type the label
+    encoder has not seen raises ValueError.
+    """
+    X, y = split_target(rows)
+    preprocessor = bundle["preprocessor"]
+    scaler = preprocessor.named_transformers_["num"]
+    encoder = preprocessor.named_transformers_["cat"]
+
+    values = X[bundle["numerical_features"]].to_numpy(dtype=np.float64, na_value=np.nan)
+    out_of_range = ((values < scaler.data_min_) | (values > scaler.data_max_)).any(axis=1)
+    formations = X[bundle["categorical_features"][0]]
+    unseen = formations.notna().to_numpy() & ~formations.isin(encoder.categories_[0]).to_numpy()
+    drift = {"rows": len(X), "out_of_range": int(out_of_range.sum()), "unseen_category": int(unseen.sum()),
+             "drifted": int((out_of_range | unseen).sum())}
+    return preprocessor.transform(X), bundle["label_encoder"].transform(y), drift
+
+
+def continue_training(model, X, y, rounds=50):
+    """
+    Add `rounds` boosting rounds to a fitted XGBClassifier using only
+    (X, y), keeping its hyperparameters. If the model was early-stopped,
+    boosting continues from its best iteration.
+    """
+    booster = model.get_booster()
+    best = getattr(model, "best_iteration", None)
+    if best is not None:
+        booster = booster[:best + 1]
+    params = dict(model.get_params(), n_estimators=rounds, early_stopping_rounds=None)
+    updated = XGBClassifier(**params)
+    updated.fit(X, y, xgb_model=booster)
+    return updated
+
+
+def train_bundle(merged, mode="random", n_iter=30, search_jobs=None):
+    """
+    The notebook's full training path: refit the preprocessor and run the
+    search on the training split. Returns (bundle, test F1).
+    """
+    X_train, X_test, y_train, y_test, preprocessor, label_encoder = prepare_features(merged)
+    search = make_search(mode, n_iter=n_iter, search_jobs=search_jobs)
+    search.fit(X_train, y_train)
+    model = search.best_estimator_
+    bundle = {
+        "model": model,
+        "preprocessor": preprocessor,
+        "label_encoder": label_encoder,
+        "numerical_features": NUMERICAL_FEATURES,
+        "categorical_features": CATEGORICAL_FEATURES,
+        "defaults": {"playClockAtSnap": float(merged["playClockAtSnap"].mean())},
+    }
+    return bundle, f1_score(y_test, model.predict(X_test))
+
+
+def update_model(path, new_rows, load_all_rows=None, rounds=50, max_drift=0.05, full_retrain=False, mode="random",
+                 n_iter=30, search_jobs=None):
+    """
+    Bring the bundle at `path` up to date with `new_rows` and save it in
+    place. By default the saved model keeps boosting on the new rows only
+    through its frozen preprocessor. A full retrain on the table returned
+    by `load_all_rows()` (old and new plays) runs instead when `full_retrain` is set, when no bundle
+    exists yet, or when more than `max_drift` of the new rows fall outside
+    what the frozen preprocessor was fitted on.
+    """
+    import joblib
+
+    start = time.perf_counter()
+    if not full_retrain and os.path.exists(path):
+        bundle = joblib.load(path)
+        X, y, drift = transform_new_rows(bundle, new_rows)
+        share = drift["drifted"] / max(drift["rows"], 1)
+        print(f"{drift['rows']} new rows: {drift['out_of_range']} outside the scaler range, "
+              f"{drift['unseen_category']} with unseen formations")
+        if share <= max_drift:
+            bundle["model"] = continue_training(bundle["model"], X, y, rounds)
+            save_bundle(path, **bundle)
+            print(f"Incremental update: +{rounds} rounds in {time.perf_counter() - start:.1f}s, saved {path}")
+            return bundle
+        print(f"{share:.1%} of the new rows drifted (limit {max_drift:.1%}), falling back to a full retrain")
+        full_retrain = True
+
+    if load_all_rows is None:
+        raise ValueError("a full retrain needs the complete training table")
+    bundle, test_f1 = train_bundle(load_all_rows(), mode, n_iter, search_jobs)
+    save_bundle(path, **bundle)
+    print(f"Full retrain ({mode}, {n_iter} candidates) in {time.perf_counter() - start:.1f}s, "
+          f"test F1 {test_f1:.4f}, saved {path}")
+    return bundle
+
+
+def compare_update(merged, new_fraction=0.1, rounds=50, mode="random", n_iter=30, search_jobs=None):
+    """
+    Hold out the notebook's 20% test split, train a base model on the
+    older part of the rest, then bring it up to date with the newest
+    `new_fraction` of the rows both incrementally and by a full retrain,
+    reporting wall time and test F1 for each.
+    """
+    train, test = train_test_split(merged, test_size=0.2, random_state=42)
+    train = train.sort_index()
+    cut = int(len(train) * (1 - new_fraction))
+    old, new = train.iloc[:cut], train.iloc[cut:]
+    X_test, y_test = split_target(test)
+
+    def test_f1(bundle):
+        y_pred = bundle["model"].predict(bundle["preprocessor"].transform(X_test))
+        return f1_score(bundle["label_encoder"].transform(y_test), y_pred)
+
+    print(f"{len(old)} old rows, {len(new)} new rows, {len(test)} test rows")
+    start = time.perf_counter()
+    base, _ = train_bundle(old, mode, n_iter, search_jobs)
+    print(f"base ({mode} on old rows): {time.perf_counter() - start:.1f}s, test F1 {test_f1(base):.4f}")
+
+    start = time.perf_counter()
+    X_new, y_new, drift = transform_new_rows(base, new)
+    incremental = dict(base, model=continue_training(base["model"], X_new, y_new, rounds))
+    print(f"incremental (+{rounds} rounds on new rows): {time.perf_counter() - start:.1f}s, "
+          f"test F1 {test_f1(incremental):.4f} ({drift['drifted']} drifted rows)")
+
+    start = time.perf_counter()
+    full, _ = train_bundle(pd.concat([old, new]), mode, n_iter, search_jobs)
+    print(f"full retrain ({mode} on all rows): {time.perf_counter() - start:.1f}s, test F1 {test_f1(full):.4f}")
+
+
+if __name__ == "__main__":
+    from training_data import BDB_PLAYS_CSV, NFLVERSE_PBP_CSV, load_training_data
+
+    parser = argparse.ArgumentParser(description="Train, update or compare search modes for the play model.")
+    parser.add_argument("--plays", default=BDB_PLAYS_CSV, help="Big Data Bowl plays.csv.")
+    parser.add_argument("--pbp", default=NFLVERSE_PBP_CSV, help="nflverse play_by_play CSV.")
+    parser.add_argument("--modes", nargs="+", default=SEARCH_MODES, choices=SEARCH_MODES)
+    parser.add_argument("--n-iter", type=int, default=30, help="Candidates per search.")
+    parser.add_argument("--search-jobs", type=int, help="Concurrent candidate fits (default: half the cores).")
+    parser.add_argument("--update", metavar="NEW_PLAYS",
+                        help="Update --model with the plays in this plays.csv (joined with --pbp).")
+    parser.add_argument("--compare-update", action="store_true",
+                        help="Compare incremental updates with full retrains on a held-out split of --plays.")
+    parser.add_argument("--model", default=PLAY_MODEL_PATH, help="Model bundle to update.")
+    parser.add_argument("--rounds", type=int, default=50, help="Boosting rounds added per incremental update.")
+    parser.add_argument("--max-drift", type=float, default=0.05,
+                        help="Share of new rows outside the fitted preprocessor that forces a full retrain.")
+    parser.add_argument("--full-retrain", action="store_true",
+                        help="With --update: refit the preprocessor and rerun the search on all plays.")
+    parser.add_argument("--new-fraction", type=float, default=0.1,
+                        help="With --compare-update: share of the training rows treated as new.")
+    args = parser.parse_args()
+
+    mode = args.modes[0]
+    if args.update:
+        new_rows = load_training_data(args.update, args.pbp)
+        update_model(args.model, new_rows,
+                     lambda: pd.concat([load_training_data(args.plays, args.pbp), new_rows], ignore_index=True),
+                     args.rounds, args.max_drift, args.full_retrain, mode,
+                     args.n_iter, args.search_jobs)
+    elif args.compare_update:
+        compare_update(load_training_data(args.plays, args.pbp), args.new_fraction, args.rounds, mode, args.n_iter,
+                       args.search_jobs)
+    else:
+        compare(load_training_data(args.plays, args.pbp), args.modes, args.n_iter, args.search_jobs)
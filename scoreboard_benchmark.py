@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from PIL import Image
+
+from Scoreboard import crop_region, merge_regions, ocr_regions, preprocess_region
+from batch_io import IMAGE_EXTENSIONS
+from ocr_engine import ENGINES, get_ocr_engine
+
+STAGES = ["load", "crop", "preprocess", "ocr", "clean"]
+
+
+def load_corpus(corpus):
+    """
+    Yield (name, image_path, json_data, labels) for each sample in a corpus
+    directory. A sample is an image plus a saved custom-workflow-4 response
+    next to it (frame_001.jpg + frame_001.json). Ground truth lives in
+    labels.json as {"frame_001": {"Score": "7, 3", "Quarter": ["2nd Quarter"], ...}};
+    unlabeled samples are still timed.
+    """
+    labels_path = os.path.join(corpus, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    for name in sorted(os.listdir(corpus)):
+        stem, ext = os.path.splitext(name)
+        json_path = os.path.join(corpus, stem + ".json")
+        if ext.lower() not in IMAGE_EXTENSIONS or not os.path.exists(json_path):
+            continue
+        with open(json_path, "r", encoding="utf-8") as f:
+            yield stem, os.path.join(corpus, name), f.read(), labels.get(stem)
+
+
+def run_sample(image_path, json_data, engine, timings):
+    """process_scoreboard, split into stages; adds seconds per stage to `timings`."""
+    start = time.perf_counter()
+    image = Image.open(image_path)
+    image.load()
+    data = json.loads(json_data)[0]["model_predictions"]
+    detections = [d for d in data["predictions"] if d["class"] != "SB"]
+    now = time.perf_counter()
+    timings["load"] += now - start
+
+    start = now
+    crops = [crop_region(image, detection) for detection in detections]
+    now = time.perf_counter()
+    timings["crop"] += now - start
+
+    start = now
+    crops = [preprocess_region(cropped) for cropped in crops]
+    now = time.perf_counter()
+    timings["preprocess"] += now - start
+
+    start = now
+    # The production batch path: digit recognizer first, then one engine.read_many call.
+    regions = list(zip(detections, crops))
+    texts = ocr_regions(regions, engine)
+    now = time.perf_counter()
+    timings["ocr"] += now - start
+
+    start = now
+    final = merge_regions(regions, texts, data["image"]["width"])
+    timings["clean"] += time.perf_counter() - start
+    return final
+
+
+def benchmark(corpus, engine=None, runs=1):
+    """Replay the corpus `runs` times and return the report dict."""
+    engine = engine or get_ocr_engine()
+    samples = list(load_corpus(corpus))
+    if not samples:
+        raise SystemExit(f"No samples (image + .json) found in {corpus}")
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    correct, total = {}, {}
+    mismatches = []
+    start = time.perf_counter()
+    for run in range(runs):
+        for name, image_path, json_data, expected in samples:
+            result = run_sample(image_path, json_data, engine, timings)
+            if run or not expected:
+                continue
+            for field, value in expected.items():
+                got = result.get(field, "" if field == "Score" else [])
+                total[field] = total.get(field, 0) + 1
+                if got == value:
+                    correct[field] = correct.get(field, 0) + 1
+                else:
+                    mismatches.append({"sample": name, "field": field, "expected": value, "got": got})
+    elapsed = time.perf_counter() - start
+
+    n = len(samples) * runs
+    checked = sum(total.values())
+    return {
+        "corpus": os.path.abspath(corpus),
+        "engine": engine.name,
+        "samples": len(samples),
+        "runs": runs,
+        "stage_ms": {stage: round(seconds / n * 1000, 3) for stage, seconds in timings.items()},
+        "ms_per_image": round(elapsed / n * 1000, 3),
+        "images_per_second": round(n / elapsed, 3),
+        "accuracy": round(sum(correct.values()) / checked, 4) if checked else None,
+        "field_accuracy": {field: round(correct.get(field, 0) / count, 4) for field, count in sorted(total.items())},
+        "mismatches": mismatches,
+    }
+
+
+def compare(report, baseline, max_slowdown=0.10, max_accuracy_drop=0.0):
+    """Return a list of regressions of `report` against `baseline`."""
+    failures = []
+    if report["images_per_second"] < baseline["images_per_second"] * (1 - max_slowdown):
+        failures.append(f"throughput {report['images_per_second']} images/s is more than "
+                        f"{max_slowdown:.0%} below baseline {baseline['images_per_second']}")
+    if report["accuracy"] is not None and baseline.get("accuracy") is not None:
+        if report["accuracy"] < baseline["accuracy"] - max_accuracy_drop:
+            failures.append(f"accuracy {report['accuracy']:.2%} is below baseline {baseline['accuracy']:.2%}")
+        for field, accuracy in baseline.get("field_accuracy", {}).items():
+            now = report["field_accuracy"].get(field)
+            if now is not None and now < accuracy - max_accuracy_drop:
+                failures.append(f"{field} accuracy {now:.2%} is below baseline {accuracy:.2%}")
+    return failures
+
+
+def print_report(report):
+    stages = ", ".join(f"{stage} {ms:.2f}" for stage, ms in report["stage_ms"].items())
+    print(f"{report['samples']} samples x {report['runs']} runs with {report['engine']}: "
+          f"{report['ms_per_image']:.1f} ms/image ({report['images_per_second']:.1f} images/s)")
+    print(f"Stage ms/image: {stages}")
+    if report["accuracy"] is not None:
+        fields = ", ".join(f"{field} {acc:.1%}" for field, acc in report["field_accuracy"].items())
+        print(f"Field accuracy {report['accuracy']:.1%} ({fields}); {len(report['mismatches'])} mismatches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoreboard extraction on a saved corpus.")
+    parser.add_argument("corpus", help="Directory of images, saved workflow-4 JSON and labels.json.")
+    parser.add_argument("--output", default="scoreboard_report.json", help="Where to write the JSON report.")
+    parser.add_argument("--engine", choices=list(ENGINES), help="OCR engine (default: OCR_ENGINE or best available).")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the corpus for timing.")
+    parser.add_argument("--baseline", help="Earlier report to check for regressions against.")
+    parser.add_argument("--max-slowdown", type=float, default=0.10,
+                        help="Allowed throughput drop versus the baseline, as a fraction.")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0,
+                        help="Allowed accuracy drop versus the baseline, as a fraction.")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = benchmark(args.corpus, ENGINES[args.engine]() if args.engine else None, args.runs)
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.output}")
+
+    if baseline is not None:
+        failures = compare(report, baseline, args.max_slowdown, args.max_accuracy_drop)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,148 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from Scoreboard import merge_regions, prepare_region, read_region, region_bounds
+from detector_backends import get_detector
+from ocr_engine import get_ocr_engine
+
+TIMELINE_FIELDS = ["Score", "Quarter", "Down", "PlayTime", "Clock"]
+
+
+def _thumbnail(gray, width=64):
+    h, w = gray.shape
+    return cv2.resize(gray, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class ScoreboardTracker:
+    """
+    Follows one scoreboard through a video. Regions come from a single
+    custom-workflow-4 detection per shot; after that each frame only costs
+    a small per-region fingerprint, and a region is re-OCRed only when its
+    fingerprint drifts from the one it had when last read.
+    """
+
+    def __init__(self, engine=None, detector=None, change_threshold=3.0, shot_threshold=30.0,
+                 retry_frames=30):
+        self.engine = engine or get_ocr_engine()
+        self.detector = detector or get_detector()
+        self.change_threshold = change_threshold
+        self.shot_threshold = shot_threshold
+        self.retry_frames = retry_frames
+
+        self.regions = []          # detections, excluding SB
+        self.fingerprints = []     # fingerprint when each region was last OCRed
+        self.texts = []            # raw OCR text per region
+        self.fields = {}
+        self.img_width = 0
+        self.last_thumb = None
+        self.last_detect = None
+
+        self.detector_calls = 0
+        self.ocr_calls = 0
+        self.region_checks = 0
+
+    def _detect(self, frame, frame_count):
+        self.detector_calls += 1
+        self.last_detect = frame_count
+        data = self.detector.run_workflow(frame, workflow_id="custom-workflow-4")[0]["model_predictions"]
+        self.img_width = data["image"]["width"]
+        self.regions = [d for d in data["predictions"] if d["class"] != "SB"]
+        self.fingerprints = [None] * len(self.regions)
+        self.texts = [""] * len(self.regions)
+        self.fields = {}
+
+    def _fingerprint(self, gray, detection):
+        # The region prepare_region crops, as integer pixel indices.
+        left, top, right, bottom = (int(v) for v in region_bounds(detection, gray.shape[1], gray.shape[0]))
+        crop = gray[top:bottom, left:right]
+        if crop.size == 0:
+            return np.zeros((16, 32), dtype=np.int16)
+        return cv2.resize(crop, (32, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def update(self, frame, frame_count):
+        """Process one BGR frame; returns the merged scoreboard fields."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = _thumbnail(gray)
+        shot_change = (self.last_thumb is not None and
+                       np.abs(thumb - self.last_thumb).mean() > self.shot_threshold)
+        self.last_thumb = thumb
+
+        if (self.last_detect is None or shot_change or
+                (not self.regions and frame_count - self.last_detect >= self.retry_frames)):
+            self._detect(frame, frame_count)
+
+        image = None
+        changed = False
+        for i, detection in enumerate(self.regions):
+            self.region_checks += 1
+            fingerprint = self._fingerprint(gray, detection)
+            previous = self.fingerprints[i]
+            if previous is not None and np.abs(fingerprint - previous).mean() <= self.change_threshold:
+                continue
+            if image is None:
+                image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            self.texts[i] = read_region(self.engine, detection, prepare_region(image, detection))
+            self.fingerprints[i] = fingerprint
+            self.ocr_calls += 1
+            changed = True
+
+        if changed:
+            self.fields = merge_regions([(d, None) for d in self.regions], self.texts, self.img_width)
+        return self.fields
+
+    def summary(self):
+        avoided = self.region_checks - self.ocr_calls
+        share = avoided / self.region_checks if self.region_checks else 0.0
+        return (f"{self.detector_calls} detector calls, {self.ocr_calls} region OCRs, "
+                f"{avoided} OCRs avoided ({share:.0%} of {self.region_checks} region checks)")
+
+
+def track_video(input_path, output_path, stride=1, change_threshold=3.0, shot_threshold=30.0):
+    """Write a JSONL timeline row every time a scoreboard field changes."""
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open input video: {input_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    tracker = ScoreboardTracker(change_threshold=change_threshold, shot_threshold=shot_threshold,
+                                retry_frames=int(fps))
+
+    frame_count = 0
+    rows = 0
+    last = None
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_count % stride == 0:
+                fields = tracker.update(frame, frame_count)
+                row = {field: fields.get(field) for field in TIMELINE_FIELDS}
+                if row != last:
+                    out.write(json.dumps({"frame": frame_count, "time": round(frame_count / fps, 3), **row}) + "\n")
+                    last = row
+                    rows += 1
+            frame_count += 1
+    cap.release()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {frame_count} frames in {elapsed:.1f}s; wrote {rows} timeline rows to {output_path}")
+    print(tracker.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract a scoreboard timeline from broadcast video.")
+    parser.add_argument("input_video", help="Path to the input video file.")
+    parser.add_argument("output", nargs="?", default="scoreboard_timeline.jsonl", help="Timeline JSONL path.")
+    parser.add_argument("--stride", type=int, default=1, help="Check every Nth frame.")
+    parser.add_argument("--change-threshold", type=float, default=3.0,
+                        help="Mean gray-level change in a region that triggers re-OCR.")
+    parser.add_argument("--shot-threshold", type=float, default=30.0,
+                        help="Mean gray-level change across the frame treated as a shot change.")
+    args = parser.parse_args()
+    track_video(args.input_video, args.output, args.stride, args.change_threshold, args.shot_threshold)
@@ -0,0 +1,320 @@
+import argparse
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from play_model import PLAY_MODEL_PATH, PlayPredictor, random_situations
+
+SITUATION_TABLE_PATH = os.environ.get("SITUATION_TABLE_PATH", "situation_table.npy")
+
+# Table axes, in storage order. Each is bucketed from the model's training range;
+# offenseFormation is the model's categories plus one slot for anything unknown.
+AXES = ["down", "ydstogo", "qtr", "yardlineNumber", "quarter_seconds_remaining", "offenseFormation"]
+CLOCK = "quarter_seconds_remaining"
+QUARTER_SECONDS = 900
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def clock_split_starts(predictor):
+    """
+    Whole seconds at which any tree in the model changes branch on the game
+    clock (quarter_seconds_remaining directly, or total_seconds_remaining
+    in any quarter). Bucketing the clock at these seconds makes the table
+    exact for whole-second clocks.
+    """
+    trees = predictor.booster.trees_to_dataframe()
+    names = predictor.booster.feature_names or [f"f{i}" for i in range(predictor.width)]
+    starts = {0}
+    for name in (CLOCK, "total_seconds_remaining"):
+        if name not in predictor.numerical:
+            continue
+        j = predictor.numerical.index(name)
+        if predictor.scale[j] == 0:
+            continue
+        splits = trees.loc[trees["Feature"] == names[j], "Split"].to_numpy(dtype=np.float64)
+        raw = (splits - predictor.offset[j]) / predictor.scale[j]
+        if name == "total_seconds_remaining":
+            raw = np.concatenate([raw - (4 - qtr) * QUARTER_SECONDS for qtr in range(1, 5)])
+        # A row goes left when value < split; thresholds that land on a whole second
+        # (up to float error) start their bucket at that second.
+        start = np.where(np.abs(raw - np.round(raw)) < 1e-3, np.round(raw), np.ceil(raw))
+        starts.update(int(s) for s in start if 0 < s <= QUARTER_SECONDS)
+    return sorted(starts)
+
+
+class SituationTable:
+    """
+    Positive-class probabilities of the play model precomputed over a
+    bucketed grid of situations, stored as a .npy array (memory-mapped on
+    load) with a .json sidecar describing the axes. A lookup is a few
+    integer divisions and one array read; playClockAtSnap is not an axis
+    and takes the model's default. The game clock is bucketed by whole
+    seconds through a second -> bucket index, so its buckets need not be
+    the same width.
+    """
+
+    def __init__(self, table, meta):
+        self.table = table
+        self.meta = meta
+        self.classes = np.asarray(meta["classes"])
+        self.formations = {name: i for i, name in enumerate(meta["formations"])}
+        self.unknown = len(meta["formations"])
+        self.size = np.array(table.shape[:-1], dtype=np.intp)
+        clock = meta["axes"][CLOCK]
+        starts = clock.get("starts")
+        if starts is None:
+            starts = clock["low"] + clock["bucket"] * np.arange(self.size[AXES.index(CLOCK)])
+        self.clock_index = np.searchsorted(starts, np.arange(QUARTER_SECONDS + 1), side="right") - 1
+        # The clock axis looks whole seconds up in clock_index; the others divide by their bucket.
+        self.low = np.array([0 if name == CLOCK else meta["axes"][name]["low"] for name in AXES[:-1]],
+                            dtype=np.float64)
+        self.bucket = np.array([1 if name == CLOCK else meta["axes"][name]["bucket"] for name in AXES[:-1]],
+                               dtype=np.float64)
+        self.last = np.where(np.array(AXES[:-1]) == CLOCK, QUARTER_SECONDS, self.size - 1)
+        self.strides = np.array(table.strides, dtype=np.intp) // table.itemsize
+        # A plain ndarray view of the (possibly memory-mapped) data: memmap indexing is slower per element.
+        self.flat = np.asarray(table).reshape(-1)
+        # Python scalars for the single-situation path, which numpy scalar arithmetic would dominate.
+        self._axes = list(zip(AXES[:-1], self.low.tolist(), self.bucket.tolist(), self.last.tolist(),
+                              self.strides[:-1].tolist(),
+                              [self.clock_index.tolist() if name == CLOCK else None for name in AXES[:-1]]))
+        self._formation_stride = int(self.strides[-1])
+
+    @classmethod
+    def build(cls, predictor, yard_bucket=1, ydstogo_bucket=1, clock_bucket=None, max_ydstogo=30, dtype="float16",
+              chunk=200000):
+        """
+        Score every bucket centre of the grid with predictor.predict_batch.
+        Integer axes span the training range in steps of their bucket;
+        ydstogo is capped at `max_ydstogo` (longer distances share the last
+        bucket). The game clock is cut at the model's own clock split
+        points by default, which with 1-wide integer axes reproduces the
+        model for whole-second clocks, or into `clock_bucket`-second
+        buckets, which is smaller but approximate.
+        """
+        scaler = predictor.preprocessor.named_transformers_["num"]
+        ranges = {name: (scaler.data_min_[i], scaler.data_max_[i]) for i, name in enumerate(predictor.numerical)}
+        buckets = {"down": 1, "ydstogo": ydstogo_bucket, "qtr": 1, "yardlineNumber": yard_bucket}
+        ranges["ydstogo"] = (ranges["ydstogo"][0], min(ranges["ydstogo"][1], max_ydstogo))
+
+        axes, centres = {}, []
+        for name in AXES[:-1]:
+            if name == CLOCK:
+                if clock_bucket is None:
+                    starts = clock_split_starts(predictor)
+                else:
+                    starts = list(range(0, QUARTER_SECONDS + 1, clock_bucket))
+                ends = starts[1:] + [QUARTER_SECONDS + 1]
+                # Scored at the middle whole second of each bucket.
+                centres.append(np.array([(start + end - 1) // 2 for start, end in zip(starts, ends)], dtype=np.float64))
+                axes[name] = {"starts": starts, "bucket": clock_bucket, "count": len(starts)}
+                continue
+            low, high = float(ranges[name][0]), float(ranges[name][1])
+            bucket = buckets[name]
+            count = max(1, int(np.ceil((high - low + 1) / bucket)))
+            centres.append(np.minimum(low + np.arange(count) * bucket + (bucket - 1) / 2, high))
+            axes[name] = {"low": low, "bucket": bucket, "count": count}
+        formations = list(predictor.categories)
+        centres.append(np.array(formations + [None], dtype=object))
+
+        shape = tuple(len(c) for c in centres)
+        cells = int(np.prod(shape))
+        # Only one chunk of grid indices and probabilities is ever held at full width.
+        table = np.empty(shape, dtype=dtype)
+        flat = table.reshape(-1)
+        for start in range(0, cells, chunk):
+            stop = min(start + chunk, cells)
+            index = np.unravel_index(np.arange(start, stop), shape)
+            columns = {name: centres[axis][index[axis]] for axis, name in enumerate(AXES)}
+            for name in AXES[:-1]:
+                columns[name] = columns[name].astype(np.float64)
+            _, proba = predictor.predict_batch(columns)
+            flat[start:stop] = proba[:, 1]
+
+        meta = {"axes": axes, "formations": formations, "classes": [str(c) for c in predictor.classes],
+                "dtype": dtype, "shape": list(shape)}
+        return cls(table, meta)
+
+    def save(self, path=SITUATION_TABLE_PATH):
+        """
+        Write the table and its metadata to temp files and os.replace() them
+        into place, so a reader never sees a partly written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, table_tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npy")
+        meta_fd, meta_tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, self.table)
+            with os.fdopen(meta_fd, "w", encoding="utf-8") as f:
+                json.dump(self.meta, f, indent=2)
+            os.replace(table_tmp, path)
+            os.replace(meta_tmp, _meta_path(path))
+        except BaseException:
+            for tmp in (table_tmp, meta_tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            raise
+
+    @classmethod
+    def load(cls, path=SITUATION_TABLE_PATH, mmap=True):
+        with open(_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        table = np.load(path, mmap_mode="r" if mmap else None)
+        if list(table.shape) != meta["shape"]:
+            # Caught between the two replaces of a concurrent save().
+            raise ValueError(f"{path} does not match its metadata; it is being rewritten or is corrupt.")
+        return cls(table, meta)
+
+    def probability(self, situation):
+        """
+        Probability of the positive class (classes[1]) for one situation
+        dict; NaN when any of the bucketed inputs is missing, None or NaN.
+        """
+        index = self.formations.get(situation.get(AXES[-1]), self.unknown) * self._formation_stride
+        for name, low, bucket, last, stride, lookup in self._axes:
+            value = situation.get(name)
+            if value is None or not math.isfinite(value):
+                return math.nan
+            i = int((value - low) // bucket)
+            i = 0 if i < 0 else last if i > last else i
+            index += (lookup[i] if lookup else i) * stride
+        return self.flat.item(index)
+
+    def predict_proba(self, situation):
+        """Class probabilities for one situation dict, like PlayPredictor.predict_proba."""
+        p = self.probability(situation)
+        return np.array([1.0 - p, p])
+
+    def predict(self, situation):
+        """Predicted play type and its probability, like PlayPredictor.predict; (None, NaN) for missing inputs."""
+        p = self.probability(situation)
+        if p != p:
+            return None, p
+        return (str(self.classes[1]), p) if p >= 0.5 else (str(self.classes[0]), 1.0 - p)
+
+    def predict_batch(self, situations):
+        """
+        Vectorized lookup for a DataFrame (or dict of columns): returns
+        (labels, probabilities (n, 2)). Rows with a missing or non-finite
+        input get label None and NaN probabilities.
+        """
+        n = len(situations[AXES[-1]])
+        index = np.zeros(n, dtype=np.intp)
+        valid = np.ones(n, dtype=bool)
+        for axis, name in enumerate(AXES[:-1]):
+            values = np.asarray(situations[name], dtype=np.float64)
+            finite = np.isfinite(values)
+            valid &= finite
+            i = np.floor((np.where(finite, values, self.low[axis]) - self.low[axis]) / self.bucket[axis])
+            i = np.clip(i, 0, self.last[axis]).astype(np.intp)
+            if name == CLOCK:
+                i = self.clock_index[i]
+            index += i * self.strides[axis]
+        import pandas as pd
+
+        formation = pd.Categorical(np.asarray(situations[AXES[-1]], dtype=object),
+                                   categories=self.meta["formations"]).codes.astype(np.intp)
+        formation[formation < 0] = self.unknown
+        p = np.asarray(self.flat[index + formation * self.strides[-1]], dtype=np.float64)
+        p[~valid] = np.nan
+        labels = self.classes[(p >= 0.5).astype(np.intp)].astype(object)
+        labels[~valid] = None
+        return labels, np.column_stack([1.0 - p, p])
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """Return the process-wide SituationTable, memory-mapping SITUATION_TABLE_PATH on first use."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = SituationTable.load()
+    return _table
+
+
+def check(table, predictor, samples=20000, lookups=20000, min_agreement=0.99, max_mean_deviation=0.01):
+    """
+    Report the table's size, lookup latency and deviation from the model on
+    random whole-second situations. Returns False when the table makes a
+    different call on more than 1 - `min_agreement` of them or its mean
+    deviation is over `max_mean_deviation`.
+    """
+    import pandas as pd
+
+    print(f"table {table.meta['shape']} {table.table.dtype}: {table.table.nbytes / 2 ** 20:.1f} MiB")
+
+    frame = pd.DataFrame(random_situations(predictor, samples, seed=1))
+    frame = frame.drop(columns=["playClockAtSnap"])
+    _, expected = predictor.predict_batch(frame)
+    _, got = table.predict_batch(frame)
+    difference = np.abs(got[:, 1] - expected[:, 1])
+    agree = np.mean((got[:, 1] >= 0.5) == (expected[:, 1] >= 0.5))
+    print(f"deviation from the model over {samples} situations: max {difference.max():.4f}, "
+          f"mean {difference.mean():.4f}, 99th percentile {np.percentile(difference, 99):.4f}, "
+          f"same call {agree:.2%}")
+
+    singles = frame.iloc[:lookups].to_dict("records")
+    start = time.perf_counter()
+    for situation in singles:
+        table.predict(situation)
+    table_us = (time.perf_counter() - start) * 1e6 / len(singles)
+    start = time.perf_counter()
+    for situation in singles[:2000]:
+        predictor.predict(situation)
+    model_us = (time.perf_counter() - start) * 1e6 / min(len(singles), 2000)
+    start = time.perf_counter()
+    table.predict_batch(frame)
+    batch_us = (time.perf_counter() - start) * 1e6 / samples
+    print(f"single lookup: {table_us:.2f} us vs {model_us:.1f} us model; batch lookup: {batch_us:.3f} us/play")
+    if agree < min_agreement or difference.mean() > max_mean_deviation:
+        print(f"FAILED: table is too coarse (needs same call >= {min_agreement:.0%} and mean deviation "
+              f"<= {max_mean_deviation}); rebuild with smaller buckets or without --clock-bucket")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or check the precomputed situation table.")
+    parser.add_argument("--model", default=PLAY_MODEL_PATH, help="Saved model bundle.")
+    parser.add_argument("--table", default=SITUATION_TABLE_PATH, help="Table .npy path (metadata goes next to it).")
+    parser.add_argument("--build", action="store_true", help="Build the table from --model.")
+    parser.add_argument("--yard-bucket", type=int, default=1, help="Yard line bucket size.")
+    parser.add_argument("--ydstogo-bucket", type=int, default=1, help="Yards-to-go bucket size.")
+    parser.add_argument("--max-ydstogo", type=int, default=30, help="Longer distances share the last bucket.")
+    parser.add_argument("--clock-bucket", type=int,
+                        help="Game clock bucket size in seconds (default: cut at the model's own clock splits, "
+                             "exact for whole seconds). Uniform buckets are approximate: on a clock-heavy model "
+                             "30/10/5 s buckets made the same call as the model on 89.5/95.3/97.6%% of plays.")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    parser.add_argument("--samples", type=int, default=20000, help="Random situations for the deviation check.")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Fail the check when the table makes the model's call on fewer plays than this.")
+    parser.add_argument("--max-mean-deviation", type=float, default=0.01,
+                        help="Fail the check when the mean probability deviation is above this.")
+    args = parser.parse_args()
+
+    predictor = PlayPredictor.load(args.model)
+    if args.build:
+        start = time.perf_counter()
+        built = SituationTable.build(predictor, args.yard_bucket, args.ydstogo_bucket, args.clock_bucket,
+                                     args.max_ydstogo, args.dtype)
+        built.save(args.table)
+        print(f"Built {args.table} in {time.perf_counter() - start:.1f}s")
+    ok = check(SituationTable.load(args.table), predictor, args.samples, min_agreement=args.min_agreement,
+               max_mean_deviation=args.max_mean_deviation)
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from batch_io import JsonlWriter
+
+
+@pytest.mark.parametrize("torn", ['{"path": "c.png", "for', "x" * 200000])
+def test_jsonl_writer_drops_a_torn_last_line_before_appending(tmp_path, torn):
+    path = tmp_path / "rows.jsonl"
+    path.write_text('{"path": "a.png"}\n{"path": "b.png"}\n' + torn, encoding="utf-8")
+    assert JsonlWriter.completed(str(path)) == {"a.png", "b.png"}
+
+    writer = JsonlWriter(str(path))
+    writer.write({"path": "c.png"})
+    writer.close()
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [row["path"] for row in rows] == ["a.png", "b.png", "c.png"]
+
+
+def test_jsonl_writer_keeps_complete_and_empty_files(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    path.write_text("", encoding="utf-8")
+    JsonlWriter(str(path)).close()
+    assert path.read_text(encoding="utf-8") == ""
+    path.write_text('{"path": "a.png"}\n', encoding="utf-8")
+    JsonlWriter(str(path)).close()
+    assert path.read_text(encoding="utf-8") == '{"path": "a.png"}\n'
+
+
+def row_for(path):
+    if path.endswith("bad.png"):
+        raise ValueError("unreadable")
+    return {"path": path, "size": len(path)}
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_process_batch_skips_completed_images_and_retries_failures(tmp_path, fmt, capsys):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from batch_io import WRITERS, process_batch
+
+    images = tmp_path / "images"
+    images.mkdir()
+    for name in ("a.png", "b.png", "bad.png", "c.png"):
+        (images / name).write_bytes(b"")
+    output = str(tmp_path / f"rows.{fmt}")
+
+    assert process_batch(str(images), output, ThreadPoolExecutor(2), row_for, 2) == (3, 1)
+    assert "Failed on" in capsys.readouterr().err
+    (images / "d.png").write_bytes(b"")
+    assert process_batch(str(images), output, ThreadPoolExecutor(2), row_for, 2, verb="checked") == (1, 1)
+    assert capsys.readouterr().out.startswith("3 images already checked, 2 to go")
+    done = WRITERS[fmt].completed(output)
+    assert sorted(os.path.basename(p) for p in done) == ["a.png", "b.png", "c.png", "d.png"]
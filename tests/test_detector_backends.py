@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from detector_backends import OnnxDetector
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+
+SIZE = 64
+
+
+def _model(path, batch, anchors):
+    """
+    A YOLOv8-shaped (batch, 4 + classes, anchors) detector whose class
+    scores are the image's mean brightness times fixed per-anchor weights,
+    so dark and bright inputs give different detections.
+    """
+    anchors = np.asarray(anchors, dtype=np.float32)  # rows of cx, cy, w, h, class 0 weight, class 1 weight, ...
+    boxes = anchors[:, :4].T[None]
+    weights = anchors[:, 4:].T[None]
+    nodes = [
+        helper.make_node("ReduceMean", ["images"], ["mean"], axes=[1, 2, 3], keepdims=1),
+        helper.make_node("Reshape", ["mean", "shape"], ["brightness"]),
+        helper.make_node("Mul", ["brightness", "weights"], ["scores"]),
+        helper.make_node("Mul", ["brightness", "zero"], ["zeros"]),
+        helper.make_node("Add", ["zeros", "boxes"], ["batch_boxes"]),
+        helper.make_node("Concat", ["batch_boxes", "scores"], ["output0"], axis=1),
+    ]
+    initializers = [numpy_helper.from_array(np.array([-1, 1, 1], dtype=np.int64), "shape"),
+                    numpy_helper.from_array(weights, "weights"), numpy_helper.from_array(boxes, "boxes"),
+                    numpy_helper.from_array(np.zeros(1, dtype=np.float32), "zero")]
+    graph = helper.make_graph(
+        nodes, "stub", [helper.make_tensor_value_info("images", TensorProto.FLOAT, [batch, 3, SIZE, SIZE])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [batch, anchors.shape[1], len(anchors)])],
+        initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def _detector(path, classes):
+    return OnnxDetector({"models": {"m": {"path": path, "classes": classes, "input_size": SIZE}}})
+
+
+def test_fixed_batch_model_takes_a_partial_last_batch(tmp_path):
+    path = _model(tmp_path / "fixed.onnx", 4, [[32, 32, 10, 10, 1.0]])
+    detector = _detector(path, ["player"])
+    frames = [np.full((48, 64, 3), value, dtype=np.uint8) for value in (255, 0, 255, 0, 255, 0)]
+    results = detector.infer_batch(frames, "m")
+    assert [len(r["predictions"]) for r in results] == [1, 0, 1, 0, 1, 0]
+    assert results[4] == detector.infer(frames[4], "m")
+
+
+def test_nms_keeps_overlapping_boxes_of_different_classes_on_wide_frames(tmp_path):
+    # On an 8000 px wide frame, 1 input pixel is 125 source pixels: a class 0 box at
+    # input x = 40 lands past 4096 source pixels, where a fixed per-class source offset collides.
+    # Letterboxing leaves the input about half grey, so the weights are doubled.
+    anchors = [[40.0, 32, 8, 8, 1.8, 0.0], [40.0 - 4096 / 125, 32, 8, 8, 0.0, 1.6],
+               [40.5, 32, 8, 8, 1.4, 0.0]]
+    path = _model(tmp_path / "wide.onnx", 1, anchors)
+    detector = _detector(path, ["player", "ball"])
+    result = detector.infer(np.full((1000, 8000, 3), 255, dtype=np.uint8), "m")
+    # The two class 0 boxes overlap, so one is suppressed; the class 1 box always survives.
+    assert sorted(p["class"] for p in result["predictions"]) == ["ball", "player"]
+    assert result["predictions"][0]["x"] == pytest.approx(40 * 125)
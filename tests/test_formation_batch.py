@@ -0,0 +1,6 @@
+from formation_batch import check_equivalence
+
+
+def test_vectorized_rules_match_classify_formation(capsys):
+    assert check_equivalence()
+    assert "0 mismatches" in capsys.readouterr().out
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from stub_server import start_stub_server
+from inference_client import InferenceClient, encode_jpeg, rescale_predictions, resize_for_inference
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def stub_url():
+    server, url = start_stub_server(num_boxes=3)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_infer_returns_the_server_response(stub_url):
+    client = InferenceClient(api_url=stub_url, cache=None)
+    result = client.infer(b"frame", "model/1")
+    assert result["image"] == {"width": 1920, "height": 1080}
+    assert [p["x"] for p in result["predictions"]] == [100.0, 140.0, 180.0]
+    assert client.bytes_sent == len(b"frame")
+
+
+def test_bytes_sent_is_exact_under_concurrent_requests(stub_url):
+    client = InferenceClient(api_url=stub_url, cache=None, pool_size=4)
+    images = [bytes([i]) * (100 + i) for i in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda image: client.infer(image, "model/1"), images))
+    assert all(len(result["predictions"]) == 3 for result in results)
+    assert client.bytes_sent == sum(len(image) for image in images)
+
+
+def test_cached_results_are_not_requested_again(stub_url, tmp_path):
+    client = InferenceClient(api_url=stub_url, cache=ResultCache(str(tmp_path)))
+    first = client.infer(b"frame", "model/1")
+    assert client.infer(b"frame", "model/1") == first
+    assert client.bytes_sent == len(b"frame")
+    client.infer(b"frame", "model/2")
+    assert client.bytes_sent == 2 * len(b"frame")
+
+
+@pytest.fixture
+def blob_url():
+    server, url = start_stub_server(find_boxes=True)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+BLOBS = [(100, 200, 60, 120), (900, 500, 40, 80), (1700, 900, 120, 60), (400, 40, 200, 30)]
+
+
+def _frame():
+    frame = np.full((1080, 1920, 3), 40, dtype=np.uint8)
+    for left, top, width, height in BLOBS:
+        frame[top:top + height, left:left + width] = 255
+    return frame
+
+
+def _boxes(result):
+    return sorted((p["x"], p["y"], p["width"], p["height"]) for p in result["predictions"])
+
+
+@pytest.mark.parametrize("letterbox", [False, True])
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_reduced_uploads_map_back_to_full_resolution_boxes(blob_url, letterbox, as_bytes):
+    frame = _frame()
+    image = encode_jpeg(frame, 95) if as_bytes else frame
+    full = InferenceClient(api_url=blob_url, cache=None).infer(image, "model/1")
+    small_client = InferenceClient(api_url=blob_url, cache=None, inference_size=640, letterbox=letterbox)
+    small = small_client.infer(image, "model/1")
+
+    assert full["image"] == small["image"] == {"width": 1920, "height": 1080}
+    assert _boxes(full) == [(l + w / 2, t + h / 2, w, h) for l, t, w, h in sorted(BLOBS)]
+    # One pixel of the 640px upload is three source pixels.
+    assert len(_boxes(small)) == len(BLOBS)
+    np.testing.assert_allclose(_boxes(small), _boxes(full), atol=6)
+    assert small_client.bytes_sent < len(encode_jpeg(frame, 90))
+
+
+def test_letterbox_transform_centres_the_image():
+    resized, transform = resize_for_inference(_frame(), 640, letterbox=True)
+    assert resized.shape == (640, 640, 3)
+    assert transform == (1 / 3, 0, 140, 1920, 1080)
+    assert (resized[:140] == 114).all() and (resized[500:] == 114).all()
+    result = {"image": {"width": 640, "height": 640},
+              "predictions": [{"x": 320.0, "y": 320.0, "width": 30.0, "height": 60.0}]}
+    assert rescale_predictions(result, transform) == {
+        "image": {"width": 1920, "height": 1080},
+        "predictions": [{"x": 960.0, "y": 540.0, "width": 90.0, "height": 180.0}]}
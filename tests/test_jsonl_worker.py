@@ -0,0 +1,58 @@
+import io
+import json
+import os
+import sys
+
+from jsonl_worker import serve
+
+
+def handler(job):
+    print("progress for", job["id"])
+    if job.get("fail"):
+        raise RuntimeError("bad image")
+    return {"double": job["value"] * 2}
+
+
+def test_serve_keeps_handler_output_off_the_protocol_stream(capsys):
+    stdin = io.StringIO('{"id": 1, "value": 2}\n\nnot json\n{"id": 2, "fail": true}\n')
+    protocol = io.StringIO()
+    stdout = sys.stdout
+    serve(handler, workers=2, stdin=stdin, stdout=protocol)
+    assert sys.stdout is stdout
+
+    messages = [json.loads(line) for line in protocol.getvalue().splitlines()]
+    assert messages[0] == {"event": "ready", "workers": 2}
+    by_id = {m["id"]: m for m in messages[1:]}
+    assert by_id[1]["ok"] and by_id[1]["result"] == {"double": 4}
+    assert not by_id[2]["ok"] and by_id[2]["error"] == "RuntimeError: bad image"
+    assert not by_id[None]["ok"] and by_id[None]["error"].startswith("Invalid job")
+    assert "progress for 1" in capsys.readouterr().err
+
+
+
+def test_serve_answers_every_line(capsys):
+    stdin = io.StringIO('[1, 2]\n"job"\n{"id": 3, "value": 1}\n')
+    protocol = io.StringIO()
+    serve(handler, stdin=stdin, stdout=protocol)
+    messages = [json.loads(line) for line in protocol.getvalue().splitlines()[1:]]
+    assert len(messages) == 3
+    errors = [m for m in messages if not m["ok"]]
+    assert [m["id"] for m in errors] == [None, None]
+    assert all("expected a JSON object" in m["error"] for m in errors)
+
+
+def test_unopenable_video_job_gets_an_error_response(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                             "computer-vision-webapp"))
+    import process_video
+
+    missing = str(tmp_path / "missing.mp4")
+    jobs = [{"id": 1, "input": missing, "output": str(tmp_path / "a.mp4")},
+            {"id": 2, "input": missing, "output": str(tmp_path / "b.mp4"), "pipeline": True}]
+    protocol = io.StringIO()
+    serve(process_video.handle_job, stdin=io.StringIO("".join(json.dumps(j) + "\n" for j in jobs)),
+          stdout=protocol)
+    messages = {m["id"]: m for m in map(json.loads, protocol.getvalue().splitlines()[1:])}
+    assert sorted(messages) == [1, 2]
+    assert all(not m["ok"] and m["error"].startswith("ValueError: Could not open input video")
+               for m in messages.values())
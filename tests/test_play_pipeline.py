@@ -0,0 +1,39 @@
+import pytest
+
+from Scoreboard import clean_ocr_text
+from play_pipeline import parse_clock, parse_down, situation_features
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("3rd & 8", (3, 8)),
+    ("2nd & 18", (2, 18)),
+    ("4th & 8", (4, 8)),
+    ("1st and 10", (1, 10)),
+    ("3rd 8 10", (3, 10)),    # "&" misread as "8"
+    ("2nd8 7", (2, 7)),
+    ("3rd 18", (3, 18)),
+    ("4th & Goal", (4, 4)),   # goal to go uses the yard line
+])
+def test_down_and_distance_survive_cleaning(raw, expected):
+    assert parse_down(clean_ocr_text(raw, "Down"), yardline=4) == expected
+
+
+def test_situation_features_from_cleaned_scoreboard():
+    scoreboard = {
+        "Down": [clean_ocr_text("2nd & 18", "Down")],
+        "Quarter": [clean_ocr_text("3", "Quarter")],
+        "PlayTime": ["12:34"],
+        "YardNumber": ["35"],
+        "Clock": ["18"],
+    }
+    situation, missing = situation_features(scoreboard, "SHOTGUN")
+    assert missing == []
+    assert situation == {"down": 2, "ydstogo": 18, "qtr": 3, "yardlineNumber": 35,
+                         "quarter_seconds_remaining": 754, "offenseFormation": "SHOTGUN", "playClockAtSnap": 18}
+
+
+def test_unparsed_fields_are_reported_missing():
+    situation, missing = situation_features({"Down": ["garbage"]}, "SHOTGUN")
+    assert situation["down"] is None
+    assert missing == ["down", "ydstogo", "qtr", "yardlineNumber", "quarter_seconds_remaining"]
+    assert parse_clock("x") is None
@@ -0,0 +1,45 @@
+import json
+
+from result_cache import ResultCache
+
+
+def test_overwriting_a_key_does_not_grow_the_size_estimate(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 6)
+    cache.put("ab01", {"predictions": [1, 2, 3]})
+    cache.put("ab02", {"predictions": []})
+    for _ in range(50):
+        cache.put("ab01", {"predictions": [1, 2, 3]})
+    assert cache._approx_bytes == cache.disk_usage()[1]
+    assert cache.evictions == 0
+    assert cache.get("ab01") == {"predictions": [1, 2, 3]}
+
+
+def test_repeated_overwrites_do_not_trigger_eviction(tmp_path):
+    value = {"predictions": list(range(100))}
+    cache = ResultCache(str(tmp_path), max_bytes=3 * len(str(value)))
+    cache.put("ab01", value)
+    cache.put("ab02", value)
+    for _ in range(20):
+        cache.put("ab02", value)
+    assert cache.evictions == 0
+    assert cache.get("ab01") == value
+
+
+def test_clear_resets_the_size_estimate(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("ab01", {"predictions": []})
+    cache.clear()
+    assert cache.disk_usage() == (0, 0)
+    assert cache._approx_bytes == 0
+
+
+def test_caches_sharing_a_directory_see_each_others_writes(tmp_path):
+    value = {"predictions": list(range(100))}
+    size = len(json.dumps(value).encode("utf-8"))
+    first = ResultCache(str(tmp_path), max_bytes=5 * size, sync_seconds=0)
+    second = ResultCache(str(tmp_path), max_bytes=5 * size, sync_seconds=0)
+    for i in range(4):
+        first.put(f"aa{i:02d}", value)
+        second.put(f"bb{i:02d}", value)
+    assert first.disk_usage()[1] <= 5 * size
+    assert first.evictions + second.evictions > 0
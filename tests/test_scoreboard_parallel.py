@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from PIL import Image, ImageDraw
+
+import Scoreboard
+from ocr_engine import CompositeEngine
+
+
+class PerCropEngine:
+    """Reads a crop as a string of its pixel statistics, so every crop gets its own text."""
+
+    def read(self, image, digits_only=False):
+        lo, hi = image.getextrema()
+        text = f"{image.width}x{image.height} {lo}-{hi}"
+        return "".join(c for c in text if c.isdigit()) if digits_only else text
+
+    def read_many(self, items):
+        return [self.read(image, digits_only) for image, digits_only in items]
+
+
+class BatchingEngine(PerCropEngine):
+    """Like CompositeEngine: what a crop reads as depends on the batch it was read in."""
+
+    batches = True
+
+    def read_many(self, items):
+        return [f"{len(items)} {i}" if not digits_only else f"{len(items)}{i}"
+                for i, (_, digits_only) in enumerate(items)]
+
+    def read(self, image, digits_only=False):
+        return self.read_many([(image, digits_only)])[0]
+
+
+def box(cls, x, y, w=60, h=30):
+    return {"class": cls, "x": x, "y": y, "width": w, "height": h}
+
+
+@pytest.fixture
+def scoreboard(tmp_path):
+    image = Image.new("RGB", (640, 120), "white")
+    draw = ImageDraw.Draw(image)
+    predictions = [box("SB", 320, 60, 640, 120), box("Score", 60, 40), box("Score", 580, 40),
+                   box("Quarter", 200, 40), box("Down", 320, 40, 100), box("PlayTime", 440, 40, 80),
+                   box("YardNumber", 200, 90, 40), box("YardNumber", 440, 90, 50), box("Clock", 320, 90, 40)]
+    for i, p in enumerate(predictions[1:]):
+        draw.rectangle((p["x"] - 10, p["y"] - 5, p["x"] + 10 + i, p["y"] + 5), fill=(20 * i, 0, 0))
+    path = tmp_path / "scoreboard.png"
+    image.save(path)
+    result = [{"model_predictions": {"image": {"width": 640, "height": 120}, "predictions": predictions}}]
+    return str(path), json.dumps(result)
+
+
+@pytest.fixture(autouse=True)
+def no_digit_recognizer(monkeypatch):
+    monkeypatch.setattr(Scoreboard, "get_digit_recognizer", lambda: None)
+
+
+@pytest.mark.parametrize("engine", [PerCropEngine(), BatchingEngine()], ids=["per-crop", "batching"])
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_matches_sequential(scoreboard, engine, workers):
+    image_path, json_data = scoreboard
+    sequential = Scoreboard.process_scoreboard(image_path, json_data, engine=engine, workers=1)
+    parallel = Scoreboard.process_scoreboard(image_path, json_data, engine=engine, workers=workers)
+    assert parallel == sequential
+    assert set(sequential) == {"Score", "Quarter", "Down", "PlayTime", "YardNumber", "Clock"}
+
+
+def test_parallel_uses_batched_reads_for_composite(scoreboard, monkeypatch):
+    calls = []
+
+    def fake_read_many(self, items):
+        calls.append(len(items))
+        return [""] * len(items)
+
+    monkeypatch.setattr(CompositeEngine, "read_many", fake_read_many)
+    monkeypatch.setattr(CompositeEngine, "read", lambda *args: pytest.fail("per-crop read on a batching engine"))
+    image_path, json_data = scoreboard
+    Scoreboard.process_scoreboard(image_path, json_data, engine=CompositeEngine(), workers=4)
+    # One batch for every region, then one for the upside-down YardNumber retries.
+    assert calls == [8, 2]
+
+
+def test_scoreboard_row_flattens_the_extracted_fields(scoreboard, monkeypatch):
+    image_path, json_data = scoreboard
+
+    class Detector:
+        def run_workflow(self, image, workflow_id):
+            return json.loads(json_data)
+
+    monkeypatch.setattr(Scoreboard, "get_detector", Detector)
+    monkeypatch.setattr(Scoreboard, "get_ocr_engine", PerCropEngine)
+    fields = Scoreboard.process_scoreboard(image_path, json_data, engine=PerCropEngine(), workers=1)
+    row = Scoreboard.scoreboard_row(image_path, workers=1)
+    assert row["path"] == image_path
+    for name in Scoreboard.SCOREBOARD_FIELDS:
+        values = fields.get(name, "")
+        assert row[name] == (values if isinstance(values, str) else ", ".join(values))
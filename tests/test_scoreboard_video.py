@@ -0,0 +1,84 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+import Scoreboard
+import scoreboard_video
+from scoreboard_video import ScoreboardTracker, track_video
+
+WIDTH, HEIGHT = 640, 360
+REGIONS = [{"class": "SB", "x": 320, "y": 50, "width": 640, "height": 80},
+           {"class": "Score", "x": 100, "y": 50, "width": 60, "height": 40},
+           {"class": "Score", "x": 540, "y": 50, "width": 60, "height": 40}]
+
+
+class StubDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def run_workflow(self, image, workflow_id):
+        self.calls += 1
+        return [{"model_predictions": {"image": {"width": WIDTH, "height": HEIGHT}, "predictions": REGIONS}}]
+
+
+class CountingEngine:
+    """Counts the crops it is asked to read; each read returns the call number, so re-reads are visible."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def read(self, image, digits_only=False):
+        self.calls += 1
+        return str(self.calls)
+
+
+def frame(left, right):
+    image = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for region, level in zip(REGIONS[1:], (left, right)):
+        x, y, w, h = region["x"], region["y"], region["width"], region["height"]
+        image[y - h // 2:y + h // 2, x - w // 2:x + w // 2] = level
+    return image
+
+
+@pytest.fixture(autouse=True)
+def no_digit_recognizer(monkeypatch):
+    monkeypatch.setattr(Scoreboard, "get_digit_recognizer", lambda: None)
+
+
+def test_only_changed_regions_are_read_again():
+    detector, engine = StubDetector(), CountingEngine()
+    tracker = ScoreboardTracker(engine=engine, detector=detector)
+    for i in range(5):
+        assert tracker.update(frame(70, 30), i) == {"Score": "1, 2"}
+    assert (detector.calls, engine.calls) == (1, 2)
+
+    for i in range(5, 10):
+        assert tracker.update(frame(140, 30), i) == {"Score": "3, 2"}
+    assert (detector.calls, engine.calls) == (1, 3)
+    assert tracker.region_checks == 20 and tracker.ocr_calls == 3
+
+
+def test_track_video_writes_a_row_per_change(tmp_path, monkeypatch):
+    detector, engine = StubDetector(), CountingEngine()
+    monkeypatch.setattr(scoreboard_video, "get_detector", lambda: detector)
+    monkeypatch.setattr(scoreboard_video, "get_ocr_engine", lambda: engine)
+    video = str(tmp_path / "game.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (WIDTH, HEIGHT))
+    for left in [70] * 6 + [140] * 6:
+        writer.write(frame(left, 30))
+    writer.release()
+
+    output = tmp_path / "timeline.jsonl"
+    track_video(video, str(output))
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [(row["frame"], row["Score"]) for row in rows] == [(0, "1, 2"), (6, "3, 2")]
+    assert (detector.calls, engine.calls) == (1, 3)
+
+
+def test_track_video_rejects_unreadable_input(tmp_path):
+    missing = tmp_path / "missing.mp4"
+    with pytest.raises(ValueError, match="Could not open input video"):
+        track_video(str(missing), str(tmp_path / "timeline.jsonl"))
+    assert not (tmp_path / "timeline.jsonl").exists()
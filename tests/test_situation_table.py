@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pytest
+
+from situation_table import AXES, SituationTable, check
+
+
+@pytest.fixture
+def table():
+    shape = (4, 3, 4, 5, 6, 3)
+    data = np.random.default_rng(0).random(shape).astype(np.float32)
+    axes = {"down": {"low": 1, "bucket": 1}, "ydstogo": {"low": 1, "bucket": 1}, "qtr": {"low": 1, "bucket": 1},
+            "yardlineNumber": {"low": 1, "bucket": 10}, "quarter_seconds_remaining": {"low": 0, "bucket": 150}}
+    meta = {"axes": axes, "formations": ["SHOTGUN", "SINGLEBACK"], "classes": ["pass", "run"],
+            "dtype": "float32", "shape": list(shape)}
+    return SituationTable(data, meta)
+
+
+SITUATION = {"down": 3, "ydstogo": 2, "qtr": 4, "yardlineNumber": 35, "quarter_seconds_remaining": 420,
+             "offenseFormation": "SINGLEBACK"}
+
+
+def test_single_and_batch_lookups_agree(table):
+    p = table.probability(SITUATION)
+    assert p == pytest.approx(float(table.table[2, 1, 3, 3, 2, 1]))
+    _, proba = table.predict_batch({name: [SITUATION[name]] for name in AXES})
+    assert proba[0, 1] == pytest.approx(p)
+
+
+@pytest.mark.parametrize("name", AXES[:-1])
+@pytest.mark.parametrize("bad", [None, math.nan])
+def test_missing_inputs_give_nan(table, name, bad):
+    situation = dict(SITUATION, **{name: bad})
+    assert math.isnan(table.probability(situation))
+    assert table.predict(situation) == (None, pytest.approx(math.nan, nan_ok=True))
+
+    columns = {n: [SITUATION[n], situation[n]] for n in AXES}
+    columns[name] = [SITUATION[name], np.nan]
+    labels, proba = table.predict_batch(columns)
+    assert labels[0] is not None and labels[1] is None
+    assert not np.isnan(proba[0]).any() and np.isnan(proba[1]).all()
+
+
+def _clock_bundle():
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import LabelEncoder, MinMaxScaler, OneHotEncoder
+    from xgboost import XGBClassifier
+
+    from play_model import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, add_total_seconds_remaining
+
+    rng = np.random.default_rng(0)
+    n = 4000
+    X = add_total_seconds_remaining(pd.DataFrame({
+        "down": rng.integers(1, 5, n), "ydstogo": rng.integers(1, 11, n), "qtr": rng.integers(1, 5, n),
+        "yardlineNumber": rng.integers(1, 11, n), "quarter_seconds_remaining": rng.integers(0, 901, n),
+        "playClockAtSnap": rng.integers(0, 41, n), "offenseFormation": rng.choice(["SHOTGUN", "SINGLEBACK"], n)}))
+    # Clock-driven labels, so a coarse clock axis would visibly disagree with the model.
+    y = np.where((X["quarter_seconds_remaining"] // 37) % 2 == (X["down"] > 2), "pass", "run")
+    preprocessor = ColumnTransformer([("num", MinMaxScaler(), NUMERICAL_FEATURES),
+                                      ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES)],
+                                     sparse_threshold=0)
+    encoder = LabelEncoder().fit(y)
+    model = XGBClassifier(n_estimators=30, max_depth=4, objective="binary:logistic")
+    model.fit(preprocessor.fit_transform(X), encoder.transform(y))
+    return {"model": model, "preprocessor": preprocessor, "label_encoder": encoder,
+            "numerical_features": NUMERICAL_FEATURES, "categorical_features": CATEGORICAL_FEATURES,
+            "defaults": {"playClockAtSnap": 20.0}}
+
+
+def test_default_clock_axis_reproduces_the_model():
+    import pandas as pd
+
+    from play_model import PlayPredictor, random_situations
+
+    predictor = PlayPredictor(_clock_bundle())
+    exact = SituationTable.build(predictor, dtype="float32")
+    coarse = SituationTable.build(predictor, clock_bucket=60, dtype="float32")
+    chunked = SituationTable.build(predictor, clock_bucket=60, dtype="float32", chunk=10007)
+    np.testing.assert_array_equal(chunked.table, coarse.table)
+    assert exact.meta["axes"]["quarter_seconds_remaining"]["starts"][0] == 0
+
+    frame = pd.DataFrame(random_situations(predictor, 3000, seed=1)).drop(columns=["playClockAtSnap"])
+    frame["ydstogo"] = frame["ydstogo"].clip(upper=10)
+    frame["yardlineNumber"] = frame["yardlineNumber"].clip(upper=10)
+    _, expected = predictor.predict_batch(frame)
+    _, got = exact.predict_batch(frame)
+    np.testing.assert_allclose(got[:, 1], expected[:, 1], atol=1e-5)
+    assert exact.probability(frame.iloc[0].to_dict()) == pytest.approx(expected[0, 1], abs=1e-5)
+
+    assert check(exact, predictor, samples=2000, lookups=200)
+    assert not check(coarse, predictor, samples=2000, lookups=200)
+
+
+def test_save_and_load_round_trip(table, tmp_path):
+    path = str(tmp_path / "table.npy")
+    table.save(path)
+    loaded = SituationTable.load(path)
+    assert loaded.meta == table.meta
+    assert loaded.probability(SITUATION) == table.probability(SITUATION)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["table.json", "table.npy"]
+
+
+def test_load_rejects_a_table_that_does_not_match_its_metadata(table, tmp_path):
+    path = str(tmp_path / "table.npy")
+    table.save(path)
+    np.save(path, np.zeros((2, 2), dtype=np.float32))
+    with pytest.raises(ValueError, match="does not match"):
+        SituationTable.load(path)
@@ -0,0 +1,32 @@
+import pytest
+
+from training_data import build_training_data
+
+BDB = """gameId,playId,quarter,down,yardsToGo,possessionTeam,yardlineNumber,offenseFormation,playClockAtSnap
+2022090800,1,1,1,10,BUF,25,SHOTGUN,12
+2022090800,2,1,2,7,BUF,28,SINGLEBACK,
+2022090800,3,1,,5,BUF,30,SHOTGUN,8
+2022090800,4,2,3,,LA,40,EMPTY,10
+"""
+PBP = """old_game_id,play_id,qtr,down,ydstogo,posteam,play_type,quarter_seconds_remaining
+2022090800,1,1,1,10,BUF,pass,900
+2022090800,2,1,2,7,BUF,run,870
+2022090800,3,1,,5,BUF,pass,840
+2022090800,4,2,3,,LA,run,800
+2022090800,5,2,,,,no_play,790
+"""
+
+
+@pytest.fixture
+def season(tmp_path):
+    bdb, pbp = tmp_path / "plays.csv", tmp_path / "pbp.csv"
+    bdb.write_text(BDB, encoding="utf-8")
+    pbp.write_text(PBP, encoding="utf-8")
+    return str(bdb), str(pbp)
+
+
+def test_rows_with_missing_keys_are_dropped_before_the_merge(season):
+    table = build_training_data(*season)
+    assert table["ydstogo"].tolist() == [10, 7]
+    assert table["play_type"].tolist() == ["pass", "run"]
+    assert str(table["down"].dtype) == "int8"
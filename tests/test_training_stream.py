@@ -0,0 +1,20 @@
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from training_stream import fit_preprocessor
+
+
+def test_fit_preprocessor_rejects_empty_training_data():
+    with pytest.raises(ValueError, match="No training rows"):
+        fit_preprocessor({"scaler": MinMaxScaler(), "formations": [], "labels": []})
+
+
+def test_stream_join_drops_rows_with_missing_keys(tmp_path):
+    from test_training_data import BDB, PBP
+    from training_stream import stream_join
+
+    bdb, pbp = tmp_path / "plays.csv", tmp_path / "pbp.csv"
+    bdb.write_text(BDB, encoding="utf-8")
+    pbp.write_text(PBP, encoding="utf-8")
+    parts, stats = stream_join([(str(bdb), str(pbp))], out_dir=str(tmp_path / "stream"), chunk_rows=2)
+    assert stats["rows"] == 2
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+BDB_PLAYS_CSV = os.environ.get("BDB_PLAYS_CSV", r"C:\Users\davep\Downloads\plays.csv")
+NFLVERSE_PBP_CSV = os.environ.get("NFLVERSE_PBP_CSV", r"C:\Users\davep\Downloads\play_by_play_2022.csv")
+TRAINING_CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", "data_cache")
+# Bump when the build below changes, so old cache files are not reused.
+BUILD_VERSION = "1"
+
+MERGE_COLUMNS_BIG_DATA_BOWL = ["gameId", "playId", "quarter", "down", "yardsToGo", "possessionTeam"]
+MERGE_COLUMNS_NFL_VERSE = ["old_game_id", "play_id", "qtr", "down", "ydstogo", "posteam"]
+FEATURE_COLUMNS = ["down", "ydstogo", "play_type", "qtr", "yardlineNumber", "quarter_seconds_remaining",
+                   "offenseFormation", "playClockAtSnap"]
+
+# Only the columns the merge and the feature table need, read with compact
+# dtypes. Keys are nullable so rows with missing values parse; those rows are
+# dropped before merging, since pandas matches <NA> keys with each other.
+BIG_DATA_BOWL_DTYPES = {
+    "gameId": "Int64", "playId": "Int32", "quarter": "Int8", "down": "Int8", "yardsToGo": "Int8",
+    "possessionTeam": "category", "yardlineNumber": "Int8", "offenseFormation": "category",
+    "playClockAtSnap": "float32",
+}
+NFL_VERSE_DTYPES = {
+    "old_game_id": "Int64", "play_id": "Int32", "qtr": "Int8", "down": "Int8", "ydstogo": "Int8",
+    "posteam": "category", "play_type": "category", "quarter_seconds_remaining": "float32",
+}
+FEATURE_DTYPES = {
+    "down": "int8", "ydstogo": "int8", "yardlineNumber": "int8",
+    # int16 so (4 - qtr) * 900 for total_seconds_remaining cannot overflow.
+    "qtr": "int16",
+    "quarter_seconds_remaining": "float32", "playClockAtSnap": "float32",
+}
+
+
+def file_sha256(path, memo=None):
+    """
+    SHA-256 of a file's contents. `memo` maps paths to their last (size,
+    mtime, hash), so unchanged files are not re-read on every run.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    if memo is not None:
+        entry = memo.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    if memo is not None:
+        memo[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    return digest
+
+
+def _unify_categories(left, right):
+    # Merging categoricals with different categories falls back to object keys.
+    categories = pd.api.types.union_categoricals([left, right]).categories.sort_values()
+    return left.cat.set_categories(categories), right.cat.set_categories(categories)
+
+
+def build_training_data(bdb_path=BDB_PLAYS_CSV, pbp_path=NFLVERSE_PBP_CSV):
+    """
+    Read the Big Data Bowl plays and nflverse play-by-play, join them on
+    the six shared play keys and return the cleaned feature table used by
+    playAndFormationPredictions.py.
+    """
+    df_big_data_bowl = pd.read_csv(bdb_path, usecols=list(BIG_DATA_BOWL_DTYPES), dtype=BIG_DATA_BOWL_DTYPES)
+    df_nfl_verse = pd.read_csv(pbp_path, usecols=list(NFL_VERSE_DTYPES), dtype=NFL_VERSE_DTYPES,
+                               low_memory=False)
+
+    df_big_data_bowl = df_big_data_bowl.dropna(subset=MERGE_COLUMNS_BIG_DATA_BOWL)
+    df_nfl_verse = df_nfl_verse.dropna(subset=MERGE_COLUMNS_NFL_VERSE)
+    df_nfl_verse["posteam"], df_big_data_bowl["possessionTeam"] = _unify_categories(
+        df_nfl_verse["posteam"], df_big_data_bowl["possessionTeam"])
+
+    merged = df_nfl_verse.merge(
+        df_big_data_bowl,
+        left_on=MERGE_COLUMNS_NFL_VERSE,
+        right_on=MERGE_COLUMNS_BIG_DATA_BOWL,
+        how="inner"
+    )
+    merged = merged[FEATURE_COLUMNS]
+    merged = merged.dropna(subset=["offenseFormation"])
+    merged["playClockAtSnap"] = merged["playClockAtSnap"].fillna(merged["playClockAtSnap"].mean())
+    merged = merged.astype(FEATURE_DTYPES)
+    merged["offenseFormation"] = merged["offenseFormation"].cat.remove_unused_categories()
+    merged["play_type"] = merged["play_type"].cat.remove_unused_categories()
+    return merged.reset_index(drop=True)
+
+
+def load_training_data(bdb_path=BDB_PLAYS_CSV, pbp_path=NFLVERSE_PBP_CSV, cache_dir=TRAINING_CACHE_DIR,
+                       rebuild=False):
+    """
+    Return the feature table from the Parquet cache when one exists for
+    the current contents of both source files, building and caching it
+    otherwise.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    memo_path = os.path.join(cache_dir, "source_hashes.json")
+    memo = {}
+    if os.path.exists(memo_path):
+        with open(memo_path, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+
+    key = hashlib.sha256(
+        f"{BUILD_VERSION}|{file_sha256(bdb_path, memo)}|{file_sha256(pbp_path, memo)}".encode("utf-8")
+    ).hexdigest()[:16]
+    with open(memo_path, "w", encoding="utf-8") as f:
+        json.dump(memo, f, indent=2)
+
+    path = os.path.join(cache_dir, f"training_{key}.parquet")
+    if os.path.exists(path) and not rebuild:
+        return pd.read_parquet(path)
+
+    merged = build_training_data(bdb_path, pbp_path)
+    tmp = path + ".tmp"
+    merged.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return merged
+
+
+def compare(bdb_path=BDB_PLAYS_CSV, pbp_path=NFLVERSE_PBP_CSV, cache_dir=TRAINING_CACHE_DIR):
+    """Time and size the original full-CSV build against the pruned build and the cached load."""
+    start = time.perf_counter()
+    df_big_data_bowl = pd.read_csv(bdb_path)
+    df_nfl_verse = pd.read_csv(pbp_path, low_memory=False)
+    raw_mb = (df_big_data_bowl.memory_usage(deep=True).sum() + df_nfl_verse.memory_usage(deep=True).sum()) / 1e6
+    full = df_nfl_verse.merge(df_big_data_bowl, left_on=MERGE_COLUMNS_NFL_VERSE,
+                              right_on=MERGE_COLUMNS_BIG_DATA_BOWL, how="inner")[FEATURE_COLUMNS]
+    full = full.dropna(subset=["offenseFormation"])
+    full_s = time.perf_counter() - start
+    full_mb = full.memory_usage(deep=True).sum() / 1e6
+    del df_big_data_bowl, df_nfl_verse
+
+    start = time.perf_counter()
+    pruned = load_training_data(bdb_path, pbp_path, cache_dir, rebuild=True)
+    pruned_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = load_training_data(bdb_path, pbp_path, cache_dir)
+    cached_s = time.perf_counter() - start
+    cached_mb = cached.memory_usage(deep=True).sum() / 1e6
+
+    print(f"Full CSV read + merge: {full_s:.2f}s, {raw_mb:.0f} MB of source frames, "
+          f"{full_mb:.1f} MB feature table ({len(full)} rows)")
+    print(f"Pruned read + merge (cache rebuilt): {pruned_s:.2f}s")
+    print(f"Cached load: {cached_s:.2f}s, {cached_mb:.1f} MB feature table ({len(cached)} rows)")
+    if len(full) != len(pruned):
+        print(f"WARNING: row counts differ ({len(full)} full vs {len(pruned)} pruned)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or time the cached play-type training table.")
+    parser.add_argument("--plays", default=BDB_PLAYS_CSV, help="Big Data Bowl plays.csv.")
+    parser.add_argument("--pbp", default=NFLVERSE_PBP_CSV, help="nflverse play_by_play CSV.")
+    parser.add_argument("--cache-dir", default=TRAINING_CACHE_DIR, help="Where cached tables are kept.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the cached table even if it is current.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare the original full-CSV build with the pruned and cached loads.")
+    args = parser.parse_args()
+    if args.compare:
+        compare(args.plays, args.pbp, args.cache_dir)
+    else:
+        start = time.perf_counter()
+        table = load_training_data(args.plays, args.pbp, args.cache_dir, args.rebuild)
+        print(f"{len(table)} rows in {time.perf_counter() - start:.2f}s")
+        print(table.dtypes.to_string())
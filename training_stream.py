@@ -0,0 +1,302 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+from xgboost import XGBClassifier
+
+from play_model import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, save_bundle
+from play_training import make_preprocessor, split_target
+from training_data import (BDB_PLAYS_CSV, BIG_DATA_BOWL_DTYPES, FEATURE_COLUMNS, FEATURE_DTYPES,
+                           MERGE_COLUMNS_BIG_DATA_BOWL, MERGE_COLUMNS_NFL_VERSE, NFL_VERSE_DTYPES, NFLVERSE_PBP_CSV,
+                           TRAINING_CACHE_DIR, build_training_data)
+
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "100000"))
+STREAM_DIR = os.environ.get("STREAM_DIR", os.path.join(TRAINING_CACHE_DIR, "stream"))
+# Share of plays held out for testing, picked by a hash of the game and play ids so the
+# split does not depend on chunking.
+TEST_PERCENT = 20
+
+# Text columns are read as plain strings: categoricals would need their categories
+# unified chunk by chunk before every merge.
+STREAM_BDB_DTYPES = dict(BIG_DATA_BOWL_DTYPES, possessionTeam=str, offenseFormation=str)
+STREAM_PBP_DTYPES = dict(NFL_VERSE_DTYPES, posteam=str, play_type=str)
+
+XGB_PARAMS = {"objective": "binary:logistic", "tree_method": "hist", "max_depth": 6, "learning_rate": 0.1,
+              "max_bin": 256}
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MiB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def stream_join(seasons, out_dir=STREAM_DIR, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Join each (plays.csv, play_by_play.csv) season pair on the six play
+    keys and write the feature rows to Parquet parts in `out_dir`. The
+    play-by-play is read `chunk_rows` at a time and merged against that
+    season's Big Data Bowl plays, so memory holds one season of BDB plays
+    (a few thousand rows) and one chunk, however many seasons there are.
+
+    Returns (parts, stats): the part paths and what the preprocessor
+    needs from the training rows, i.e. a partially fitted MinMaxScaler,
+    the formations and play types seen and the playClockAtSnap mean.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, "part_*.parquet")):
+        os.remove(old)
+
+    scaler = MinMaxScaler()
+    formations, labels = set(), set()
+    clock_sum = clock_count = rows = test_rows = 0
+    parts = []
+    for season, (bdb_path, pbp_path) in enumerate(seasons):
+        plays = pd.read_csv(bdb_path, usecols=list(STREAM_BDB_DTYPES), dtype=STREAM_BDB_DTYPES)
+        # Inner merges match <NA> keys with each other, so rows missing a key are dropped first.
+        plays = plays.dropna(subset=["offenseFormation"] + MERGE_COLUMNS_BIG_DATA_BOWL)
+        chunks = pd.read_csv(pbp_path, usecols=list(STREAM_PBP_DTYPES), dtype=STREAM_PBP_DTYPES,
+                             chunksize=chunk_rows, low_memory=False)
+        for chunk_index, chunk in enumerate(chunks):
+            chunk = chunk.dropna(subset=MERGE_COLUMNS_NFL_VERSE)
+            merged = chunk.merge(plays, left_on=MERGE_COLUMNS_NFL_VERSE, right_on=MERGE_COLUMNS_BIG_DATA_BOWL,
+                                 how="inner")
+            if merged.empty:
+                continue
+            keys = pd.util.hash_pandas_object(merged[["old_game_id", "play_id"]], index=False).to_numpy()
+            table = merged[FEATURE_COLUMNS].astype(
+                {name: dtype for name, dtype in FEATURE_DTYPES.items() if name != "playClockAtSnap"})
+            table["is_test"] = keys % 100 < TEST_PERCENT
+
+            train = table[~table["is_test"]]
+            if len(train):
+                X, y = split_target(train.drop(columns=["is_test"]))
+                scaler.partial_fit(X[NUMERICAL_FEATURES])
+                formations.update(X["offenseFormation"].unique())
+                labels.update(y.unique())
+                clock_sum += float(X["playClockAtSnap"].sum())
+                clock_count += int(X["playClockAtSnap"].count())
+
+            path = os.path.join(out_dir, f"part_{season:03d}_{chunk_index:05d}.parquet")
+            table.to_parquet(path, index=False)
+            parts.append(path)
+            rows += len(table)
+            test_rows += int(table["is_test"].sum())
+
+    stats = {"scaler": scaler, "formations": sorted(formations), "labels": sorted(labels),
+             "clock_mean": clock_sum / max(clock_count, 1), "rows": rows, "test_rows": test_rows}
+    return parts, stats
+
+
+def fit_preprocessor(stats):
+    """
+    The notebook's ColumnTransformer, fitted to the streamed statistics.
+    It is fitted on a small frame holding each column's training minimum
+    and maximum and every formation, which gives the same scaler ranges
+    and encoder categories as fitting on all of the training rows.
+    """
+    scaler = stats["scaler"]
+    formations = stats["formations"]
+    if not formations or not hasattr(scaler, "data_min_"):
+        raise ValueError("No training rows to fit the preprocessor on: no play-by-play rows joined the plays.")
+    n = max(2, len(formations))
+    frame = pd.DataFrame({name: np.where(np.arange(n) % 2 == 0, low, high)
+                          for name, low, high in zip(NUMERICAL_FEATURES, scaler.data_min_, scaler.data_max_)})
+    frame[CATEGORICAL_FEATURES[0]] = [formations[i % len(formations)] for i in range(n)]
+    preprocessor = make_preprocessor().fit(frame)
+    return preprocessor, LabelEncoder().fit(stats["labels"])
+
+
+class PartIterator(xgb.DataIter):
+    """Feeds XGBoost the training (or test) rows of the Parquet parts, one part per batch."""
+
+    def __init__(self, parts, preprocessor, label_encoder, clock_mean, test=False, cache_prefix=None):
+        self.parts = parts
+        self.preprocessor = preprocessor
+        self.label_encoder = label_encoder
+        self.clock_mean = clock_mean
+        self.test = test
+        self._index = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def load(self, path):
+        """(X, y) for one part, or None when it has no rows on this side of the split."""
+        table = pd.read_parquet(path)
+        table = table[table["is_test"] == self.test].drop(columns=["is_test"])
+        if table.empty:
+            return None
+        table["playClockAtSnap"] = table["playClockAtSnap"].fillna(self.clock_mean)
+        X, y = split_target(table)
+        return self.preprocessor.transform(X), self.label_encoder.transform(y)
+
+    def next(self, input_data):
+        while self._index < len(self.parts):
+            batch = self.load(self.parts[self._index])
+            self._index += 1
+            if batch is not None:
+                input_data(data=batch[0], label=batch[1])
+                return True
+        return False
+
+    def reset(self):
+        self._index = 0
+
+
+def streamed_f1(booster, parts, preprocessor, label_encoder, clock_mean):
+    """F1 of the positive class over the test rows of every part, one part at a time."""
+    batches = PartIterator(parts, preprocessor, label_encoder, clock_mean, test=True)
+    tp = fp = fn = 0
+    for path in parts:
+        batch = batches.load(path)
+        if batch is None:
+            continue
+        predicted = booster.inplace_predict(batch[0]) >= 0.5
+        actual = batch[1] == 1
+        tp += int((predicted & actual).sum())
+        fp += int((predicted & ~actual).sum())
+        fn += int((~predicted & actual).sum())
+    return 2 * tp / max(2 * tp + fp + fn, 1)
+
+
+def train_streaming(seasons, rounds=200, params=None, out_dir=STREAM_DIR, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Out-of-core training: stream_join the seasons, then boost from the
+    Parquet parts through an external-memory quantile matrix whose pages
+    are cached under `out_dir`. Returns (bundle, report).
+    """
+    start = time.perf_counter()
+    parts, stats = stream_join(seasons, out_dir, chunk_rows)
+    join_s = time.perf_counter() - start
+    preprocessor, label_encoder = fit_preprocessor(stats)
+
+    batches = PartIterator(parts, preprocessor, label_encoder, stats["clock_mean"],
+                           cache_prefix=os.path.join(out_dir, "xgb_cache"))
+    params = dict(XGB_PARAMS, **(params or {}))
+    external = getattr(xgb, "ExtMemQuantileDMatrix", None)
+    if external is not None:
+        dtrain = external(batches, max_bin=params["max_bin"])
+    else:
+        dtrain = xgb.DMatrix(batches)
+    booster = xgb.train(params, dtrain, num_boost_round=rounds)
+    train_s = time.perf_counter() - start - join_s
+
+    model = XGBClassifier()
+    model.load_model(booster.save_raw("ubj"))
+    bundle = {
+        "model": model,
+        "preprocessor": preprocessor,
+        "label_encoder": label_encoder,
+        "numerical_features": NUMERICAL_FEATURES,
+        "categorical_features": CATEGORICAL_FEATURES,
+        "defaults": {"playClockAtSnap": stats["clock_mean"]},
+    }
+    report = {"mode": "stream", "seasons": len(seasons), "rows": stats["rows"], "join_s": join_s,
+              "train_s": train_s,
+              "test_f1": streamed_f1(booster, parts, preprocessor, label_encoder, stats["clock_mean"])}
+    return bundle, report
+
+
+def train_in_memory(seasons, rounds=200, params=None):
+    """
+    The single-table path for comparison: build_training_data for every
+    season, concatenate, and fit in memory, holding out TEST_PERCENT of
+    the rows by a hash of their contents (the table has no play ids).
+    """
+    start = time.perf_counter()
+    tables = []
+    for bdb_path, pbp_path in seasons:
+        table = build_training_data(bdb_path, pbp_path)
+        tables.append(table.astype({"offenseFormation": str, "play_type": str}))
+    merged = pd.concat(tables, ignore_index=True)
+    del tables
+    join_s = time.perf_counter() - start
+
+    test = pd.util.hash_pandas_object(merged, index=False).to_numpy() % 100 < TEST_PERCENT
+    X, y = split_target(merged)
+    preprocessor = make_preprocessor()
+    label_encoder = LabelEncoder()
+    X_train = preprocessor.fit_transform(X[~test])
+    y_train = label_encoder.fit_transform(y[~test])
+    params = dict(XGB_PARAMS, **(params or {}))
+    model = XGBClassifier(n_estimators=rounds, **params)
+    model.fit(X_train, y_train)
+    train_s = time.perf_counter() - start - join_s
+
+    predicted = model.predict(preprocessor.transform(X[test]))
+    actual = label_encoder.transform(y[test])
+    tp = int(((predicted == 1) & (actual == 1)).sum())
+    f1 = 2 * tp / max(2 * tp + int((predicted != actual).sum()), 1)
+    return {"mode": "memory", "seasons": len(seasons), "rows": len(merged), "join_s": join_s, "train_s": train_s,
+            "test_f1": f1}
+
+
+def benchmark(season, counts=(1, 5, 10), rounds=50, chunk_rows=STREAM_CHUNK_ROWS, modes=("memory", "stream")):
+    """
+    Peak memory and wall time for 1, 5 and 10 seasons, each run in a fresh
+    process so peak RSS is not inherited. The given season pair is
+    repeated to make up the larger counts.
+    """
+    print(f"{'mode':<8}{'seasons':>8}{'rows':>10}{'join s':>9}{'train s':>9}{'peak MiB':>10}{'test F1':>9}")
+    for count in counts:
+        for mode in modes:
+            command = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--rounds", str(rounds),
+                       "--chunk-rows", str(chunk_rows), "--json"]
+            for _ in range(count):
+                command += ["--season", *season]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{mode} x{count} failed:\n{result.stderr}", file=sys.stderr)
+                continue
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{mode:<8}{count:>8}{report['rows']:>10}{report['join_s']:>9.1f}{report['train_s']:>9.1f}"
+                  f"{report['peak_rss_mb']:>10.0f}{report['test_f1']:>9.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the play model out of core on many seasons.")
+    parser.add_argument("--season", nargs=2, action="append", metavar=("PLAYS", "PBP"),
+                        help="A Big Data Bowl plays.csv and its nflverse play_by_play CSV (repeatable).")
+    parser.add_argument("--mode", choices=["stream", "memory"], default="stream")
+    parser.add_argument("--rounds", type=int, default=200, help="Boosting rounds.")
+    parser.add_argument("--max-depth", type=int, default=XGB_PARAMS["max_depth"])
+    parser.add_argument("--learning-rate", type=float, default=XGB_PARAMS["learning_rate"])
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS, help="Play-by-play rows per chunk.")
+    parser.add_argument("--work-dir", default=STREAM_DIR, help="Where Parquet parts and XGBoost pages go.")
+    parser.add_argument("--output", help="Save the streamed model bundle here.")
+    parser.add_argument("--json", action="store_true", help="Print the report as one JSON line.")
+    parser.add_argument("--benchmark", nargs="*", type=int, metavar="SEASONS",
+                        help="Compare peak memory across season counts (default 1 5 10) for the first --season.")
+    args = parser.parse_args()
+    seasons = args.season or [(BDB_PLAYS_CSV, NFLVERSE_PBP_CSV)]
+    params = {"max_depth": args.max_depth, "learning_rate": args.learning_rate}
+
+    if args.benchmark is not None:
+        benchmark(seasons[0], args.benchmark or (1, 5, 10), args.rounds, args.chunk_rows)
+    else:
+        if args.mode == "stream":
+            bundle, report = train_streaming(seasons, args.rounds, params, args.work_dir, args.chunk_rows)
+            if args.output:
+                save_bundle(args.output, **bundle)
+        else:
+            report = train_in_memory(seasons, args.rounds, params)
+        report["peak_rss_mb"] = peak_rss_mb()
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print(f"{report['rows']} rows from {report['seasons']} seasons: join {report['join_s']:.1f}s, "
+                  f"train {report['train_s']:.1f}s, test F1 {report['test_f1']:.4f}, "
+                  f"peak RSS {report['peak_rss_mb']:.0f} MiB")